@@ -0,0 +1,106 @@
+"""
+数据读写基准测试：CSV / Excel / Parquet / Arrow IPC
+
+比较同一份负载数据在不同格式下的文件大小和读取耗时（只读取时间列和负载列）。
+Excel 单表最多 1,048,576 行，超过时 xlsx 只写入前 1,048,575 行并在结果中注明。
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.utils.columnar_io import read_columnar, write_history
+
+EXCEL_MAX_ROWS = 1_048_575
+
+
+def make_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """生成 10 Hz 的负载数据（时间列为时间戳）"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2024-01-01T00:00:00', 'ms')
+    return pd.DataFrame({
+        'UTC时间': start + np.arange(n_rows) * np.timedelta64(100, 'ms'),
+        '负载数据': rng.normal(60.0, 15.0, n_rows).round(3),
+    })
+
+
+def timed(func, repeat: int = 3) -> float:
+    """返回多次运行的最短耗时 (s)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV / xlsx / Parquet / Arrow 读取基准")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="数据行数")
+    parser.add_argument("--skip-xlsx", action="store_true", help="跳过 xlsx（写入很慢）")
+    parser.add_argument("--repeat", type=int, default=3, help="每种格式读取次数（取最短）")
+    parser.add_argument("--output", type=str, default=None, help="结果 JSON 文件")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    columns = list(df.columns)
+    history = {name: df[name].to_numpy() for name in columns}
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cases = {
+            'csv': (tmp / 'load.csv',
+                    lambda p: df.to_csv(p, index=False),
+                    lambda p: pd.read_csv(p, usecols=columns, parse_dates=['UTC时间'])),
+            'parquet': (tmp / 'load.parquet',
+                        lambda p: write_history(history, p, fmt='parquet'),
+                        lambda p: read_columnar(p)),
+            'arrow': (tmp / 'load.arrow',
+                      lambda p: write_history(history, p, fmt='arrow'),
+                      lambda p: read_columnar(p)),
+        }
+        if not args.skip_xlsx:
+            cases['xlsx'] = (tmp / 'load.xlsx',
+                             lambda p: df.head(EXCEL_MAX_ROWS).to_excel(p, index=False),
+                             lambda p: pd.read_excel(p, usecols=columns))
+
+        for fmt, (path, write, read) in cases.items():
+            start = time.perf_counter()
+            write(path)
+            write_time = time.perf_counter() - start
+            repeat = 1 if fmt == 'xlsx' else args.repeat
+            rows = min(args.rows, EXCEL_MAX_ROWS) if fmt == 'xlsx' else args.rows
+            read_time = timed(lambda: read(path), repeat)
+            results.append({
+                'format': fmt,
+                'rows': rows,
+                'size_mb': path.stat().st_size / 1024 ** 2,
+                'write_s': write_time,
+                'read_s': read_time,
+                'read_rows_per_s': rows / read_time,
+            })
+            print(f"{fmt:<8} rows={rows:>10,}  size={results[-1]['size_mb']:>9.1f} MB  "
+                  f"write={write_time:>7.2f}s  read={read_time:>7.3f}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
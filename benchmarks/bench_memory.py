@@ -0,0 +1,182 @@
+"""
+内存基准测试：每个仿真步的内存占用
+
+用 tracemalloc 测量热路径各层的每步字节数：
+- STUKF 滤波器（预热后的稳态增长，历史长度有界时应接近 0）
+- 控制器单步（不记录历史）与记录历史时的稳态增长
+- get_history 复制出的 numpy 数组
+- 界面会话存储（session_state 中保存的历史数据和指标）
+- 导出（CSV / Parquet 输出大小和导出过程的 Python 侧峰值；Arrow 内存池的分配不计入）
+
+--check 时按 BUDGETS 检查稳态每步分配，超出预算时以退出码 1 结束，
+用于在提交前发现热路径上的内存回归。
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.core import ControlParams, STUKF, V5AntiBackflowController
+from src.utils.columnar_io import history_to_bytes
+from src.utils.data_processing import generate_sample_data
+from src.utils.simulation import simulate
+
+SEED = 20240101
+
+# 稳态每步分配预算 (字节/步)，--check 时超出即失败
+BUDGETS: Dict[str, float] = {
+    "stukf": 1.0,  # 测量历史有界，稳态不增长
+    "controller.step": 1.0,  # 不记录历史时，稳态不增长
+    "controller.history": 96.0,  # 8 个 float64 + 1 个布尔 = 65 字节，array 扩容余量约 12%
+    "get_history": 80.0,  # numpy 复制，65 字节
+    "session": 100.0,  # 历史数组 + 指标字典
+}
+
+EXPORT_COLUMNS = ['time', 'load', 'P_cmd', 'U_A', 'U_B', 'L_med', 'L_lb', 'safety_bypass']
+
+
+def traced_growth(setup: Callable[[], object], step: Callable[[object, float, float], None],
+                  load: List[float], times: List[float], warmup: int) -> float:
+    """
+    预热 warmup 步后，测量剩余步数的稳态内存增长 (字节/步)
+
+    参数:
+        setup: 创建被测对象
+        step: step(obj, load, time) 执行一步
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        obj = setup()
+        for l, t in zip(load[:warmup], times[:warmup]):
+            step(obj, l, t)
+        gc.collect()
+        before, _ = tracemalloc.get_traced_memory()
+        for l, t in zip(load[warmup:], times[warmup:]):
+            step(obj, l, t)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (after - before) / max(len(load) - warmup, 1)
+
+
+def retained(build: Callable[[], object]) -> tuple:
+    """build() 返回值保持存活时的 Python 侧占用和构建过程的峰值 (字节)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        obj = build()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        del obj
+    finally:
+        tracemalloc.stop()
+    return current, peak
+
+
+def measure(hours: float, warmup: int) -> dict:
+    """运行所有测量，返回 {名称: 字节/步}"""
+    df = generate_sample_data(duration_hours=hours, interval_sec=1.0, seed=SEED)
+    load = df['load'].tolist()
+    times = df['time'].tolist()
+    n = len(load)
+    params = ControlParams()
+    history_size = max(params.local_window_size, 2)
+
+    results = {}
+    results["stukf"] = traced_growth(
+        lambda: STUKF(load[0], history_size=history_size),
+        lambda kf, l, t: kf.update(l, t), load, times, warmup)
+    results["stukf.unbounded"] = traced_growth(
+        lambda: STUKF(load[0]),
+        lambda kf, l, t: kf.update(l, t), load, times, warmup)
+    results["controller.step"] = traced_growth(
+        lambda: V5AntiBackflowController(params, load[0], record_history=False),
+        lambda c, l, t: c.compute_control(l, t), load, times, warmup)
+    results["controller.history"] = traced_growth(
+        lambda: V5AntiBackflowController(params, load[0]),
+        lambda c, l, t: c.compute_control(l, t), load, times, warmup)
+
+    controller = V5AntiBackflowController(params, load[0])
+    for l, t in zip(load, times):
+        controller.compute_control(l, t)
+    results["get_history"] = retained(controller.get_history)[0] / n
+    del controller
+
+    # 界面会话中保存的内容：历史数据和指标（不含控制器）
+    time_arr, load_arr = df['time'].to_numpy(), df['load'].to_numpy()
+
+    def session_state():
+        result = simulate(time_arr, load_arr, params)
+        return {'history': result.history, 'metrics': result.metrics}
+    results["session"] = retained(session_state)[0] / n
+
+    history = simulate(time_arr, load_arr, params).history
+    # 与界面下载区相同的导出方式
+    exports = {
+        "csv": lambda: pd.DataFrame({name: history[name] for name in EXPORT_COLUMNS}).to_csv(index=False),
+        "parquet": lambda: history_to_bytes(history, fmt="parquet", columns=EXPORT_COLUMNS),
+    }
+    for fmt, export in exports.items():
+        try:
+            size, peak = retained(export)
+        except ImportError as e:
+            print(f"  跳过 export.{fmt}: {e}")
+            continue
+        results[f"export.{fmt}"] = size / n
+        results[f"export.{fmt}.peak"] = peak / n
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="内存基准测试（字节/步）")
+    parser.add_argument("--hours", type=float, default=2.0, help="仿真时长（小时，1 Hz）")
+    parser.add_argument("--warmup", type=int, default=2000, help="稳态测量前的预热步数")
+    parser.add_argument("--check", action="store_true", help="检查稳态分配预算，超出时退出码为 1")
+    parser.add_argument("--output", type=str, default=None, help="结果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print(f"内存基准测试: {args.hours:g} 小时 @ 1 Hz，预热 {args.warmup} 步")
+    print("=" * 80)
+    results = measure(args.hours, args.warmup)
+
+    failures = []
+    for name, value in results.items():
+        budget = BUDGETS.get(name)
+        line = f"  {name:<24} {value:>10.1f} 字节/步"
+        if budget is not None:
+            ok = value <= budget
+            line += f"   预算 {budget:>6.1f}  {'✓' if ok else '✗ 超出'}"
+            if not ok:
+                failures.append(name)
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"hours": args.hours, "warmup": args.warmup, "bytes_per_step": results,
+                       "budgets": BUDGETS}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+
+    if args.check:
+        if failures:
+            print(f"\n内存预算检查失败: {', '.join(failures)}")
+            return 1
+        print("\n内存预算检查通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
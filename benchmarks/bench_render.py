@@ -0,0 +1,252 @@
+"""
+图表渲染基准：SVG (go.Scatter) 与 WebGL (go.Scattergl) 对比
+
+服务端：在 24 小时 @ 1 Hz 数据上分别以 SVG / WebGL / 降采样三种方式构建时间序列图、
+控制效果图和容量利用图，测量构建耗时、JSON 序列化耗时和发送到浏览器的数据量。
+
+浏览器端：把同样的图表写入一个自包含的 HTML 页面（内嵌 plotly.js），页面加载后依次
+测量每张图 Plotly.newPlot 到首帧绘制完成的耗时和一次缩放（relayout）的耗时，
+结果显示在页面表格中并以 JSON 输出到控制台。
+
+--headless：用 kaleido 0.2.x 自带的无头 Chromium 执行同一段计时代码（无需另装浏览器，
+可在 CI 中运行）。kaleido 为每个导出请求调用 Plotly.toImage，这里加载的 plotly.js 末尾
+追加了一段脚本，把 toImage 替换为"挂到页面上绘制并计时"，返回计时结果代替图片。
+无头 Chromium 的 WebGL 由 SwiftShader 软件渲染，WebGL 结果偏慢，是没有 GPU 时的下限。
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from src.core import ControlParams
+from src.ui.visualization import (
+    create_control_effectiveness_plot,
+    create_curtailment_analysis,
+    create_time_series_plot,
+)
+from src.utils.data_processing import generate_sample_data
+from src.utils.simulation import simulate
+
+SEED = 20240101
+
+DEFAULT_HTML = "output/benchmarks/render_compare.html"
+
+# 渲染方式: 图表构建参数
+MODES: Dict[str, dict] = {
+    "svg": dict(max_points=None, webgl=False),
+    "webgl": dict(max_points=None, webgl=True),
+    "downsampled": dict(),
+}
+
+
+def build_figures(history: dict, P_max: float) -> Dict[str, Callable[..., object]]:
+    """被测图表: {名称: 接受渲染方式参数的构建函数}"""
+    return {
+        "time_series": lambda **kw: create_time_series_plot(history, show_stukf=True, show_bounds=True, **kw),
+        "effectiveness": lambda **kw: create_control_effectiveness_plot(history, **kw),
+        "curtailment": lambda **kw: create_curtailment_analysis(history, P_max, **kw),
+    }
+
+
+def measure_server(figures: Dict[str, Callable], repeat: int) -> tuple:
+    """构建并序列化每张图，返回 (结果列表, {(图, 方式): JSON})"""
+    results, specs = [], {}
+    for name, build in figures.items():
+        for mode, kwargs in MODES.items():
+            build_times, json_times = [], []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                fig = build(**kwargs)
+                t1 = time.perf_counter()
+                spec = pio.to_json(fig, validate=False)
+                t2 = time.perf_counter()
+                build_times.append(t1 - t0)
+                json_times.append(t2 - t1)
+            specs[(name, mode)] = spec
+            results.append({
+                "figure": name,
+                "mode": mode,
+                "trace_type": fig.data[0].type,
+                "points": sum(len(trace.x) for trace in fig.data if trace.type in ("scatter", "scattergl")),
+                "build_ms": min(build_times) * 1e3,
+                "json_ms": min(json_times) * 1e3,
+                "payload_mb": len(spec) / 1e6,
+            })
+    return results, specs
+
+
+# 单张图的计时：newPlot 到首帧绘制完成、缩放到 25%~50% 区间到重绘完成
+TIMING_JS = """
+const frame = () => new Promise(r => requestAnimationFrame(() => requestAnimationFrame(r)));
+async function timeRender(div, spec) {
+  Plotly.purge(div);
+  await frame();
+  let t0 = performance.now();
+  await Plotly.newPlot(div, spec.data, spec.layout);
+  await frame();
+  const draw_ms = performance.now() - t0;
+  const xs = spec.data[0].x, lo = xs[Math.floor(xs.length * 0.25)], hi = xs[Math.floor(xs.length * 0.5)];
+  t0 = performance.now();
+  await Plotly.relayout(div, {'xaxis.range': [lo, hi]});
+  await frame();
+  return {draw_ms, zoom_ms: performance.now() - t0, canvas: !!div.querySelector('canvas')};
+}
+"""
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>图表渲染基准</title>
+<script>{plotlyjs}</script>
+<style>body{{font-family:sans-serif;margin:20px}} table{{border-collapse:collapse}}
+td,th{{border:1px solid #ccc;padding:4px 10px;text-align:right}} .plot{{width:1200px;height:500px}}</style>
+</head><body>
+<h2>图表渲染基准（{label}）</h2>
+<table id="result"><tr><th>图表</th><th>方式</th><th>点数</th><th>首帧 (ms)</th><th>缩放 (ms)</th></tr></table>
+<div id="plot" class="plot"></div>
+<script>
+{timing}
+const cases = {cases};
+const repeat = {repeat};
+const median = a => a.slice().sort((x, y) => x - y)[Math.floor(a.length / 2)];
+(async () => {{
+  const div = document.getElementById('plot');
+  const out = [];
+  for (const c of cases) {{
+    const draw = [], zoom = [];
+    for (let i = 0; i < repeat; i++) {{
+      const t = await timeRender(div, c.spec);
+      draw.push(t.draw_ms);
+      zoom.push(t.zoom_ms);
+    }}
+    const row = {{figure: c.figure, mode: c.mode, points: c.points, draw_ms: median(draw), zoom_ms: median(zoom)}};
+    out.push(row);
+    document.getElementById('result').insertAdjacentHTML('beforeend',
+      `<tr><td>${{row.figure}}</td><td>${{row.mode}}</td><td>${{row.points}}</td>` +
+      `<td>${{row.draw_ms.toFixed(0)}}</td><td>${{row.zoom_ms.toFixed(0)}}</td></tr>`);
+  }}
+  Plotly.purge(div);
+  console.log(JSON.stringify(out));
+}})();
+</script></body></html>
+"""
+
+# kaleido 页面中替换 Plotly.toImage：在与 HTML 页面相同尺寸的 div 中绘制并计时
+KALEIDO_SHIM = TIMING_JS + """
+Plotly.toImage = async function (fig) {
+  const div = document.createElement('div');
+  div.style.width = '1200px';
+  div.style.height = '500px';
+  document.body.appendChild(div);
+  try {
+    return JSON.stringify(await timeRender(div, fig));
+  } finally {
+    Plotly.purge(div);
+    div.remove();
+  }
+};
+"""
+
+
+def write_html(path: Path, results: List[dict], specs: dict, label: str, repeat: int):
+    """写出浏览器端渲染计时页面"""
+    cases = ",".join(
+        json.dumps({k: r[k] for k in ("figure", "mode", "points")})[:-1]
+        + ', "spec": ' + specs[(r["figure"], r["mode"])] + "}"
+        for r in results
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(HTML_TEMPLATE.format(plotlyjs=get_plotlyjs(), timing=TIMING_JS, cases=f"[{cases}]",
+                                         repeat=repeat, label=label),
+                    encoding="utf-8")
+
+
+def measure_headless(results: List[dict], specs: dict, repeat: int) -> List[dict]:
+    """
+    在 kaleido 自带的无头 Chromium 中测量每张图的首帧和缩放耗时（取中位数）
+
+    返回:
+        [{figure, mode, points, draw_ms, zoom_ms, canvas}]，canvas 表示是否实际使用了 WebGL
+    """
+    try:
+        from kaleido.scopes.plotly import PlotlyScope
+    except ImportError:
+        raise RuntimeError("--headless 需要 kaleido 0.2.x（pip install kaleido==0.2.1）") from None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plotlyjs = Path(tmp) / "plotly_timed.js"
+        plotlyjs.write_text(get_plotlyjs() + KALEIDO_SHIM, encoding="utf-8")
+        scope = PlotlyScope(plotlyjs=str(plotlyjs))
+        # 预热：启动 Chromium 并初始化 WebGL 上下文
+        scope.transform({"data": [{"type": "scattergl", "x": [0, 1], "y": [0, 1]}]}, format="svg")
+
+        rows = []
+        for r in results:
+            spec = json.loads(specs[(r["figure"], r["mode"])])
+            runs = [json.loads(scope.transform(spec, format="svg")) for _ in range(repeat)]
+            rows.append({
+                "figure": r["figure"],
+                "mode": r["mode"],
+                "points": r["points"],
+                "draw_ms": statistics.median(run["draw_ms"] for run in runs),
+                "zoom_ms": statistics.median(run["zoom_ms"] for run in runs),
+                "canvas": runs[0]["canvas"],
+            })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="图表渲染基准（SVG / WebGL / 降采样）")
+    parser.add_argument("--hours", type=float, default=24.0, help="数据时长（小时，1 Hz）")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数（服务端取最小值，浏览器取中位数）")
+    parser.add_argument("--html", type=str, default=DEFAULT_HTML, help="浏览器端计时页面")
+    parser.add_argument("--headless", action="store_true", help="用 kaleido 自带的无头 Chromium 测量浏览器端耗时")
+    parser.add_argument("--output", type=str, default=None, help="结果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    df = generate_sample_data(duration_hours=args.hours, interval_sec=1.0, seed=SEED)
+    params = ControlParams()
+    history = simulate(df['time'].to_numpy(), df['load'].to_numpy(), params).history
+    label = f"{args.hours:g} 小时 @ 1 Hz，{len(df):,} 个样本"
+
+    print("=" * 80)
+    print(f"图表渲染基准: {label}")
+    print("=" * 80)
+    results, specs = measure_server(build_figures(history, params.P_max), args.repeat)
+    print(f"  {'图表':<14} {'方式':<12} {'轨迹类型':<10} {'点数':>9} {'构建(ms)':>9} {'序列化(ms)':>10} {'数据量(MB)':>10}")
+    for r in results:
+        print(f"  {r['figure']:<14} {r['mode']:<12} {r['trace_type']:<10} {r['points']:>9,} "
+              f"{r['build_ms']:>9.0f} {r['json_ms']:>10.0f} {r['payload_mb']:>10.2f}")
+
+    write_html(Path(args.html), results, specs, label, args.repeat)
+    print(f"\n浏览器端计时页面: {args.html}（用浏览器打开，结果显示在页面表格中）")
+
+    browser = None
+    if args.headless:
+        browser = measure_headless(results, specs, args.repeat)
+        print("\n无头 Chromium（WebGL 为 SwiftShader 软件渲染）:")
+        print(f"  {'图表':<14} {'方式':<12} {'点数':>9} {'首帧(ms)':>9} {'缩放(ms)':>9}")
+        for r in browser:
+            print(f"  {r['figure']:<14} {r['mode']:<12} {r['points']:>9,} {r['draw_ms']:>9.0f} {r['zoom_ms']:>9.0f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"hours": args.hours, "samples": len(df), "server": results, "browser": browser}, f,
+                      ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
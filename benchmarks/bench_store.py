@@ -0,0 +1,294 @@
+"""
+基准结果存储与回归比较
+
+bench_suite.py --save 把每次运行写入本地 SQLite（output/benchmarks/results.sqlite），
+记录运行环境、git 版本和数据集指纹，以及每个用例的延迟样本。
+比较命令对基线和候选运行的同名用例做单侧 Mann-Whitney U 检验：
+中位数变慢超过阈值且统计显著时判定为性能回归，并以非零状态退出。
+
+    python benchmarks/bench_store.py list
+    python benchmarks/bench_store.py compare --baseline <运行ID|git版本|latest~1> --candidate latest
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import json
+import sqlite3
+import subprocess
+from typing import List, Optional
+
+import numpy as np
+from scipy.stats import mannwhitneyu
+
+DEFAULT_STORE = Path("output") / "benchmarks" / "results.sqlite"
+
+# 每个用例最多保存的延迟样本数（等间隔抽取，保留时间上的分布）
+MAX_STORED_SAMPLES = 2000
+
+# 比较时把单次调用样本按时间顺序分块取中位数，抵消相邻调用间的相关性（CPU 频率、缓存状态漂移）
+N_BLOCKS = 20
+
+# 默认判定条件：中位数变慢超过 5% 且单侧检验 p 值不超过 0.05
+DEFAULT_THRESHOLD = 0.05
+DEFAULT_ALPHA = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created TEXT NOT NULL,
+    label TEXT,
+    git_rev TEXT,
+    git_dirty INTEGER,
+    quick INTEGER,
+    seed INTEGER,
+    dataset_fingerprint TEXT,
+    environment TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    n INTEGER,
+    per_sec REAL,
+    latency_p50_us REAL,
+    latency_p99_us REAL,
+    peak_memory_mb REAL,
+    samples BLOB,
+    PRIMARY KEY (run_id, name)
+);
+"""
+
+
+def git_revision() -> dict:
+    """当前 git 版本和工作区是否有未提交修改（不在 git 仓库中时为 None）"""
+    try:
+        rev = subprocess.run(["git", "rev-parse", "HEAD"], cwd=project_root,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=project_root,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {"git_rev": None, "git_dirty": None}
+    return {"git_rev": rev, "git_dirty": bool(status.strip())}
+
+
+def thin_samples(samples_us: np.ndarray) -> np.ndarray:
+    """等间隔抽取至多 MAX_STORED_SAMPLES 个样本"""
+    samples_us = np.asarray(samples_us, dtype=np.float64)
+    step = max(1, -(-len(samples_us) // MAX_STORED_SAMPLES))
+    return samples_us[::step]
+
+
+def block_medians(samples_us: np.ndarray) -> np.ndarray:
+    """按时间顺序分为 N_BLOCKS 块并取各块中位数（样本数不足时原样返回）"""
+    if len(samples_us) < 2 * N_BLOCKS:
+        return np.asarray(samples_us, dtype=np.float64)
+    return np.array([np.median(block) for block in np.array_split(samples_us, N_BLOCKS)])
+
+
+class ResultStore:
+    """基准结果的 SQLite 存储"""
+
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save(self, report: dict, label: Optional[str] = None) -> int:
+        """
+        保存 bench_suite 的运行报告
+
+        参数:
+            report: bench_suite.main() 返回的报告（results 中每项需含 samples_us）
+            label: 可选的运行标签（如分支名或改动说明）
+
+        返回:
+            运行 ID
+        """
+        with self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO runs (created, label, git_rev, git_dirty, quick, seed, dataset_fingerprint, environment)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (report["created"], label, report.get("git_rev"), report.get("git_dirty"),
+                 int(report.get("quick", False)), report.get("seed"),
+                 report.get("dataset_fingerprint"), json.dumps(report.get("environment", {}))),
+            )
+            run_id = cur.lastrowid
+            self._conn.executemany(
+                "INSERT INTO results (run_id, name, n, per_sec, latency_p50_us, latency_p99_us, peak_memory_mb, samples)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, r["name"], r["n"], r["per_sec"], r.get("latency_p50_us"), r.get("latency_p99_us"),
+                  r.get("peak_memory_mb"), thin_samples(r["samples_us"]).tobytes())
+                 for r in report["results"]],
+            )
+        return run_id
+
+    def runs(self, limit: int = 20) -> List[dict]:
+        """最近的运行（新的在前）"""
+        rows = self._conn.execute(
+            "SELECT id, created, label, git_rev, git_dirty, quick, dataset_fingerprint,"
+            " (SELECT COUNT(*) FROM results WHERE run_id = runs.id)"
+            " FROM runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        keys = ["id", "created", "label", "git_rev", "git_dirty", "quick", "dataset_fingerprint", "n_cases"]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def resolve(self, ref: str) -> int:
+        """
+        把运行引用解析为运行 ID
+
+        支持: 运行 ID、"latest"、"latest~N"（倒数第 N+1 次）、git 版本前缀（取该版本最近一次运行）
+        """
+        if ref.isdigit():
+            row = self._conn.execute("SELECT id FROM runs WHERE id = ?", (int(ref),)).fetchone()
+        elif ref == "latest" or ref.startswith("latest~"):
+            offset = int(ref.partition("~")[2] or 0)
+            row = self._conn.execute("SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?", (offset,)).fetchone()
+        else:
+            row = self._conn.execute("SELECT id FROM runs WHERE git_rev LIKE ? ORDER BY id DESC LIMIT 1",
+                                     (ref + "%",)).fetchone()
+        if row is None:
+            raise ValueError(f"找不到基准运行: {ref}")
+        return row[0]
+
+    def load(self, run_id: int) -> dict:
+        """读取一次运行，results 为 {用例名: {n, per_sec, ..., samples_us}}"""
+        row = self._conn.execute(
+            "SELECT created, label, git_rev, git_dirty, quick, seed, dataset_fingerprint, environment"
+            " FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"找不到基准运行: {run_id}")
+        run = dict(zip(["created", "label", "git_rev", "git_dirty", "quick", "seed", "dataset_fingerprint"], row))
+        run["id"] = run_id
+        run["environment"] = json.loads(row[7] or "{}")
+        run["results"] = {}
+        for name, n, per_sec, p50, p99, peak, blob in self._conn.execute(
+                "SELECT name, n, per_sec, latency_p50_us, latency_p99_us, peak_memory_mb, samples"
+                " FROM results WHERE run_id = ?", (run_id,)):
+            run["results"][name] = {
+                "n": n, "per_sec": per_sec, "latency_p50_us": p50, "latency_p99_us": p99,
+                "peak_memory_mb": peak, "samples_us": np.frombuffer(blob, dtype=np.float64),
+            }
+        return run
+
+
+def compare_runs(
+    baseline: dict,
+    candidate: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    alpha: float = DEFAULT_ALPHA,
+) -> List[dict]:
+    """
+    比较两次运行的同名用例
+
+    样本为单次调用延迟（微基准，先按 block_medians 分块）或每次重复的单步耗时
+    （宏基准），两者都是越小越好。中位数比值 > 1 + threshold 且单侧
+    Mann-Whitney U 检验 p <= alpha 时标记为回归；反方向同样条件标记为改进。
+    宏基准默认重复 3 次，3 对 3 全部变慢时 p = 0.05。
+
+    返回:
+        每个用例一行：name, baseline_us, candidate_us, change（相对变化）, p_value, status
+    """
+    rows = []
+    for name, base in baseline["results"].items():
+        cand = candidate["results"].get(name)
+        if cand is None:
+            continue
+        a, b = block_medians(base["samples_us"]), block_medians(cand["samples_us"])
+        base_median, cand_median = float(np.median(a)), float(np.median(b))
+        change = cand_median / base_median - 1.0
+        p_slower = float(mannwhitneyu(b, a, alternative="greater").pvalue)
+        p_faster = float(mannwhitneyu(b, a, alternative="less").pvalue)
+        if change > threshold and p_slower <= alpha:
+            status, p_value = "regression", p_slower
+        elif change < -threshold and p_faster <= alpha:
+            status, p_value = "improvement", p_faster
+        else:
+            status, p_value = "unchanged", min(p_slower, p_faster)
+        rows.append({"name": name, "baseline_us": base_median, "candidate_us": cand_median,
+                     "change": change, "p_value": p_value, "status": status})
+    return rows
+
+
+def _describe(run: dict) -> str:
+    rev = (run["git_rev"] or "?")[:10] + ("+dirty" if run["git_dirty"] else "")
+    label = f" [{run['label']}]" if run["label"] else ""
+    return f"#{run['id']} {run['created']} {rev}{label}"
+
+
+def _cmd_list(store: ResultStore, args) -> int:
+    print(f"{'ID':>5}  {'时间':<19}  {'git 版本':<16}  {'用例数':>6}  {'数据指纹':<12}  标签")
+    for run in store.runs(args.limit):
+        rev = (run["git_rev"] or "?")[:10] + ("+dirty" if run["git_dirty"] else "")
+        print(f"{run['id']:>5}  {run['created']:<19}  {rev:<16}  {run['n_cases']:>6}  "
+              f"{(run['dataset_fingerprint'] or '?')[:12]:<12}  {run['label'] or ''}"
+              + ("  (quick)" if run["quick"] else ""))
+    return 0
+
+
+def _cmd_compare(store: ResultStore, args) -> int:
+    baseline = store.load(store.resolve(args.baseline))
+    candidate = store.load(store.resolve(args.candidate))
+    print(f"基线: {_describe(baseline)}")
+    print(f"候选: {_describe(candidate)}")
+    if baseline["dataset_fingerprint"] != candidate["dataset_fingerprint"]:
+        print("⚠️ 两次运行的数据集指纹不同，结果不可直接比较")
+    if baseline["environment"] != candidate["environment"]:
+        print("⚠️ 两次运行的环境不同: "
+              + ", ".join(f"{k}={baseline['environment'].get(k)}→{candidate['environment'].get(k)}"
+                          for k in sorted(set(baseline["environment"]) | set(candidate["environment"]))
+                          if baseline["environment"].get(k) != candidate["environment"].get(k)))
+
+    rows = compare_runs(baseline, candidate, args.threshold, args.alpha)
+    marks = {"regression": "❌ 变慢", "improvement": "✅ 变快", "unchanged": "  —"}
+    print(f"\n{'用例':<38} {'基线 µs':>12} {'候选 µs':>12} {'变化':>8} {'p 值':>10}")
+    print("-" * 88)
+    for row in rows:
+        print(f"{row['name']:<38} {row['baseline_us']:>12.2f} {row['candidate_us']:>12.2f} "
+              f"{row['change'] * 100:>+7.1f}% {row['p_value']:>10.2g}  {marks[row['status']]}")
+
+    regressions = [row["name"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"\n发现 {len(regressions)} 项性能回归: {', '.join(regressions)}")
+        return 1
+    print("\n未发现性能回归")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="基准结果存储与回归比较")
+    parser.add_argument("--store", type=str, default=str(DEFAULT_STORE), help="结果数据库路径")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_list = sub.add_parser("list", help="列出最近的运行")
+    p_list.add_argument("--limit", type=int, default=20)
+
+    p_cmp = sub.add_parser("compare", help="与基线比较，发现回归时退出码为 1")
+    p_cmp.add_argument("--baseline", type=str, required=True, help="基线运行（ID / git 版本前缀 / latest~N）")
+    p_cmp.add_argument("--candidate", type=str, default="latest", help="候选运行（默认最近一次）")
+    p_cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="中位数相对变慢阈值")
+    p_cmp.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="显著性水平")
+
+    args = parser.parse_args(argv)
+    with ResultStore(args.store) as store:
+        if args.command == "list":
+            return _cmd_list(store, args)
+        return _cmd_compare(store, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+"""
+控制栈基准测试套件
+
+覆盖微基准（单次调用延迟）和宏基准（完整仿真、数据加载、指标计算）：
+- STUKF.update / STUKF.predict_ahead
+- SafetyCalculator.compute_safety_ceiling（各安全策略）
+- V5AntiBackflowController.compute_control
+- 10 小时 / 24 小时完整仿真
+- load_data 读取大 CSV / xlsx
+- compute_metrics
+
+所有数据由固定种子生成。每项报告调用次数、吞吐量（次/秒）、单次延迟分位数
+和峰值内存（tracemalloc，单独运行一遍测量，不影响计时），结果输出为 JSON。
+--save 把结果连同 git 版本和数据集指纹写入本地结果库，用 bench_store.py compare 检查回归。
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import fnmatch
+import gc
+import hashlib
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from dataclasses import replace
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.core import ControlParams, STUKF, V5AntiBackflowController
+from src.core.v5_anti_backflow.safety_calculator import SafetyCalculator
+from src.utils.data_processing import generate_sample_data, load_data
+from src.utils.metrics import compute_metrics
+from src.utils.result_cache import data_fingerprint
+from src.utils.simulation import simulate
+
+from bench_store import DEFAULT_STORE, ResultStore, git_revision, thin_samples
+
+SEED = 20240101
+
+# 安全上界计算的策略组合
+SAFETY_STRATEGIES: Dict[str, dict] = {
+    "static": dict(enable_dynamic_safety=False, adaptive_safety=False),
+    "static_adaptive": dict(enable_dynamic_safety=False, adaptive_safety=True),
+    "dynamic": dict(enable_dynamic_safety=True, trend_adaptive=False),
+    "dynamic_trend": dict(enable_dynamic_safety=True, trend_adaptive=True),
+    "dynamic_trend_sdown": dict(enable_dynamic_safety=True, trend_adaptive=True, S_down_max=20.0),
+}
+
+
+# 本次运行用到的数据集指纹 {名称: data_fingerprint}
+_FINGERPRINTS: Dict[str, str] = {}
+
+
+@lru_cache(maxsize=None)
+def make_dataset(hours: float, seed: int = SEED) -> pd.DataFrame:
+    """固定种子的 1 Hz 负载数据（按参数缓存，各用例共用）"""
+    df = generate_sample_data(duration_hours=hours, interval_sec=1.0, seed=seed)
+    _FINGERPRINTS[f"{hours:g}h/{seed}"] = data_fingerprint(df['time'].to_numpy(), df['load'].to_numpy())
+    return df
+
+
+def latency_stats(samples_ns: np.ndarray) -> dict:
+    """单次调用延迟分位数 (µs)"""
+    us = samples_ns / 1000.0
+    return {
+        "latency_mean_us": float(us.mean()),
+        "latency_p50_us": float(np.percentile(us, 50)),
+        "latency_p90_us": float(np.percentile(us, 90)),
+        "latency_p99_us": float(np.percentile(us, 99)),
+        "latency_max_us": float(us.max()),
+    }
+
+
+def peak_memory(run: Callable[[], object]) -> float:
+    """单独运行一遍并返回 Python 分配的峰值内存 (MB)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 ** 2
+
+
+# ---- 微基准：逐次调用计时 ----
+
+def bench_stukf_update(df: pd.DataFrame) -> Callable[[], np.ndarray]:
+    load = df['load'].tolist()
+    times = df['time'].tolist()
+
+    def run():
+        kf = STUKF(load[0])
+        samples = np.empty(len(load), dtype=np.int64)
+        clock = time.perf_counter_ns
+        for i, (l, t) in enumerate(zip(load, times)):
+            start = clock()
+            kf.update(l, t)
+            samples[i] = clock() - start
+        return samples
+    return run
+
+
+def bench_stukf_predict_ahead(df: pd.DataFrame) -> Callable[[], np.ndarray]:
+    load = df['load'].tolist()
+    times = df['time'].tolist()
+
+    def run():
+        kf = STUKF(load[0])
+        samples = np.empty(len(load), dtype=np.int64)
+        clock = time.perf_counter_ns
+        for i, (l, t) in enumerate(zip(load, times)):
+            kf.update(l, t)
+            start = clock()
+            kf.predict_ahead(1.4, confidence=0.99)
+            samples[i] = clock() - start
+        return samples
+    return run
+
+
+def bench_safety_ceiling(df: pd.DataFrame, overrides: dict) -> Callable[[], np.ndarray]:
+    load = df['load'].tolist()
+    times = df['time'].tolist()
+    params = replace(ControlParams(), **overrides)
+
+    def run():
+        kf = STUKF(load[0])
+        calc = SafetyCalculator(params, kf)
+        samples = np.empty(len(load), dtype=np.int64)
+        clock = time.perf_counter_ns
+        for i, (l, t) in enumerate(zip(load, times)):
+            kf.update(l, t)
+            start = clock()
+            calc.compute_safety_ceiling(l, 1.4)
+            samples[i] = clock() - start
+        return samples
+    return run
+
+
+def bench_compute_control(df: pd.DataFrame) -> Callable[[], np.ndarray]:
+    load = df['load'].tolist()
+    times = df['time'].tolist()
+
+    def run():
+        controller = V5AntiBackflowController(ControlParams(), load[0])
+        samples = np.empty(len(load), dtype=np.int64)
+        clock = time.perf_counter_ns
+        for i, (l, t) in enumerate(zip(load, times)):
+            start = clock()
+            controller.compute_control(l, t)
+            samples[i] = clock() - start
+        return samples
+    return run
+
+
+# ---- 宏基准：整体计时 ----
+
+def bench_simulation(df: pd.DataFrame) -> Callable[[], int]:
+    time_arr = df['time'].to_numpy()
+    load_arr = df['load'].to_numpy()
+
+    def run():
+        simulate(time_arr, load_arr, ControlParams())
+        return len(load_arr)
+    return run
+
+
+def bench_load_data(path: Path, n_rows: int) -> Callable[[], int]:
+    def run():
+        load_data(path)
+        return n_rows
+    return run
+
+
+def bench_compute_metrics(df: pd.DataFrame, history: dict) -> Callable[[], int]:
+    def run():
+        compute_metrics(df, history)
+        return len(history['time'])
+    return run
+
+
+def run_case(name: str, run: Callable, per_call: bool, repeat: int, measure_memory: bool) -> dict:
+    """
+    运行单个基准
+
+    参数:
+        per_call: True 时 run() 返回每次调用的耗时数组 (ns)；
+                  False 时 run() 返回处理的步数/行数，整体计时
+        repeat: 整体计时的重复次数（取最短）
+    """
+    gc.collect()
+    if per_call:
+        samples = run()
+        total = samples.sum() / 1e9  # 只统计被测调用本身的耗时
+        result = {"name": name, "n": int(len(samples)), "total_s": total,
+                  "per_sec": len(samples) / total, **latency_stats(samples),
+                  "samples_us": thin_samples(samples / 1000.0).tolist()}
+    else:
+        durations = []
+        n = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            n = run()
+            durations.append(time.perf_counter() - start)
+        best = min(durations)
+        result = {"name": name, "n": int(n), "total_s": best, "per_sec": n / best,
+                  "latency_mean_us": best / max(n, 1) * 1e6,
+                  # 每次重复的单步耗时，作为回归比较的样本
+                  "samples_us": [d / max(n, 1) * 1e6 for d in durations]}
+
+    if measure_memory:
+        result["peak_memory_mb"] = peak_memory(run)
+    print(f"  {name:<40} n={result['n']:>9,}  {result['per_sec']:>12,.0f}/s"
+          + (f"  p50={result['latency_p50_us']:.1f}µs p99={result['latency_p99_us']:.1f}µs" if per_call else
+             f"  {result['total_s']:.3f}s")
+          + (f"  peak={result['peak_memory_mb']:.1f}MB" if measure_memory else ""))
+    return result
+
+
+def environment() -> dict:
+    """运行环境信息"""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def _write_load_file(path: Path, n_rows: int) -> Path:
+    """写入时间戳字符串 + 负载的数据文件（与真实电表导出格式一致）"""
+    rng = np.random.default_rng(SEED)
+    frame = pd.DataFrame({
+        'UTC时间': (np.datetime64('2024-01-01T00:00:00', 's') + np.arange(n_rows)).astype(str),
+        '负载数据': rng.normal(60.0, 15.0, n_rows).round(3),
+    })
+    if path.suffix == ".csv":
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_excel(path, index=False)
+    return path
+
+
+def _metrics_case(hours: float) -> Callable[[], int]:
+    df = make_dataset(hours)
+    history = simulate(df['time'].to_numpy(), df['load'].to_numpy(), ControlParams()).history
+    return bench_compute_metrics(df, history)
+
+
+def build_cases(args, tmp: Path) -> List[tuple]:
+    """
+    构造基准用例列表 [(name, prepare, per_call)]
+
+    prepare() 生成数据并返回被测函数，只有被选中的用例才会准备数据
+    """
+    micro_hours = args.micro_hours
+    cases = [
+        ("stukf.update", lambda: bench_stukf_update(make_dataset(micro_hours)), True),
+        ("stukf.predict_ahead", lambda: bench_stukf_predict_ahead(make_dataset(micro_hours)), True),
+    ]
+    for strategy, overrides in SAFETY_STRATEGIES.items():
+        cases.append((f"safety_ceiling[{strategy}]",
+                      lambda o=overrides: bench_safety_ceiling(make_dataset(micro_hours), o), True))
+    cases.append(("controller.compute_control", lambda: bench_compute_control(make_dataset(micro_hours)), True))
+
+    for hours in args.sim_hours:
+        cases.append((f"simulate[{hours:g}h]", lambda h=hours: bench_simulation(make_dataset(h)), False))
+
+    for fmt, n_rows in (("csv", args.csv_rows), ("xlsx", args.xlsx_rows)):
+        if n_rows > 0:
+            cases.append((f"load_data[{fmt},{n_rows}]",
+                          lambda f=fmt, n=n_rows: bench_load_data(_write_load_file(tmp / f"load.{f}", n), n),
+                          False))
+
+    n_metrics = int(args.metrics_hours * 3600)
+    cases.append((f"compute_metrics[{n_metrics}]", lambda: _metrics_case(args.metrics_hours), False))
+    return cases
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description="控制栈基准测试套件")
+    parser.add_argument("--quick", action="store_true", help="缩小数据规模（冒烟测试）")
+    parser.add_argument("--only", type=str, default="*", help="只运行名称匹配的用例（fnmatch 通配符）")
+    parser.add_argument("--repeat", type=int, default=3, help="宏基准重复次数（取最短）")
+    parser.add_argument("--no-memory", action="store_true", help="跳过峰值内存测量")
+    parser.add_argument("--output", type=str, default=None, help="结果 JSON 文件")
+    parser.add_argument("--save", action="store_true", help="写入本地结果库（见 bench_store.py）")
+    parser.add_argument("--store", type=str, default=str(DEFAULT_STORE), help="结果库路径")
+    parser.add_argument("--label", type=str, default=None, help="保存时的运行标签")
+    args = parser.parse_args(argv)
+
+    args.micro_hours = 1 if args.quick else 10
+    args.sim_hours = [1] if args.quick else [10, 24]
+    args.csv_rows = 100_000 if args.quick else 2_000_000
+    args.xlsx_rows = 10_000 if args.quick else 200_000
+    args.metrics_hours = 1 if args.quick else 24
+    if args.quick:
+        args.repeat = 1
+
+    print("=" * 80)
+    print("控制栈基准测试" + ("（quick）" if args.quick else ""))
+    print("=" * 80)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, prepare, per_call in build_cases(args, Path(tmp)):
+            if not fnmatch.fnmatch(name, args.only):
+                continue
+            results.append(run_case(name, prepare(), per_call, args.repeat, not args.no_memory))
+
+    digest = hashlib.blake2b(digest_size=20)
+    for key in sorted(_FINGERPRINTS):
+        digest.update(f"{key}={_FINGERPRINTS[key]};".encode())
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "quick": args.quick,
+        "seed": SEED,
+        **git_revision(),
+        "environment": environment(),
+        "datasets": dict(sorted(_FINGERPRINTS.items())),
+        "dataset_fingerprint": digest.hexdigest(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+    if args.save:
+        with ResultStore(args.store) as store:
+            run_id = store.save(report, label=args.label)
+        print(f"\n已写入结果库 {args.store}（运行 #{run_id}）")
+    return report
+
+
+if __name__ == "__main__":
+    main()
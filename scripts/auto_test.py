@@ -1,6 +1,10 @@
 """
 自动测试脚本：评估三种策略模式的性能
 用于迭代优化，自动比较激进/平衡/保守模式
+
+三种预设在进程池上并行仿真，指标由 compute_metrics 统一计算；
+数据可来自文件（CSV / Excel / Parquet / Arrow）或示例数据生成器。
+结果以 JSON 保存，包含每个预设的指标、耗时和仿真速度（步/秒）。
 """
 
 import sys
@@ -10,100 +14,76 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-import numpy as np
-import pandas as pd
-from src.core import V5AntiBackflowController, ControlParams
-from src.utils import generate_sample_data
-from src.utils.logging_config import setup_logger
+import argparse
 import json
+import math
+import platform
+import time
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+from src.core import ControlParams
+from src.utils import generate_sample_data, load_data
+from src.utils.metrics import command_statistics
+from src.utils.result_cache import data_fingerprint
+from src.utils.sweep import params_to_row, run_sweep
+
 
-def run_mode_test(mode_name: str, params: ControlParams, df: pd.DataFrame) -> dict:
+def load_dataset(args) -> tuple:
     """
-    运行单个模式的测试
+    读取测试数据
+
+    返回:
+        (df, 数据来源描述)
+    """
+    if args.data:
+        df, report = load_data(args.data)
+        source = {"type": "file", "path": str(args.data), "time_format": report.time_format}
+    else:
+        df = generate_sample_data(
+            duration_hours=args.hours, interval_sec=args.interval, days=args.days, seed=args.seed,
+        )
+        source = {"type": "generator", "hours": args.hours, "interval_sec": args.interval,
+                  "days": args.days, "seed": args.seed}
+    return df, source
+
+
+def run_presets(modes: dict, df: pd.DataFrame, max_workers=None) -> dict:
+    """
+    并行运行各预设模式的仿真
 
     参数:
-        mode_name: 模式名称
-        params: 控制参数
+        modes: 模式名称 -> ControlParams
         df: 测试数据
+        max_workers: 并行进程数
 
     返回:
-        性能指标字典
+        模式名称 -> {params, metrics, status, error, wall_time, steps_per_sec}
     """
-    logger = setup_logger(f"test_{mode_name}")
-    logger.info(f"开始测试 {mode_name} 模式")
-
-    # 运行仿真
-    controller = V5AntiBackflowController(
-        params=params,
-        initial_load=df['load'].iloc[0],
-        process_noise=0.1,
-        measurement_noise=1.0
+    names = list(modes)
+    table = run_sweep(
+        df['time'].to_numpy(), df['load'].to_numpy(), [modes[name] for name in names],
+        max_workers=max_workers, extra_metrics=command_statistics,
     )
 
-    for idx, row in df.iterrows():
-        controller.compute_control(row['load'], row['time'])
-
-    # 获取结果
-    history = controller.get_history()
-
-    # 计算指标
-    P_cmd = history['P_cmd']
-    load = history['load']
-    time = history['time']
-
-    # 计算时间间隔
-    dt = np.diff(time, prepend=time[0])
-
-    # 1. 负载跟踪率（主要指标）
-    load_energy = np.sum(load * dt) / 3600  # kWh
-    output_energy = np.sum(P_cmd * dt) / 3600  # kWh
-    utilization_rate = (output_energy / load_energy * 100) if load_energy > 0 else 0
-
-    # 3. 逆流次数（P_cmd > load）
-    backflow_count = np.sum(P_cmd > load)
-    backflow_ratio = (backflow_count / len(P_cmd) * 100) if len(P_cmd) > 0 else 0
-
-    # 4. 最大逆流功率
-    backflow_power = np.maximum(P_cmd - load, 0)
-    max_backflow = np.max(backflow_power)
-
-    # 5. 响应延迟（P_cmd 跟随 load 的平均延迟）
-    # 简化计算：P_cmd 和 load 的相关系数
-    correlation = np.corrcoef(P_cmd, load)[0, 1] if len(P_cmd) > 1 else 0
-
-    # 6. Safety bypass 次数
-    safety_bypass_count = np.sum(history['safety_bypass'])
-
-    # 7. 平均变化率
-    dP_cmd = np.diff(P_cmd)
-    dt_diff = np.diff(time)
-    dt_diff[dt_diff == 0] = 1.0  # 避免除零
-    rates = dP_cmd / dt_diff
-    avg_up_rate = np.mean(rates[rates > 0]) if np.any(rates > 0) else 0
-    avg_down_rate = np.abs(np.mean(rates[rates < 0])) if np.any(rates < 0) else 0
-
-    metrics = {
-        "mode": mode_name,
-        "utilization_rate": utilization_rate,
-        "backflow_count": int(backflow_count),
-        "backflow_ratio": backflow_ratio,
-        "max_backflow_kw": max_backflow,
-        "correlation": correlation,
-        "safety_bypass_count": int(safety_bypass_count),
-        "avg_up_rate": avg_up_rate,
-        "avg_down_rate": avg_down_rate,
-        "avg_P_cmd": np.mean(P_cmd),
-        "std_P_cmd": np.std(P_cmd),
-    }
-
-    logger.info(f"{mode_name} 模式测试完成")
-    logger.info(f"  负载跟踪率: {utilization_rate:.2f}%")
-    logger.info(f"  逆流次数: {backflow_count} ({backflow_ratio:.2f}%)")
-    logger.info(f"  最大逆流: {max_backflow:.2f} kW")
-
-    return metrics
+    results = {}
+    for i, name in enumerate(names):
+        row = table.loc[i].to_dict()
+        param_keys = params_to_row(modes[name])
+        metrics = {k: v for k, v in row.items()
+                   if k not in param_keys and k not in ("status", "error", "wall_time", "steps_per_sec")}
+        # 保留旧版结果文件的字段名（负载跟踪率旧称 utilization_rate）
+        metrics["utilization_rate"] = metrics.get("load_tracking_rate")
+        results[name] = {
+            "params": param_keys,
+            "metrics": metrics,
+            "status": row["status"],
+            "error": row["error"],
+            "wall_time": row.get("wall_time"),
+            "steps_per_sec": row.get("steps_per_sec"),
+        }
+    return results
 
 
 def create_aggressive_params() -> ControlParams:
@@ -151,15 +131,40 @@ def create_conservative_params() -> ControlParams:
     )
 
 
+def _to_json(value):
+    """转换为可严格序列化的 JSON 值：numpy 标量转为 Python 原生类型，NaN / 无穷转为 null"""
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
 def main():
     """主测试函数"""
+    parser = argparse.ArgumentParser(description="三种策略模式性能评估")
+    parser.add_argument("--data", type=str, default=None, help="数据文件（CSV/Excel/Parquet/Arrow），默认使用示例数据")
+    parser.add_argument("--hours", type=float, default=10, help="示例数据每天时长 (小时)")
+    parser.add_argument("--interval", type=float, default=1.0, help="示例数据采样间隔 (s)")
+    parser.add_argument("--days", type=int, default=1, help="示例数据天数")
+    parser.add_argument("--seed", type=int, default=None, help="示例数据随机种子")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数（默认全部核心）")
+    parser.add_argument("--output", type=str, default=None, help="结果 JSON 文件")
+    args = parser.parse_args()
+
     print("=" * 80)
     print("自动测试：三种策略模式性能评估")
     print("=" * 80)
 
-    # 生成测试数据
-    print("\n[1/4] 生成测试数据...")
-    df = generate_sample_data(duration_hours=10)
+    # 读取测试数据
+    print("\n[1/3] 准备测试数据...")
+    df, source = load_dataset(args)
     print(f"  数据长度: {len(df)} 个时间步")
     print(f"  负载范围: {df['load'].min():.2f} - {df['load'].max():.2f} kW")
 
@@ -170,23 +175,22 @@ def main():
         "保守": create_conservative_params(),
     }
 
-    # 运行测试
-    results = {}
-    for i, (mode_name, params) in enumerate(modes.items(), 2):
-        print(f"\n[{i}/4] 测试 {mode_name} 模式...")
-        metrics = run_mode_test(mode_name, params, df)
-        results[mode_name] = metrics
+    # 并行运行
+    print(f"\n[2/3] 并行测试 {len(modes)} 种模式...")
+    start = time.perf_counter()
+    results = run_presets(modes, df, max_workers=args.workers)
+    total_wall_time = time.perf_counter() - start
 
     # 输出比较报告
-    print("\n" + "=" * 80)
-    print("性能对比报告")
+    print("\n[3/3] 性能对比报告")
     print("=" * 80)
 
-    print(f"\n{'指标':<20} {'激进':<15} {'平衡':<15} {'保守':<15}")
+    names = list(modes)
+    print(f"\n{'指标':<20} " + " ".join(f"{name:<15}" for name in names))
     print("-" * 68)
 
     metrics_to_compare = [
-        ("负载跟踪率 (%)", "utilization_rate"),
+        ("负载跟踪率 (%)", "load_tracking_rate"),
         ("逆流次数", "backflow_count"),
         ("逆流比例 (%)", "backflow_ratio"),
         ("最大逆流 (kW)", "max_backflow_kw"),
@@ -197,19 +201,43 @@ def main():
     ]
 
     for label, key in metrics_to_compare:
-        values = [results[mode][key] for mode in ["激进", "平衡", "保守"]]
-        print(f"{label:<20} {values[0]:<15.2f} {values[1]:<15.2f} {values[2]:<15.2f}")
+        values = [results[mode]["metrics"].get(key, float("nan")) for mode in names]
+        print(f"{label:<20} " + " ".join(f"{value:<15.2f}" for value in values))
+    print(f"{'耗时 (s)':<20} " + " ".join(f"{results[m]['wall_time']:<15.2f}" for m in names))
+    print(f"{'仿真速度 (步/秒)':<20} " + " ".join(f"{results[m]['steps_per_sec']:<15.0f}" for m in names))
+
+    for mode in names:
+        if results[mode]["status"] != "ok":
+            print(f"\n  {mode} 模式失败: {results[mode]['error']}")
 
     # 保存结果
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+        },
+        "dataset": {
+            **source,
+            "n_steps": len(df),
+            "fingerprint": data_fingerprint(df['time'].to_numpy(), df['load'].to_numpy()),
+        },
+        "total_wall_time": total_wall_time,
+        "presets": results,
+    }
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = f"test_results_{timestamp}.json"
+    output_file = args.output or f"test_results_{timestamp}.json"
     with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+        # 失败预设的指标为 NaN，写为 null，保证输出为标准 JSON
+        json.dump(_to_json(report), f, ensure_ascii=False, indent=2, allow_nan=False)
 
-    print(f"\n结果已保存到: {output_file}")
+    print(f"\n总耗时: {total_wall_time:.2f}s")
+    print(f"结果已保存到: {output_file}")
     print("=" * 80)
 
-    return results
+    return report
 
 
 if __name__ == "__main__":
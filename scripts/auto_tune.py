@@ -0,0 +1,72 @@
+"""
+自动调参脚本：在逆流比例约束下搜索 buffer / alpha / 风险系数 / 局部权重
+替代手工逐轮调整预设参数的流程
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+from datetime import datetime
+
+from src.core import ControlParams
+from src.utils import generate_sample_data
+from src.utils.sweep import params_to_row
+from src.utils.tuning import auto_tune, DEFAULT_SEARCH_SPACE
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="防逆流控制参数自动调优")
+    parser.add_argument("--hours", type=float, default=10, help="示例数据时长 (小时)")
+    parser.add_argument("--max-backflow", type=float, default=10.0, help="逆流比例上限 (%%)")
+    parser.add_argument("--candidates", type=int, default=27, help="初始候选数量")
+    parser.add_argument("--eta", type=int, default=3, help="每轮保留 1/eta")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数（默认全部核心）")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"自动调参：逆流比例 ≤ {args.max_backflow}% 约束下最大化负载跟踪率")
+    print("=" * 80)
+
+    df = generate_sample_data(duration_hours=args.hours, seed=args.seed)
+    print(f"  数据长度: {len(df)} 个时间步")
+
+    # 以平衡预设为基准（仅搜索空间内的字段会被改变）
+    base = ControlParams(
+        buffer=3.5, use_buffer=True, use_safety_ceiling=False,
+        R_up=1000.0, R_down=1000.0, alpha=0.01, P_max=500.0,
+    )
+
+    result = auto_tune(
+        df['time'].to_numpy(), df['load'].to_numpy(), base,
+        max_backflow_ratio=args.max_backflow,
+        n_candidates=args.candidates,
+        eta=args.eta,
+        seed=args.seed,
+        max_workers=args.workers,
+        progress_callback=lambda rung, total: print(f"  完成第 {rung}/{total} 轮"),
+    )
+
+    print("\n最优参数:" + ("" if result.feasible else "（未找到满足约束的参数，返回逆流最低者）"))
+    best = params_to_row(result.best_params)
+    for name in DEFAULT_SEARCH_SPACE:
+        print(f"  {name:<28} {best[name]:.6g}")
+    print(f"\n  负载跟踪率: {result.best_metrics['load_tracking_rate']:.2f}%")
+    print(f"  逆流比例:   {result.best_metrics['backflow_ratio']:.2f}%")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    trace_file = f"tuning_trace_{timestamp}.csv"
+    result.trace.to_csv(trace_file, index=False)
+    print(f"\n搜索轨迹已保存到: {trace_file}")
+
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+仿真性能剖析脚本
+
+对一次完整仿真做函数级 CPU 剖析（cProfile）和内存分配快照（tracemalloc），
+按模块（stukf / safety_calculator / controller / numpy ...）汇总，
+打印前 N 个热点并写出 JSON 报告和 .prof 文件（可用 snakeviz 查看）。
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+from src.core import ControlParams
+from src.utils import generate_sample_data, load_data, simulate
+from src.utils.profiling import DEFAULT_PROFILE_DIR
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="仿真性能剖析")
+    parser.add_argument("--data", type=str, default=None, help="负载数据文件（默认使用示例数据）")
+    parser.add_argument("--hours", type=float, default=1.0, help="示例数据时长（小时）")
+    parser.add_argument("--interval", type=float, default=1.0, help="示例数据采样间隔 (s)")
+    parser.add_argument("--seed", type=int, default=0, help="示例数据随机种子")
+    parser.add_argument("--top", type=int, default=20, help="显示的热点函数数量")
+    parser.add_argument("--output", type=str, default=None, help="报告 JSON 路径（同目录写出 .prof）")
+    args = parser.parse_args(argv)
+
+    if args.data:
+        df, _ = load_data(args.data)
+    else:
+        df = generate_sample_data(duration_hours=args.hours, interval_sec=args.interval, seed=args.seed)
+
+    print("=" * 80)
+    print(f"仿真性能剖析: {len(df):,} 步")
+    print("=" * 80)
+
+    result = simulate(df['time'].to_numpy(), df['load'].to_numpy(), ControlParams(), profile=True)
+    report = result.profile
+
+    with pd.option_context('display.width', 160, 'display.max_colwidth', 60, 'display.float_format', '{:.4f}'.format):
+        print(f"\n剖析耗时 {report.wall_time:.2f}s（{len(df) / report.wall_time:,.0f} 步/秒，含 cProfile 开销），"
+              f"峰值内存 {report.peak_memory_mb:.1f} MB")
+        print("\n[模块耗时]")
+        print(report.modules.to_string(index=False))
+        print(f"\n[热点函数 Top {args.top}]")
+        print(report.functions.head(args.top).to_string(index=False))
+        print("\n[存活内存分配（按模块）]")
+        print(report.allocations.to_string(index=False))
+
+    output = args.output or DEFAULT_PROFILE_DIR / f"profile_{datetime.now():%Y%m%d_%H%M%S}.json"
+    path = report.write(output)
+    print(f"\n报告已保存到: {path}（pstats: {path.with_suffix('.prof')}）")
+    return report
+
+
+if __name__ == "__main__":
+    main()
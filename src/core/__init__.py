@@ -3,6 +3,6 @@
 """
 
 from .stukf import STUKF
-from .v5_anti_backflow import V5AntiBackflowController, ControlParams, ControlOutput
+from .v5_anti_backflow import V5AntiBackflowController, ControlParams, ControlOutput, PVAvailabilityProfile
 
-__all__ = ['STUKF', 'V5AntiBackflowController', 'ControlParams', 'ControlOutput']
+__all__ = ['STUKF', 'V5AntiBackflowController', 'ControlParams', 'ControlOutput', 'PVAvailabilityProfile']
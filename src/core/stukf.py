@@ -4,10 +4,21 @@ STUKF (Smooth Trend Unscented Kalman Filter) Implementation
 """
 
 import numpy as np
+from functools import lru_cache
 from scipy.stats import norm
 from typing import Tuple, Optional
 
 
+@lru_cache(maxsize=256)
+def norm_ppf(q: float) -> float:
+    """
+    标准正态分布分位数（带缓存）
+
+    控制循环中的置信度只取少数几个离散值，缓存可避免每步调用 scipy 的通用分布接口
+    """
+    return float(norm.ppf(q))
+
+
 class STUKF:
     """
     Smooth Trend Unscented Kalman Filter for load prediction
@@ -26,7 +37,8 @@ class STUKF:
         alpha_ukf: float = 1e-3,
         beta_ukf: float = 2.0,
         kappa_ukf: float = 0.0,
-        memory_decay: float = 0.99
+        memory_decay: float = 0.99,
+        history_size: Optional[int] = None,
     ):
         """
         初始化 STUKF
@@ -39,6 +51,8 @@ class STUKF:
             beta_ukf: UKF 参数 beta (高斯分布参数)
             kappa_ukf: UKF 参数 kappa (缩放参数)
             memory_decay: 记忆衰减因子 (0.9-0.999，越小越关注近期)
+            history_size: 至少保留的最近测量点数，None 表示保留全部
+                          （控制器只用到最后一点和局部窗口，长时间运行时应设置以限制内存）
         """
         # 状态维度
         self.n = 3
@@ -69,7 +83,14 @@ class STUKF:
         # 计算权重
         self._compute_weights()
 
-        # 历史数据
+        # predict_ahead 的状态转移矩阵缓存（按 horizon）
+        self._horizon_cached = None
+        self._F_ahead = None
+        self._F_ahead_T = None
+        self._Q_ahead = None
+
+        # 历史数据（设置 history_size 时长度在 history_size 与 2 * history_size 之间）
+        self.history_size = history_size
         self.load_history = [initial_load]
         self.time_history = [0.0]
 
@@ -85,6 +106,8 @@ class STUKF:
             self.Wm[i] = 1 / (2 * (self.n + self.lambda_))
             self.Wc[i] = 1 / (2 * (self.n + self.lambda_))
 
+        self._Wc_list = self.Wc.tolist()
+
     def _generate_sigma_points(self) -> np.ndarray:
         """生成 sigma 点"""
         sigma_points = np.zeros((2 * self.n + 1, self.n))
@@ -98,9 +121,8 @@ class STUKF:
             U, S, _ = np.linalg.svd(self.P)
             U = U @ np.diag(np.sqrt(S * (self.n + self.lambda_)))
 
-        for i in range(self.n):
-            sigma_points[i + 1] = self.x + U[:, i]
-            sigma_points[self.n + i + 1] = self.x - U[:, i]
+        sigma_points[1 : self.n + 1] = self.x + U.T
+        sigma_points[self.n + 1 :] = self.x - U.T
 
         return sigma_points
 
@@ -173,22 +195,24 @@ class STUKF:
         # 生成 sigma 点
         sigma_points = self._generate_sigma_points()
 
-        # 传播到测量空间
-        z_sigma = np.array([self._measurement_function(sp) for sp in sigma_points])
+        # 传播到测量空间（测量函数只取负载分量）
+        z_sigma = sigma_points[:, 0]
 
         # 预测测量均值
         z_pred = np.sum(self.Wm * z_sigma)
 
-        # 创新协方差
+        # 创新协方差（标量运算，按 sigma 点顺序累加）
+        z_diff = (z_sigma - z_pred).tolist()
+        Wc = self._Wc_list
         Pzz = self.R
         for i in range(2 * self.n + 1):
-            diff = z_sigma[i] - z_pred
-            Pzz += self.Wc[i] * diff * diff
+            Pzz += Wc[i] * z_diff[i] * z_diff[i]
 
         # 交叉协方差
-        Pxz = np.zeros(self.n)
-        for i in range(2 * self.n + 1):
-            Pxz += self.Wc[i] * (sigma_points[i] - self.x) * (z_sigma[i] - z_pred)
+        Pxz = np.sum(
+            self.Wc[:, np.newaxis] * (sigma_points - self.x) * (z_sigma - z_pred)[:, np.newaxis],
+            axis=0,
+        )
 
         # 卡尔曼增益
         K = Pxz / Pzz
@@ -217,9 +241,12 @@ class STUKF:
         self.P[1, 1] = min(self.P[1, 1], 100.0)   # 速度方差上限
         self.P[2, 2] = min(self.P[2, 2], 10.0)    # 加速度方差上限
 
-        # 保存历史
+        # 保存历史（超过 2 倍保留长度时批量截断，均摊 O(1)）
         self.load_history.append(measurement)
         self.time_history.append(time)
+        if self.history_size is not None and len(self.load_history) > 2 * self.history_size:
+            del self.load_history[:-self.history_size]
+            del self.time_history[:-self.history_size]
 
     def predict_ahead(self, horizon: float, confidence: float = 0.999) -> Tuple[float, float]:
         """
@@ -232,22 +259,31 @@ class STUKF:
         返回:
             (mean_prediction, lower_bound): 均值预测和置信下界
         """
-        # 使用当前状态预测
-        x_future = self._state_transition(self.x, horizon)
+        # 均匀采样时 horizon 每步相同，状态转移矩阵和 Q * horizon 只需构建一次；
+        # 按精确值比较，缓存命中时结果与每次重新构建逐位一致
+        if horizon != self._horizon_cached:
+            F = np.array([
+                [1, horizon, 0.5 * horizon**2],
+                [0, 1, horizon],
+                [0, 0, 1]
+            ])
+            self._F_ahead = F
+            self._F_ahead_T = F.T
+            self._Q_ahead = self.Q * horizon
+            self._horizon_cached = horizon
+        F = self._F_ahead
+
+        # 使用当前状态预测（与 _state_transition 相同的 F @ x）
+        x_future = F @ self.x
 
         # 计算预测协方差
-        F = np.array([
-            [1, horizon, 0.5 * horizon**2],
-            [0, 1, horizon],
-            [0, 0, 1]
-        ])
-        P_future = F @ self.P @ F.T + self.Q * horizon
+        P_future = F @ self.P @ self._F_ahead_T + self._Q_ahead
 
         mean_pred = x_future[0]
         std_pred = np.sqrt(P_future[0, 0])
 
         # 计算置信下界
-        z_score = norm.ppf(1 - confidence)  # 负数，因为是下界
+        z_score = norm_ppf(1 - confidence)  # 负数，因为是下界
         lower_bound = mean_pred + z_score * std_pred
 
         return mean_pred, lower_bound
@@ -7,9 +7,12 @@ V5 Anti-Backflow Control Module
 
 from .params import ControlParams, ControlOutput
 from .controller import V5AntiBackflowController
+from .pv_profile import PVAvailabilityProfile, evaluate_profile
 
 __all__ = [
     "ControlParams",
     "ControlOutput",
     "V5AntiBackflowController",
+    "PVAvailabilityProfile",
+    "evaluate_profile",
 ]
@@ -4,15 +4,39 @@ V5 防逆流控制器 - 主控制器
 """
 
 import numpy as np
-from typing import Dict, List, Tuple
+from array import array
+from typing import Callable, Dict, List, Tuple
 import logging
 
-from .params import ControlParams, ControlOutput
+from .params import (
+    ControlParams, ControlOutput,
+    FLAG_SAFETY_BYPASS, FLAG_UPWARD_INTENT, FLAG_PV_CONSTRAINED, FLAG_EMERGENCY, FLAG_INVALID_INPUT,
+    BINDING_NONE, BINDING_P_MAX, BINDING_SAFETY, BINDING_PV, BINDING_PERFORMANCE, BINDING_EMERGENCY,
+    BINDING_RAMP_UP, BINDING_RAMP_DOWN, BINDING_ZERO,
+)
 from .safety_calculator import SafetyCalculator
 from .pv_tracker import PVPowerTracker
 from .buffer_utils import apply_buffer
 from ..stukf import STUKF
 
+# 历史字段及其 array 类型码（原始 8 字节浮点 / 1 字节布尔，
+# 比 Python 对象列表每步少约 250 字节，get_history 只需内存拷贝）
+# STUKF 噪声默认值（仿真入口和缓存键共用）
+DEFAULT_PROCESS_NOISE = 0.1
+DEFAULT_MEASUREMENT_NOISE = 1.0
+
+HISTORY_FIELDS = {
+    "time": "d",
+    "load": "d",
+    "P_cmd": "d",
+    "U_A": "d",
+    "U_B": "d",
+    "L_med": "d",
+    "L_lb": "d",
+    "safety_bypass": "b",
+    "P_pv_available": "d",  # 光伏可用功率历史
+}
+
 
 class V5AntiBackflowController:
     """
@@ -25,8 +49,9 @@ class V5AntiBackflowController:
         self,
         params: ControlParams,
         initial_load: float,
-        process_noise: float = 0.1,
-        measurement_noise: float = 1.0,
+        process_noise: float = DEFAULT_PROCESS_NOISE,
+        measurement_noise: float = DEFAULT_MEASUREMENT_NOISE,
+        record_history: bool = True,
     ):
         """
         初始化控制器
@@ -36,16 +61,15 @@ class V5AntiBackflowController:
             initial_load: 初始负载值
             process_noise: STUKF 过程噪声
             measurement_noise: STUKF 测量噪声
+            record_history: 是否记录完整历史（长期在线运行时可关闭，改用 attach 的观察者统计指标）
         """
         self.params = params
+        self.record_history = record_history
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
 
-        # 初始化 STUKF 预测器
-        self.stukf = STUKF(
-            initial_load,
-            process_noise,
-            measurement_noise,
-            memory_decay=params.stukf_memory_decay,
-        )
+        # 初始化 STUKF 预测器（只保留局部窗口所需的测量历史）
+        self.stukf = self._new_stukf(initial_load)
 
         # 初始化模块
         self.safety_calc = SafetyCalculator(params, self.stukf)
@@ -56,6 +80,7 @@ class V5AntiBackflowController:
         self.logger.info(f"控制器初始化完成: use_safety_ceiling={params.use_safety_ceiling}, "
                         f"use_buffer={params.use_buffer}, P_max={params.P_max}, "
                         f"initial_load={initial_load}")
+        self._debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
 
         # 控制状态
         self.P_cmd_prev = 0.0  # 上一次的指令
@@ -63,18 +88,11 @@ class V5AntiBackflowController:
         self.current_time = 0.0
         self.L_prev = initial_load  # 上一次的负载测量值（用于急降检测）
 
+        # 每步回调 observer(time, load, output, P_pv_available)，如 MetricsAccumulator.update
+        self._observers: List[Callable] = []
+
         # 记录历史
-        self.history: Dict[str, List] = {
-            "time": [],
-            "load": [],
-            "P_cmd": [],
-            "U_A": [],
-            "U_B": [],
-            "L_med": [],
-            "L_lb": [],
-            "safety_bypass": [],
-            "P_pv_available": [],  # 光伏可用功率历史
-        }
+        self.history: Dict[str, array] = self._new_history()
 
     def compute_control(self, L_t: float, time: float) -> ControlOutput:
         """
@@ -108,33 +126,43 @@ class V5AntiBackflowController:
         U_B = self.safety_calc.compute_performance_ceiling(L_med)
 
         # 2. 应用物理约束（根据 use_safety_ceiling 决定是否使用安全上界）
+        #    binding 跟踪当前上界由哪个约束决定
         if self.params.use_safety_ceiling:
             U = min(U_A, self.params.P_max)
+            binding = BINDING_P_MAX if self.params.P_max < U_A else BINDING_SAFETY
         else:
             U = self.params.P_max
+            binding = BINDING_P_MAX
 
         # 3. 应用光伏可用功率约束
-        U, pv_constrained = self.pv_tracker.apply_constraint(U)
+        U, pv_constrained = self.pv_tracker.apply_constraint(U, time)
+        if pv_constrained:
+            binding = BINDING_PV
 
-        # 4. 检查上行意图并应用性能上界
+        # 4. 检查上行意图并应用性能上界（等价于 U = min(U, U_B)）
         upward_intent = self._check_upward_intent(U, L_med)
-        if upward_intent:
-            U = min(U, U_B)
+        if upward_intent and U_B < U:
+            U = U_B
+            binding = BINDING_PERFORMANCE
 
         # 5. 紧急安全机制：负载急降检测
-        U, emergency_triggered = self._check_emergency_drop(L_t, dt, U)
+        U_checked, emergency_triggered = self._check_emergency_drop(L_t, dt, U)
+        if U_checked < U:
+            binding = BINDING_EMERGENCY
+        U = U_checked
 
         # 6. 应用控制律（限速或安全旁路）
-        P_cmd, safety_bypass = self._apply_control_law(U, dt, emergency_triggered)
-
-        # 调试日志：记录关键计算结果
-        self.logger.debug(
-            f"时间={time:.2f}s, 负载={L_t:.2f}kW | "
-            f"U_A={U_A:.2f}, U_B={U_B:.2f}, U={U:.2f} | "
-            f"pv_constrained={pv_constrained}, upward_intent={upward_intent}, "
-            f"safety_bypass={safety_bypass} | "
-            f"P_cmd={P_cmd:.2f}kW, P_pv_available={self.pv_tracker.available_power:.2f}kW"
-        )
+        P_cmd, safety_bypass, binding = self._apply_control_law(U, dt, emergency_triggered, binding)
+
+        # 调试日志：记录关键计算结果（未启用 DEBUG 时跳过字符串格式化）
+        if self._debug_enabled:
+            self.logger.debug(
+                f"时间={time:.2f}s, 负载={L_t:.2f}kW | "
+                f"U_A={U_A:.2f}, U_B={U_B:.2f}, U={U:.2f} | "
+                f"pv_constrained={pv_constrained}, upward_intent={upward_intent}, "
+                f"safety_bypass={safety_bypass} | "
+                f"P_cmd={P_cmd:.2f}kW, P_pv_available={self.pv_tracker.available_power:.2f}kW"
+            )
 
         # 7. 更新光伏功率跟踪器
         self.pv_tracker.update(P_cmd, pv_constrained, safety_bypass, dt)
@@ -152,6 +180,11 @@ class V5AntiBackflowController:
             L_lb=L_lb,
             safety_bypass=safety_bypass,
             upward_intent=upward_intent,
+            flags=((FLAG_SAFETY_BYPASS if safety_bypass else 0)
+                   | (FLAG_UPWARD_INTENT if upward_intent else 0)
+                   | (FLAG_PV_CONSTRAINED if pv_constrained else 0)
+                   | (FLAG_EMERGENCY if emergency_triggered else 0)),
+            binding=binding,
         )
 
         # 记录历史
@@ -202,8 +235,8 @@ class V5AntiBackflowController:
         return U, emergency_triggered
 
     def _apply_control_law(
-        self, U: float, dt: float, emergency_triggered: bool
-    ) -> Tuple[float, bool]:
+        self, U: float, dt: float, emergency_triggered: bool, binding: int = BINDING_NONE
+    ) -> Tuple[float, bool, int]:
         """
         应用控制律（限速或安全旁路）
 
@@ -211,9 +244,10 @@ class V5AntiBackflowController:
             U: 上界
             dt: 时间步长
             emergency_triggered: 是否触发紧急旁路
+            binding: 上界 U 对应的约束
 
         返回:
-            (P_cmd, safety_bypass): 控制指令和安全旁路标志
+            (P_cmd, safety_bypass, binding): 控制指令、安全旁路标志和最终起作用的约束
         """
         # 计算限速边界
         U_ramp = self.P_cmd_prev + self.params.R_up * dt
@@ -224,16 +258,27 @@ class V5AntiBackflowController:
 
         if U < self.P_cmd_prev:
             # 安全旁路：立即下调
-            P_cmd = max(0, min(U, self.params.P_max))
+            upper = min(U, self.params.P_max)
+            if self.params.P_max < U:
+                binding = BINDING_P_MAX
+            P_cmd = max(0, upper)
+            if upper < 0:
+                binding = BINDING_ZERO
             safety_bypass = True
         else:
             # 正常控制：应用限速
-            P_cmd = max(max(0, L_ramp), min(U, U_ramp))
+            upper = min(U, U_ramp)
+            if U_ramp < U:
+                binding = BINDING_RAMP_UP
+            lower = max(0, L_ramp)
+            P_cmd = max(lower, upper)
+            if upper < lower:
+                binding = BINDING_RAMP_DOWN if L_ramp > 0 else BINDING_ZERO
 
         # 确保非负
         P_cmd = max(0, P_cmd)
 
-        return P_cmd, safety_bypass
+        return P_cmd, safety_bypass, binding
 
     def _update_state(self, P_cmd: float, time: float, L_t: float):
         """更新控制器状态"""
@@ -253,10 +298,29 @@ class V5AntiBackflowController:
             L_lb=0.0,
             safety_bypass=True,
             upward_intent=False,
+            flags=FLAG_INVALID_INPUT | FLAG_SAFETY_BYPASS,
+            binding=BINDING_NONE,
         )
 
+    def attach(self, observer: Callable):
+        """
+        注册每步回调
+
+        参数:
+            observer: observer(time, load, output, P_pv_available)，每次 compute_control 后调用
+        """
+        self._observers.append(observer)
+
+    def detach(self, observer: Callable):
+        """移除已注册的回调"""
+        self._observers.remove(observer)
+
     def _record_history(self, time: float, load: float, output: ControlOutput):
-        """记录历史数据"""
+        """记录历史数据并通知观察者"""
+        for observer in self._observers:
+            observer(time, load, output, self.pv_tracker.available_power)
+        if not self.record_history:
+            return
         self.history["time"].append(time)
         self.history["load"].append(load)
         self.history["P_cmd"].append(output.P_cmd)
@@ -267,27 +331,47 @@ class V5AntiBackflowController:
         self.history["safety_bypass"].append(output.safety_bypass)
         self.history["P_pv_available"].append(self.pv_tracker.available_power)
 
+    def _new_stukf(self, initial_load: float) -> STUKF:
+        """按控制器的噪声和记忆衰减设置创建 STUKF"""
+        return STUKF(
+            initial_load,
+            self.process_noise,
+            self.measurement_noise,
+            memory_decay=self.params.stukf_memory_decay,
+            history_size=self._stukf_history_size(self.params),
+        )
+
+    @staticmethod
+    def _stukf_history_size(params: ControlParams) -> int:
+        """STUKF 需保留的测量点数（安全上界只用到最后一点和局部窗口）"""
+        return max(params.local_window_size, 2)
+
+    @staticmethod
+    def _new_history() -> Dict[str, array]:
+        """创建空的历史缓冲区"""
+        return {key: array(typecode) for key, typecode in HISTORY_FIELDS.items()}
+
     def get_history(self) -> Dict[str, np.ndarray]:
-        """获取历史数据（转换为 numpy 数组）"""
-        return {key: np.array(values) for key, values in self.history.items()}
+        """获取历史数据（复制为 numpy 数组）"""
+        history = {key: np.array(values, dtype=np.float64) for key, values in self.history.items()
+                   if HISTORY_FIELDS[key] == "d"}
+        history["safety_bypass"] = np.array(self.history["safety_bypass"], dtype=np.int8).astype(bool)
+        return {key: history[key] for key in HISTORY_FIELDS}
 
-    def reset(self, initial_load: float):
-        """重置控制器"""
-        self.stukf = STUKF(initial_load)
+    def reset(self, initial_load: float, keep_history: bool = False):
+        """
+        重置控制器
+
+        参数:
+            initial_load: 初始负载值
+            keep_history: 保留已记录的历史（数据缺口后重启控制状态时使用）
+        """
+        self.stukf = self._new_stukf(initial_load)
         self.safety_calc = SafetyCalculator(self.params, self.stukf)
         self.pv_tracker.reset()
         self.P_cmd_prev = 0.0
         self.time_prev = 0.0
         self.current_time = 0.0
         self.L_prev = initial_load
-        self.history = {
-            "time": [],
-            "load": [],
-            "P_cmd": [],
-            "U_A": [],
-            "U_B": [],
-            "L_med": [],
-            "L_lb": [],
-            "safety_bypass": [],
-            "P_pv_available": [],  # 光伏可用功率历史
-        }
+        if not keep_history:
+            self.history = self._new_history()
@@ -6,6 +6,36 @@ V5 Anti-Backflow Control Parameters and Output
 from dataclasses import dataclass
 from typing import Optional
 
+# 决策标志位（ControlOutput.flags）
+FLAG_SAFETY_BYPASS = 1  # 安全旁路（立即下调）
+FLAG_UPWARD_INTENT = 2  # 存在上行意图
+FLAG_PV_CONSTRAINED = 4  # 被光伏可用功率约束
+FLAG_EMERGENCY = 8  # 负载急降紧急限制触发
+FLAG_INVALID_INPUT = 16  # 负载异常（<= 0 或 NaN），输出为零
+
+# 起作用的约束（ControlOutput.binding）：最终 P_cmd 由哪个约束决定
+BINDING_NONE = 0  # 无（异常输入的零输出）
+BINDING_P_MAX = 1  # 逆变器最大功率
+BINDING_SAFETY = 2  # 安全上界 U_A
+BINDING_PV = 3  # 光伏可用功率
+BINDING_PERFORMANCE = 4  # 性能上界 U_B
+BINDING_EMERGENCY = 5  # 急降紧急限制
+BINDING_RAMP_UP = 6  # 上行限速
+BINDING_RAMP_DOWN = 7  # 下行限速
+BINDING_ZERO = 8  # 指令被截断为 0
+
+BINDING_NAMES = {
+    BINDING_NONE: "none",
+    BINDING_P_MAX: "P_max",
+    BINDING_SAFETY: "U_A",
+    BINDING_PV: "pv",
+    BINDING_PERFORMANCE: "U_B",
+    BINDING_EMERGENCY: "emergency",
+    BINDING_RAMP_UP: "ramp_up",
+    BINDING_RAMP_DOWN: "ramp_down",
+    BINDING_ZERO: "zero",
+}
+
 
 @dataclass
 class ControlParams:
@@ -35,8 +65,8 @@ class ControlParams:
     # 光伏功率跟踪参数
     pv_recovery_rate: float = 1.0  # 光伏可用功率恢复速率 (kW/s)
 
-    # 光伏功率配置（预留接口）
-    pv_power_profile: Optional[callable] = None  # 光伏功率曲线函数(time)->float，None表示恒定P_max
+    # 光伏功率配置
+    pv_power_profile: Optional[callable] = None  # 光伏功率曲线函数(time)->float（如 PVAvailabilityProfile），None表示恒定P_max
     show_curtailment_metrics: bool = False  # 是否显示弃光率指标（光伏可变时启用）
 
 
@@ -51,3 +81,5 @@ class ControlOutput:
     L_lb: float  # STUKF预测的置信下界
     safety_bypass: bool  # 是否触发安全旁路
     upward_intent: bool  # 是否存在上行意图
+    flags: int = 0  # 决策标志位（FLAG_*）
+    binding: int = BINDING_NONE  # 起作用的约束（BINDING_*）
@@ -0,0 +1,189 @@
+"""
+PV Availability Profile
+光伏可用功率曲线 - 为 ControlParams.pv_power_profile 提供时变数据源
+"""
+
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+
+class PVAvailabilityProfile:
+    """
+    光伏可用功率曲线
+
+    基于表格化的 (时间, 功率) 序列，按时间线性插值给出光伏可用功率。
+    实例可直接作为 ControlParams.pv_power_profile 使用（可调用 (time)->float）。
+
+    - 标量查询：维护游标，时间单调递增时为 O(1) 均摊复杂度
+    - 批量查询：values_at() 基于 np.interp 的向量化路径
+    - 大文件：load() 对 .npy 文件使用内存映射，多月数据无需整体读入内存
+    """
+
+    def __init__(self, time: np.ndarray, power: np.ndarray):
+        """
+        初始化光伏可用功率曲线
+
+        参数:
+            time: 时间序列 (s)，需单调不减，与仿真时间轴一致
+            power: 对应的光伏可用功率 (kW)
+        """
+        time = np.asarray(time, dtype=np.float64)
+        power = np.asarray(power, dtype=np.float64)
+
+        if time.ndim != 1 or time.shape != power.shape:
+            raise ValueError("time 与 power 必须为等长的一维数组")
+        if len(time) == 0:
+            raise ValueError("光伏功率曲线不能为空")
+        if len(time) > 1 and np.any(np.diff(time) < 0):
+            raise ValueError("光伏功率曲线的时间序列必须单调递增")
+
+        self.time = time
+        self.power = power
+        self._cursor = 0  # 上一次查询所在区间的左端点索引
+
+    @classmethod
+    def from_power(cls, time: np.ndarray, power: np.ndarray) -> "PVAvailabilityProfile":
+        """由光伏功率序列创建曲线"""
+        return cls(time, np.maximum(np.asarray(power, dtype=np.float64), 0.0))
+
+    @classmethod
+    def from_irradiance(
+        cls,
+        time: np.ndarray,
+        irradiance: np.ndarray,
+        P_max: float,
+        stc_irradiance: float = 1000.0,
+        derate: float = 1.0,
+    ) -> "PVAvailabilityProfile":
+        """
+        由辐照度序列创建曲线
+
+        参数:
+            time: 时间序列 (s)
+            irradiance: 辐照度 (W/m²)
+            P_max: 逆变器最大功率 (kW)，对应标准测试条件下的输出
+            stc_irradiance: 标准测试条件辐照度 (W/m²)
+            derate: 综合降额系数（温度、灰尘、线损等）
+        """
+        irradiance = np.asarray(irradiance, dtype=np.float64)
+        power = np.clip(irradiance / stc_irradiance * P_max * derate, 0.0, P_max)
+        return cls(time, power)
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        kind: str = "power",
+        P_max: Optional[float] = None,
+    ) -> "PVAvailabilityProfile":
+        """
+        从文件加载曲线
+
+        支持格式:
+            .npy: 形状为 (2, N) 的 float64 数组（第0行时间，第1行数值），内存映射读取
+            .csv: 两列（时间、数值），整体读入
+
+        参数:
+            path: 文件路径
+            kind: 'power' 表示数值为功率 (kW)，'irradiance' 表示辐照度 (W/m²)
+            P_max: kind='irradiance' 时必须提供
+        """
+        path = Path(path)
+        if path.suffix == ".npy":
+            data = np.load(path, mmap_mode="r")
+            if data.ndim != 2 or data.shape[0] != 2:
+                raise ValueError(f"{path} 的形状应为 (2, N)，实际为 {data.shape}")
+            time, values = data[0], data[1]
+        elif path.suffix == ".csv":
+            data = np.loadtxt(path, delimiter=",", skiprows=1, usecols=(0, 1), ndmin=2)
+            time, values = data[:, 0], data[:, 1]
+        else:
+            raise ValueError(f"不支持的光伏功率曲线格式: {path.suffix}")
+
+        if kind == "irradiance":
+            if P_max is None:
+                raise ValueError("辐照度曲线需要提供 P_max")
+            return cls.from_irradiance(time, values, P_max)
+        if kind != "power":
+            raise ValueError(f"未知的曲线类型: {kind}")
+
+        # 功率曲线保持内存映射视图，不做整体复制
+        return cls(time, values)
+
+    def save(self, path: Union[str, Path]):
+        """保存为 (2, N) 的 .npy 文件，便于后续内存映射加载"""
+        np.save(Path(path), np.vstack([self.time, self.power]))
+
+    def __call__(self, t: float) -> float:
+        """
+        查询时刻 t 的光伏可用功率（线性插值，越界时取端点值）
+
+        时间单调递增时游标只需前移，均摊 O(1)；回退或大跨度跳转时退化为二分查找。
+        """
+        time = self.time
+        n = len(time)
+
+        if t <= time[0]:
+            self._cursor = 0
+            return float(self.power[0])
+        if t >= time[n - 1]:
+            self._cursor = n - 1
+            return float(self.power[n - 1])
+
+        i = self._cursor
+        if t < time[i] or i >= n - 1:
+            i = int(np.searchsorted(time, t, side="right")) - 1
+        else:
+            # 顺序前移，跨度过大时改用二分查找
+            steps = 0
+            while t >= time[i + 1]:
+                i += 1
+                steps += 1
+                if steps > 8:
+                    i = int(np.searchsorted(time, t, side="right")) - 1
+                    break
+        self._cursor = i
+
+        t0, t1 = time[i], time[i + 1]
+        p0, p1 = self.power[i], self.power[i + 1]
+        if t == t0:
+            return float(p0)
+        # 与 np.interp 相同的运算顺序（先算斜率），标量与 values_at 的结果逐位一致
+        slope = (p1 - p0) / (t1 - t0)
+        return float(slope * (t - t0) + p0)
+
+    def values_at(self, times: np.ndarray) -> np.ndarray:
+        """批量查询光伏可用功率（向量化路径，用于批量仿真和指标计算）"""
+        return np.interp(np.asarray(times, dtype=np.float64), self.time, self.power)
+
+    def reset(self):
+        """重置查询游标"""
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+
+def evaluate_profile(
+    profile: Callable[[float], float], times: np.ndarray, P_max: Optional[float] = None
+) -> np.ndarray:
+    """
+    批量计算光伏可用功率
+
+    对 PVAvailabilityProfile 使用向量化插值，对普通 (time)->float 函数逐点调用。
+
+    参数:
+        profile: 光伏功率曲线
+        times: 查询时间序列 (s)
+        P_max: 如提供，则将结果限制在 [0, P_max]
+    """
+    if hasattr(profile, "values_at"):
+        values = profile.values_at(times)
+    else:
+        values = np.array([profile(t) for t in np.asarray(times)], dtype=np.float64)
+
+    if P_max is not None:
+        values = np.clip(values, 0.0, P_max)
+    return values
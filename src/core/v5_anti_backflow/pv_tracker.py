@@ -3,7 +3,7 @@ PV Power Tracker
 光伏可用功率跟踪器
 """
 
-from typing import Tuple
+from typing import Optional, Tuple
 from .params import ControlParams
 
 
@@ -12,6 +12,9 @@ class PVPowerTracker:
     光伏可用功率跟踪器
 
     跟踪光伏阵列的实际可用功率，区分光伏功率约束和负载约束
+
+    若配置了 params.pv_power_profile，则直接使用曲线给出的可用功率；
+    否则假设可用功率为 P_max，并仅通过安全旁路事件推断云遮等功率下降
     """
 
     def __init__(self, params: ControlParams):
@@ -22,18 +25,24 @@ class PVPowerTracker:
             params: 控制参数
         """
         self.params = params
+        self.profile = params.pv_power_profile
         self.P_pv_available = params.P_max  # 初始假设光伏充足
 
-    def apply_constraint(self, U: float) -> Tuple[float, bool]:
+    def apply_constraint(self, U: float, time: Optional[float] = None) -> Tuple[float, bool]:
         """
         应用光伏功率约束
 
         参数:
             U: 约束前的上界
+            time: 当前时间戳 (s)，配置了光伏功率曲线时用于查询可用功率
 
         返回:
             (U_constrained, pv_constrained): 约束后的上界和是否被光伏功率约束的标志
         """
+        if self.profile is not None and time is not None:
+            # 光伏功率曲线已知：直接使用曲线值（限制在 [0, P_max]）
+            self.P_pv_available = min(max(self.profile(time), 0.0), self.params.P_max)
+
         U_before_constraint = U
         U_constrained = min(U, self.P_pv_available)
         pv_constrained = U_constrained < U_before_constraint
@@ -50,6 +59,10 @@ class PVPowerTracker:
             safety_bypass: 是否触发安全旁路
             dt: 时间步长
         """
+        if self.profile is not None:
+            # 可用功率由曲线给出，无需根据旁路事件推断
+            return
+
         if pv_constrained and safety_bypass:
             # 条件：同时满足 (1) 被光伏功率约束 且 (2) 触发安全旁路
             # 说明：光伏功率真的不足，导致了下调
@@ -71,6 +84,8 @@ class PVPowerTracker:
     def reset(self):
         """重置光伏可用功率为最大值"""
         self.P_pv_available = self.params.P_max
+        if hasattr(self.profile, "reset"):
+            self.profile.reset()
 
     @property
     def available_power(self) -> float:
@@ -5,11 +5,10 @@ Safety Ceiling Calculator
 
 import numpy as np
 from typing import Tuple
-from scipy.stats import norm
 
 from .params import ControlParams
 from .buffer_utils import apply_buffer
-from ..stukf import STUKF
+from ..stukf import STUKF, norm_ppf
 
 
 class SafetyCalculator:
@@ -134,7 +133,7 @@ class SafetyCalculator:
 
             # 调整置信度：risk_factor越大，alpha越小（越保守）
             dynamic_alpha = self.params.alpha / risk_factor
-            dynamic_alpha = np.clip(dynamic_alpha, 1e-6, 0.2)  # 限制范围
+            dynamic_alpha = min(max(dynamic_alpha, 1e-6), 0.2)  # 限制范围
 
         return dynamic_alpha
 
@@ -157,7 +156,7 @@ class SafetyCalculator:
         local_std = np.std(recent_data)
 
         # 计算全局预测的隐含标准差
-        k_alpha = norm.ppf(1 - dynamic_alpha / 2)
+        k_alpha = norm_ppf(1 - dynamic_alpha / 2)
         global_std = (L_med - L_lb_global) / k_alpha if k_alpha > 0 else local_std
 
         # 混合：局部权重 × 局部std + (1-局部权重) × 全局std
@@ -4,6 +4,8 @@
 """
 
 import sys
+import time
+import uuid
 from pathlib import Path
 
 # 添加项目根目录到Python路径
@@ -16,16 +18,25 @@ import numpy as np
 
 from src.core import ControlParams
 from src.ui.styles import MATERIAL_STYLE_CSS, get_material_colors
-from src.ui.components import create_metric_card
+from src.ui.components import create_metric_card, render_quality_report, render_profile_report
 from src.ui.theme import get_dark_theme_css, get_theme_toggle_button, get_theme_toggle_script
-from src.utils import load_data, generate_sample_data, run_simulation, compute_metrics
+from src.utils import load_data, generate_sample_data, SimulationJobManager, SimulationJob
+from src.utils.jobs import DONE, CANCELLED
+from src.utils.result_cache import SimulationCache
+from src.utils.columnar_io import history_to_bytes
+from src.utils.metrics import windowed_metrics
+from src.utils.events import segment_events, event_summary
 from src.ui.visualization import (
     create_time_series_plot,
     create_ramp_rate_distribution,
     create_curtailment_analysis,
-    create_control_effectiveness_plot
+    create_control_effectiveness_plot,
+    create_windowed_kpi_plot
 )
 from src.ui.dashboard import create_dashboard_view
+from src.ui.downsampling import DEFAULT_MAX_POINTS
+from src.ui.visualization_base import WEBGL_POINT_THRESHOLD
+from src.ui.figure_cache import FigureCache, history_fingerprint
 
 # 页面配置
 st.set_page_config(
@@ -40,6 +51,106 @@ st.markdown(MATERIAL_STYLE_CSS, unsafe_allow_html=True)
 colors = get_material_colors()
 
 
+@st.cache_resource
+def get_simulation_cache() -> SimulationCache:
+    """进程级仿真结果缓存（所有会话共享）"""
+    return SimulationCache()
+
+
+@st.cache_resource
+def get_job_manager() -> SimulationJobManager:
+    """进程级后台仿真任务管理器（各会话的相同提交共用一个运行中的任务）"""
+    return SimulationJobManager(cache=get_simulation_cache())
+
+
+# 后台仿真运行期间页面的刷新间隔 (s)
+JOB_POLL_INTERVAL = 0.5
+
+
+def session_cached(build, *args, **options):
+    """
+    复用本会话中已构建的图表和导出数据（见 FigureCache）
+
+    位置参数为当前历史数据或由其派生的数据（以历史数据指纹代表），
+    关键字参数为显示选项，与图表名一起组成缓存键。
+    """
+    cache = st.session_state.setdefault('figure_cache', FigureCache())
+    return cache.get_or_build(build.__name__, st.session_state.get('history_fingerprint'),
+                              lambda: build(*args, **options), **options)
+
+
+def session_id() -> str:
+    """当前会话的标识（用于共享任务的取消计数）"""
+    return st.session_state.setdefault('session_id', uuid.uuid4().hex)
+
+
+def preprocessing_options():
+    """侧边栏的预处理选项（simulate 的 preprocessing 参数），未启用时返回 None"""
+    if not st.session_state.get('preprocess_mode'):
+        return None
+    interval = st.session_state.get('resample_interval', 0.0)
+    return {'interval': interval if interval > 0 else None}
+
+
+def render_job_status(job: SimulationJob) -> bool:
+    """
+    显示后台仿真的进度和部分指标；任务结束时把结果写入会话
+
+    返回:
+        任务是否仍在运行（需要继续轮询）
+    """
+    st.markdown("## 📊 仿真结果")
+    if not job.finished:
+        if st.button("取消仿真", key="cancel_job"):
+            get_job_manager().cancel(job, owner=session_id())
+            del st.session_state['job']
+            st.warning("已取消仿真")
+            return False
+
+        status = "排队中..." if job.started_at is None else \
+            f"仿真进度: {job.progress:.0%}（{job.done:,} / {job.total:,} 步，{job.elapsed:.1f} s）"
+        st.progress(min(int(job.progress * 100), 100), text=status)
+        partial = job.partial_metrics
+        if partial is not None:
+            st.caption("截至当前的部分指标")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("负载跟踪率", f"{partial['load_tracking_rate']:.2f}%")
+            with col2:
+                st.metric("逆流次数", f"{partial['backflow_count']}")
+            with col3:
+                st.metric("最大逆流功率", f"{partial['max_backflow_kw']:.2f} kW")
+            with col4:
+                st.metric("安全旁路次数", f"{partial['safety_bypass_count']}")
+        return True
+
+    del st.session_state['job']
+    if job.state == CANCELLED:
+        st.warning("仿真已取消")
+    elif job.state != DONE:
+        st.error(f"仿真失败: {job.error}")
+    else:
+        result = job.result
+        if result.profile is not None:
+            st.success("✓ 仿真完成！（已完成性能剖析，在“显示调试信息”中查看）")
+        elif result.cached:
+            st.success(f"✓ 仿真完成！（命中缓存，{result.wall_time * 1000:.0f} ms）")
+        else:
+            st.success(f"✓ 仿真完成！（{result.wall_time:.1f} s）")
+        pre = result.preprocessing
+        if pre is not None:
+            st.info(f"预处理: {pre.n_input:,} → {len(pre.time):,} 点（重新排序 {pre.n_unsorted} 处，合并重复 "
+                    f"{pre.n_duplicates} 个），{pre.n_gaps} 处缺口（阈值 {pre.gap_threshold:g} s），控制器在各缺口后重启")
+
+        st.session_state['history'] = result.history
+        st.session_state['metrics'] = result.metrics
+        st.session_state['params_used'] = st.session_state.pop('job_params', None)
+        st.session_state['profile'] = result.profile
+        st.session_state['preprocessing'] = result.preprocessing
+        st.session_state['history_fingerprint'] = history_fingerprint(result.history)
+    return False
+
+
 def render_sidebar():
     """渲染侧边栏参数设置"""
     with st.sidebar:
@@ -110,18 +221,40 @@ def render_sidebar():
         else:
             uploaded_file = st.file_uploader(
                 "上传负载数据文件",
-                type=['csv', 'xlsx', 'xls'],
+                type=['csv', 'xlsx', 'xls', 'parquet', 'arrow', 'feather'],
                 help="文件需包含 'time' 和 'load' 列"
             )
             if uploaded_file:
-                df = load_data(uploaded_file)
+                # 解析结果按文件 ID 缓存，后台任务轮询等重运行不会重复读取和清洗上传文件
+                upload = st.session_state.get('upload')
+                if upload is None or upload[0] != uploaded_file.file_id:
+                    try:
+                        df, report = load_data(uploaded_file)
+                        upload = (uploaded_file.file_id, df, report, None)
+                    except Exception as e:
+                        upload = (uploaded_file.file_id, None, None, str(e))
+                    st.session_state['upload'] = upload
+                _, df, report, error = upload
+                if error is not None:
+                    st.error(f"加载数据时出错: {error}")
                 if df is not None:
+                    render_quality_report(report, df)
                     st.session_state['df'] = df
                     st.success("✓ 数据已加载")
 
         if 'df' in st.session_state:
             df = st.session_state['df']
 
+        st.checkbox(
+            "数据预处理",
+            value=False,
+            key="preprocess_mode",
+            help="仿真前排序、合并重复时间戳并检测缺口（超过名义采样间隔 5 倍），控制器在每个缺口后重新启动"
+        )
+        if st.session_state.get('preprocess_mode'):
+            st.number_input("重采样间隔 (s)", min_value=0.0, max_value=60.0, value=0.0, step=0.5, key="resample_interval",
+                            help="在每个连续段内重采样到均匀网格（线性插值，不跨缺口），0 表示不重采样")
+
         st.markdown("---")
 
         # 控制参数
@@ -165,6 +298,12 @@ def render_sidebar():
         )
 
         st.markdown("---")
+        st.checkbox(
+            "性能剖析",
+            value=False,
+            key="profile_mode",
+            help="记录控制循环的函数耗时和内存分配（不使用缓存，耗时约为正常仿真的 3~5 倍），结果显示在调试信息中"
+        )
         run_button = st.button("运行仿真", use_container_width=True, type="primary")
 
         return df, params, run_button
@@ -333,6 +472,8 @@ def render_results():
     history = st.session_state['history']
     metrics = st.session_state['metrics']
     params_used = st.session_state.get('params_used', None)
+    if st.session_state.get('history_fingerprint') is None:
+        st.session_state['history_fingerprint'] = history_fingerprint(history)
 
     # 视图模式切换
     st.markdown('<div style="background: linear-gradient(135deg, rgba(26, 115, 232, 0.05) 0%, rgba(66, 133, 244, 0.08) 100%); border-radius: 8px; padding: 16px; margin-bottom: 20px;">', unsafe_allow_html=True)
@@ -350,16 +491,26 @@ def render_results():
 
     # 根据模式渲染不同视图
     if view_mode == "仪表盘视图":
-        render_dashboard_mode(metrics)
+        render_dashboard_mode(history, metrics)
     else:
         render_standard_mode(history, metrics, params_used)
 
 
-def render_dashboard_mode(metrics: dict):
+# 分时段指标的窗口选项（显示名 -> 秒）
+WINDOW_OPTIONS = {"1 分钟": 60, "15 分钟": 900, "1 小时": 3600}
+
+# 曲线降采样选项（显示名 -> 方法，None 表示绘制全部样本）
+DOWNSAMPLE_OPTIONS = {"最大/最小值（保留尖峰）": "minmax", "LTTB（形状平滑）": "lttb", "关闭（全部样本）": None}
+
+# 曲线渲染方式选项（显示名 -> 图表函数的 webgl 参数，None 表示按点数自动选择）
+RENDER_OPTIONS = {"自动": None, "SVG": False, "WebGL（需要 GPU）": True}
+
+
+def render_dashboard_mode(history: dict, metrics: dict):
     """渲染仪表盘模式"""
     st.markdown('<h2><span class="material-icons" style="vertical-align: middle; margin-right: 8px;">speed</span>实时监控仪表盘</h2>', unsafe_allow_html=True)
 
-    dashboards = create_dashboard_view(metrics)
+    dashboards = session_cached(create_dashboard_view, metrics)
 
     # 第一行：最重要的指标 - 负载跟踪率（占据更大空间）
     col1, col2 = st.columns([2, 1])
@@ -389,6 +540,53 @@ def render_dashboard_mode(metrics: dict):
     with col_d4:
         st.metric("最大下调速率", f"{metrics['max_down_rate']:.2f} kW/s")
 
+    st.markdown("---")
+    render_windowed_section(history, key="dashboard_window")
+
+
+def build_windowed_kpis(history: dict, window: float):
+    """计算分时段指标并创建图表，返回 (指标表, 图表)"""
+    windows = windowed_metrics(history, window=window)
+    return windows, create_windowed_kpi_plot(windows, height=450)
+
+
+def render_windowed_section(history: dict, key: str) -> pd.DataFrame:
+    """渲染分时段指标（图表 + 表格），返回分时段指标表"""
+    st.markdown('<h2><span class="material-icons" style="vertical-align: middle; margin-right: 8px;">schedule</span>分时段指标</h2>', unsafe_allow_html=True)
+    window_label = st.selectbox("统计窗口", list(WINDOW_OPTIONS), index=2, key=key)
+    windows, fig_windows = session_cached(build_windowed_kpis, history, window=WINDOW_OPTIONS[window_label])
+    st.plotly_chart(fig_windows, use_container_width=True, config=getattr(fig_windows, '_config', {}))
+
+    with st.expander("查看分时段指标表", expanded=False):
+        st.dataframe(windows, use_container_width=True)
+    return windows
+
+
+def render_event_section(history: dict):
+    """渲染逆流事件和安全旁路事件统计"""
+    st.markdown('<h2><span class="material-icons" style="vertical-align: middle; margin-right: 8px;">report</span>逆流事件</h2>', unsafe_allow_html=True)
+    events = session_cached(segment_events, history)
+    backflow = event_summary(events['backflow'])
+
+    col_e1, col_e2, col_e3, col_e4 = st.columns(4)
+    with col_e1:
+        st.metric("逆流事件数", f"{backflow['count']:,}")
+    with col_e2:
+        st.metric("逆流总电量", f"{backflow['total_energy_kwh']:.3f} kWh")
+    with col_e3:
+        st.metric("持续时间 P50 / P99", f"{backflow['duration_p50']:.1f} / {backflow['duration_p99']:.1f} s")
+    with col_e4:
+        st.metric("峰值功率 P99 / 最大", f"{backflow['peak_p99']:.2f} / {backflow['peak_max']:.2f} kW")
+
+    with st.expander("查看事件明细", expanded=False):
+        tab_backflow, tab_bypass = st.tabs(["逆流事件", "安全旁路事件"])
+        for tab, name, file_name in ((tab_backflow, 'backflow', "v5_backflow_events.csv"),
+                                     (tab_bypass, 'bypass', "v5_bypass_events.csv")):
+            with tab:
+                st.dataframe(events[name], use_container_width=True)
+                st.download_button("下载事件表 (CSV)", data=events[name].to_csv(index=False),
+                                  file_name=file_name, mime="text/csv", key=f"download_{name}_events")
+
 
 def render_standard_mode(history: dict, metrics: dict, params_used):
     """渲染标准模式"""
@@ -406,33 +604,70 @@ def render_standard_mode(history: dict, metrics: dict, params_used):
         with col_opt2:
             chart_height = st.slider("图表高度", 400, 800, 600, 50)
             show_debug = st.checkbox("显示调试信息", value=False)
+        downsample_label = st.selectbox("曲线降采样", list(DOWNSAMPLE_OPTIONS), index=0,
+                                        help=f"每条曲线最多发送约 {DEFAULT_MAX_POINTS} 个点到浏览器；缩小可见范围即可查看更细的分辨率")
+        render_label = st.selectbox("曲线渲染", list(RENDER_OPTIONS), index=0,
+                                    help=f"自动：总点数超过 {WEBGL_POINT_THRESHOLD:,} 时使用 WebGL；"
+                                         "浏览器有 GPU 时关闭降采样后可选 WebGL 加快绘制")
+        time_range = render_visible_range(history)
+
+    method = DOWNSAMPLE_OPTIONS[downsample_label]
+    plot_options = dict(max_points=DEFAULT_MAX_POINTS if method else None, method=method or "minmax",
+                        time_range=time_range, webgl=RENDER_OPTIONS[render_label])
 
     if show_debug:
         render_debug_info(history)
-
-    fig_timeseries = create_time_series_plot(history, show_stukf=show_stukf, show_bounds=show_bounds, height=chart_height)
+        pre = st.session_state.get('preprocessing')
+        if pre is not None and pre.n_gaps > 0:
+            st.markdown("### 连续段（控制器在每段开始时重启）")
+            st.dataframe(pre.segments, use_container_width=True)
+        if st.session_state.get('profile') is not None:
+            render_profile_report(st.session_state['profile'])
+
+    fig_timeseries = session_cached(create_time_series_plot, history, show_stukf=show_stukf, show_bounds=show_bounds,
+                                   height=chart_height, **plot_options)
     # 使用config参数启用全屏等功能
     st.plotly_chart(fig_timeseries, use_container_width=True, config=getattr(fig_timeseries, '_config', {}))
 
     # 其他图表
     st.markdown("---")
     st.markdown('<h2><span class="material-icons" style="vertical-align: middle; margin-right: 8px;">insights</span>控制效果分析</h2>', unsafe_allow_html=True)
-    fig_effectiveness = create_control_effectiveness_plot(history, height=500)
+    fig_effectiveness = session_cached(create_control_effectiveness_plot, history, height=500, **plot_options)
     st.plotly_chart(fig_effectiveness, use_container_width=True, config=getattr(fig_effectiveness, '_config', {}))
 
     st.markdown("---")
     st.markdown('<h2><span class="material-icons" style="vertical-align: middle; margin-right: 8px;">battery_charging_full</span>光伏容量利用分析</h2>', unsafe_allow_html=True)
     st.caption("注：在直接负载跟踪模式下，光伏输出不超过负载需求，未利用容量为设计行为而非弃光")
     P_max_val = params_used.P_max if params_used else 100.0
-    fig_curtailment = create_curtailment_analysis(history, P_max_val, height=400)
+    fig_curtailment = session_cached(create_curtailment_analysis, history, P_max=P_max_val, height=400, **plot_options)
     st.plotly_chart(fig_curtailment, use_container_width=True, config=getattr(fig_curtailment, '_config', {}))
 
     st.markdown("---")
     st.markdown('<h2><span class="material-icons" style="vertical-align: middle; margin-right: 8px;">bar_chart</span>变化率分布统计</h2>', unsafe_allow_html=True)
-    fig_ramp = create_ramp_rate_distribution(history, height=400)
+    fig_ramp = session_cached(create_ramp_rate_distribution, history, height=400)
     st.plotly_chart(fig_ramp, use_container_width=True, config=getattr(fig_ramp, '_config', {}))
 
-    render_download_section(history, metrics)
+    st.markdown("---")
+    windows = render_windowed_section(history, key="standard_window")
+
+    st.markdown("---")
+    render_event_section(history)
+
+    render_download_section(history, metrics, windows)
+
+
+def render_visible_range(history: dict):
+    """可见时间范围滑块，返回 (start, end)；选择全部范围时返回 None"""
+    t_start, t_end = float(history['time'][0]), float(history['time'][-1])
+    if t_end <= t_start:
+        return None
+    # 数据时长变化后滑块需要重建，键中带上时间范围
+    start, end = st.slider("可见时间范围 (秒)", t_start, t_end, (t_start, t_end),
+                           key=f"visible_range_{t_start:.0f}_{t_end:.0f}",
+                           help="曲线按所选范围重新降采样，范围越小分辨率越高")
+    if start <= t_start and end >= t_end:
+        return None
+    return start, end
 
 
 def render_debug_info(history):
@@ -458,35 +693,46 @@ def render_debug_info(history):
     st.dataframe(pd.DataFrame(debug_data), use_container_width=True)
 
 
-def render_download_section(history, metrics):
+def history_to_csv(history: dict, columns: list) -> str:
+    """把历史数据的指定列导出为 CSV 文本"""
+    return pd.DataFrame({name: history[name] for name in columns}).to_csv(index=False)
+
+
+def render_download_section(history, metrics, windows=None):
     """渲染数据下载区域"""
     st.markdown("---")
     st.markdown('<h2><span class="material-icons" style="vertical-align: middle; margin-right: 8px;">download</span>导出数据</h2>', unsafe_allow_html=True)
 
-    col_d1, col_d2 = st.columns(2)
+    col_d1, col_d2, col_d3, col_d4 = st.columns(4)
+    export_columns = ['time', 'load', 'P_cmd', 'U_A', 'U_B', 'L_med', 'L_lb', 'safety_bypass']
 
     with col_d1:
-        result_df = pd.DataFrame({
-            'time': history['time'],
-            'load': history['load'],
-            'P_cmd': history['P_cmd'],
-            'U_A': history['U_A'],
-            'U_B': history['U_B'],
-            'L_med': history['L_med'],
-            'L_lb': history['L_lb'],
-            'safety_bypass': history['safety_bypass']
-        })
-
-        csv = result_df.to_csv(index=False)
+        csv = session_cached(history_to_csv, history, columns=export_columns)
         st.download_button("下载仿真结果 (CSV)", data=csv, file_name="v5_simulation_results.csv",
                           mime="text/csv", use_container_width=True, type="primary")
 
     with col_d2:
+        try:
+            parquet_bytes = session_cached(history_to_bytes, history, fmt='parquet', columns=export_columns)
+        except ImportError as e:
+            st.caption(str(e))
+        else:
+            st.download_button("下载仿真结果 (Parquet)", data=parquet_bytes,
+                              file_name="v5_simulation_results.parquet",
+                              mime="application/vnd.apache.parquet", use_container_width=True)
+
+    with col_d3:
         metrics_df = pd.DataFrame([metrics])
         metrics_csv = metrics_df.to_csv(index=False)
         st.download_button("下载性能指标 (CSV)", data=metrics_csv, file_name="v5_performance_metrics.csv",
                           mime="text/csv", use_container_width=True, type="primary")
 
+    with col_d4:
+        if windows is None:
+            windows = windowed_metrics(history)
+        st.download_button("下载分时段指标 (CSV)", data=windows.to_csv(index=False),
+                          file_name="v5_windowed_metrics.csv", mime="text/csv", use_container_width=True)
+
 
 def render_welcome_screen():
     """渲染欢迎界面"""
@@ -512,7 +758,7 @@ def render_welcome_screen():
 
     ### 📁 数据格式要求
 
-    上传的数据文件支持 CSV、Excel (.xlsx, .xls) 格式。
+    上传的数据文件支持 CSV、Excel (.xlsx, .xls)、Parquet 和 Arrow (.arrow, .feather) 格式。
 
     **支持的列名**（自动识别）:
     - **时间列**: UTC时间, UTC, time, 时间, timestamp
@@ -537,26 +783,29 @@ def main():
     # 侧边栏参数设置
     df, params, run_button = render_sidebar()
 
-    # 运行仿真
+    # 提交后台仿真（同一会话再次提交时放弃上一个未完成的任务）
     if df is not None and run_button:
-        st.markdown("## 📊 仿真结果")
-
-        with st.spinner("正在运行仿真..."):
-            controller = run_simulation(df, params)
-            history = controller.get_history()
-
-        st.success("✓ 仿真完成！")
-
-        metrics = compute_metrics(df, history)
-
-        st.session_state['controller'] = controller
-        st.session_state['history'] = history
-        st.session_state['metrics'] = metrics
-        st.session_state['params_used'] = params
-
-    # 显示结果
+        manager = get_job_manager()
+        previous = st.session_state.get('job')
+        job = manager.submit(df['time'].to_numpy(), df['load'].to_numpy(), params, owner=session_id(),
+                             profile=st.session_state.get('profile_mode', False),
+                             preprocessing=preprocessing_options())
+        if previous is not None and previous is not job:
+            manager.cancel(previous, owner=session_id())
+        st.session_state['job'] = job
+        st.session_state['job_params'] = params
+
+    job_running = False
+    if st.session_state.get('job') is not None:
+        job_running = render_job_status(st.session_state['job'])
+
+    # 显示结果（后台仿真运行期间显示上一次的结果）
     render_results()
 
+    if job_running:
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
 
 if __name__ == "__main__":
     main()
@@ -3,5 +3,7 @@ UI组件模块
 """
 
 from .metric_card import create_metric_card
+from .quality_report import render_quality_report
+from .profile_report import render_profile_report
 
-__all__ = ['create_metric_card']
+__all__ = ['create_metric_card', 'render_quality_report', 'render_profile_report']
@@ -0,0 +1,74 @@
+"""
+性能剖析报告组件
+"""
+
+import json
+
+import pandas as pd
+import streamlit as st
+
+from src.utils.profiling import ProfileReport
+
+
+def render_profile_report(report: ProfileReport, top_n: int = 15):
+    """展示 simulate(profile=True) 生成的剖析报告
+
+    Args:
+        report: 剖析结果
+        top_n: 热点函数和分配位置的显示行数
+    """
+    st.markdown("### ⏱️ 性能剖析")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("剖析耗时", f"{report.wall_time:.2f} s", help="含 cProfile 开销，约为正常仿真的 2 倍")
+    with col2:
+        top = report.modules.iloc[0] if len(report.modules) else None
+        st.metric("最耗时模块", f"{top['module']} ({top['share']:.0%})" if top is not None else "-")
+    with col3:
+        peak = report.peak_memory_mb
+        st.metric("峰值内存", f"{peak:.1f} MB" if peak is not None else "-")
+
+    tab_modules, tab_functions, tab_memory = st.tabs(["模块耗时", f"热点函数 Top {top_n}", "内存分配"])
+    with tab_modules:
+        st.dataframe(pd.DataFrame({
+            '模块': report.modules['module'],
+            '自身耗时(s)': report.modules['tottime'].round(4),
+            '占比': (report.modules['share'] * 100).round(1).astype(str) + '%',
+            '调用次数': report.modules['ncalls'],
+        }), use_container_width=True, hide_index=True)
+    with tab_functions:
+        functions = report.functions.head(top_n)
+        st.dataframe(pd.DataFrame({
+            '模块': functions['module'],
+            '函数': functions['function'],
+            '位置': functions['location'],
+            '调用次数': functions['ncalls'],
+            '自身耗时(s)': functions['tottime'].round(4),
+            '累计耗时(s)': functions['cumtime'].round(4),
+        }), use_container_width=True, hide_index=True)
+    with tab_memory:
+        st.caption("仿真结束时仍存活的内存分配（含历史数据），按分配发生的模块归类")
+        st.dataframe(report.allocations.rename(columns={'module': '模块', 'size_kb': '大小(KB)', 'count': '对象数'}),
+                     use_container_width=True, hide_index=True)
+        st.dataframe(report.allocation_lines.head(top_n).rename(
+            columns={'location': '位置', 'module': '模块', 'size_kb': '大小(KB)', 'count': '对象数'}),
+            use_container_width=True, hide_index=True)
+
+    col_json, col_prof = st.columns(2)
+    with col_json:
+        st.download_button(
+            "下载剖析报告 (JSON)",
+            data=json.dumps(report.to_dict(), ensure_ascii=False, indent=2),
+            file_name="profile.json",
+            mime="application/json",
+            key="download_profile_json",
+        )
+    with col_prof:
+        st.download_button(
+            "下载 pstats (.prof)",
+            data=report.pstats_data,
+            file_name="profile.prof",
+            mime="application/octet-stream",
+            key="download_profile_prof",
+        )
@@ -0,0 +1,68 @@
+"""
+数据质量报告组件
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.utils.data_processing import LOAD_UPPER_LIMIT, QualityReport
+
+_STAT_LABELS = {'min': '最小值', 'max': '最大值', 'mean': '平均值', 'std': '标准差', 'median': '中位数'}
+
+
+def render_quality_report(report: QualityReport, df: pd.DataFrame):
+    """展示 clean_load_data 生成的质量报告
+
+    Args:
+        report: 数据质量报告
+        df: 清洗后的数据（time/load 两列）
+    """
+    st.info(f"检测到的列: {', '.join(report.columns)}")
+
+    if report.time_format == 'index':
+        st.warning("时间列无法解析，使用行索引作为时间序列")
+    elif report.n_invalid_time > 0:
+        st.warning(f"⚠️ 时间列中有 {report.n_invalid_time} 个无效值，已移除")
+
+    total = max(report.n_clean, 1)
+    if report.has_issues:
+        lines = ["📊 数据质量报告："]
+        if report.n_na > 0:
+            lines.append(f"  • 缺失值: {report.n_na} 个 ({report.n_na / total * 100:.1f}%)")
+        if report.n_negative > 0:
+            lines.append(f"  • 负值: {report.n_negative} 个 ({report.n_negative / total * 100:.1f}%)")
+        if report.n_oversized > 0:
+            lines.append(f"  • 异常大值(>{LOAD_UPPER_LIMIT}): {report.n_oversized} 个 "
+                         f"({report.n_oversized / total * 100:.1f}%)")
+        st.warning("\n".join(lines))
+    if report.n_zero_filled > 0:
+        st.warning("部分数据无法填充，使用0替代")
+
+    if report.n_rows != report.n_clean:
+        st.success(f"✓ 数据清洗完成: {report.n_rows} → {report.n_clean} 条数据")
+    else:
+        st.success(f"✓ 数据清洗完成: 保留 {report.n_clean} 条数据")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("时间范围", f"{report.time_span / 3600:.2f} 小时")
+        st.metric("数据点数", f"{report.n_clean:,}")
+    with col2:
+        st.metric("负载均值", f"{report.clean_stats['mean']:.2f} kW")
+        st.metric("负载范围", f"{report.clean_stats['min']:.1f} ~ {report.clean_stats['max']:.1f} kW")
+
+    with st.expander("查看数据处理详情", expanded=False):
+        n_preview = len(report.raw_preview)
+        st.dataframe(pd.DataFrame({
+            '时间(s)': df['time'].to_numpy()[:n_preview],
+            '原始负载': np.asarray(report.raw_preview, dtype=float),
+            '处理后负载': df['load'].to_numpy()[:n_preview],
+        }), use_container_width=True)
+
+        st.markdown(f"**数据质量指标:**（时间解析方式: `{report.time_format}`）")
+        st.dataframe(pd.DataFrame({
+            '指标': list(_STAT_LABELS.values()),
+            '原始数据': [f"{report.raw_stats[k]:.2f}" for k in _STAT_LABELS],
+            '处理后': [f"{report.clean_stats[k]:.2f}" for k in _STAT_LABELS],
+        }), use_container_width=True)
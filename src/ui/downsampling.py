@@ -0,0 +1,139 @@
+"""
+时间序列降采样模块 - 按像素预算减少发送到浏览器的点数
+
+- minmax: 每个桶保留最小值和最大值所在的点，逆流尖峰等极值一定可见（默认，纯向量化）
+- lttb: Largest-Triangle-Three-Buckets，视觉形状更平滑；先用 min-max 预选 4 倍点数
+  再做 LTTB（MinMaxLTTB），把逐桶循环的输入规模限制在像素预算附近
+
+所有函数返回被选中样本的索引（升序），同一组索引可用于取 x 和 y。
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# 每条曲线的默认点数上限（约为图表像素宽度的 2 倍，min-max 每像素两个点）
+DEFAULT_MAX_POINTS = 2000
+
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
+
+# MinMaxLTTB 预选倍数
+LTTB_PRESELECT_RATIO = 4
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    分桶 min-max 降采样
+
+    参数:
+        y: 数据序列
+        n_out: 输出点数上限（每桶 2 个点）
+
+    返回:
+        选中样本的索引（升序，含首尾点）
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    n_buckets = max(n_out // 2, 1)
+    bucket = -(-n // n_buckets)
+    n_rows = -(-n // bucket)
+    pad = n_rows * bucket - n
+
+    y = np.asarray(y, dtype=float)
+    rows_min = np.pad(y, (0, pad), constant_values=np.inf).reshape(n_rows, bucket)
+    rows_max = np.pad(y, (0, pad), constant_values=-np.inf).reshape(n_rows, bucket)
+    base = np.arange(n_rows) * bucket
+    idx = np.concatenate((
+        [0], base + rows_min.argmin(axis=1), base + rows_max.argmax(axis=1), [n - 1],
+    ))
+    return np.unique(idx)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降采样
+
+    参数:
+        x: 横坐标（单调递增）
+        y: 数据序列
+        n_out: 输出点数（含首尾点）
+
+    返回:
+        选中样本的索引（升序）
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # 中间 n-2 个点均分为 n_out-2 个桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # 各桶均值（作为下一桶的三角形第三个顶点），最后一桶之后是末尾点
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        # 三角形面积（省略常数 1/2）
+        area = np.abs((x[a] - avg_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (avg_y[i + 1] - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: Optional[int] = DEFAULT_MAX_POINTS,
+                       method: str = "minmax") -> np.ndarray:
+    """
+    按点数上限选出要绘制的样本
+
+    参数:
+        x: 横坐标（单调递增）
+        y: 数据序列
+        max_points: 点数上限，None 或 0 表示不降采样
+        method: 'minmax' 或 'lttb'
+
+    返回:
+        选中样本的索引（升序）
+    """
+    n = len(y)
+    if not max_points or n <= max_points:
+        return np.arange(n)
+    if method == "minmax":
+        return minmax_indices(y, max_points)
+    if method == "lttb":
+        pre = minmax_indices(y, max_points * LTTB_PRESELECT_RATIO)
+        return pre[lttb_indices(x[pre], y[pre], max_points)]
+    raise ValueError(f"未知的降采样方法: {method}，可选 {DOWNSAMPLE_METHODS}")
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: Optional[int] = DEFAULT_MAX_POINTS,
+               method: str = "minmax") -> Tuple[np.ndarray, np.ndarray]:
+    """按点数上限降采样，返回 (x, y)"""
+    idx = downsample_indices(x, y, max_points, method)
+    if len(idx) == len(y):
+        return x, y
+    return x[idx], y[idx]
+
+
+def visible_slice(time: np.ndarray, time_range: Optional[Tuple[float, float]] = None) -> slice:
+    """
+    时间范围 [start, end] 对应的样本切片（time 需单调递增）
+
+    参数:
+        time: 时间序列
+        time_range: (start, end)，None 表示全部
+    """
+    if time_range is None:
+        return slice(0, len(time))
+    start, end = time_range
+    return slice(int(np.searchsorted(time, start, side="left")), int(np.searchsorted(time, end, side="right")))
@@ -0,0 +1,116 @@
+"""
+图表缓存模块 - 跨 Streamlit 重运行复用已构建的图表
+
+任何交互（切换深色模式、勾选图表选项等）都会重新执行整个页面脚本。
+FigureCache 保存在 session_state 中，以"图表名 + 历史数据指纹 + 显示选项"为键缓存
+构建结果（Plotly 图表、派生数据和导出文件），数据和选项不变的图表直接复用。
+每个会话按估计字节数做 LRU 淘汰，内存占用有上限。
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 每个会话的图表缓存容量（字节，按图表中数组大小估计）
+DEFAULT_MAX_BYTES = 64 * 1024 ** 2
+
+
+def history_fingerprint(history: Dict[str, np.ndarray]) -> str:
+    """计算历史数据内容的哈希（仿真完成时计算一次）"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(history):
+        arr = np.ascontiguousarray(history[name])
+        digest.update(f"{name}:{arr.dtype.str}:{arr.shape}|".encode())
+        digest.update(arr.tobytes())
+    return digest.hexdigest()
+
+
+def estimate_nbytes(value: Any) -> int:
+    """估计缓存值的内存占用：图表按轨迹中的数组计算，其他按 NumPy / pandas / 字节串大小计算"""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    data = getattr(value, "data", None)
+    if isinstance(data, tuple):
+        total = 0
+        for trace in data:
+            for attr in ("x", "y", "z", "customdata"):
+                arr = trace[attr] if attr in trace else None
+                if arr is not None and not np.isscalar(arr):
+                    total += np.asarray(arr).nbytes
+        return total + 4096
+    return 1024
+
+
+def _freeze(value: Any):
+    """把显示选项转换为可哈希的键"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, float):
+        return round(value, 9)
+    return value
+
+
+class FigureCache:
+    """按字节数限制容量的图表 LRU 缓存（每个会话一个实例）"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        参数:
+            max_bytes: 缓存容量上限（字节），超出时淘汰最久未使用的图表
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_build(self, name: str, fingerprint: Optional[str], build: Callable[[], Any], **options) -> Any:
+        """
+        返回缓存的构建结果，未命中时调用 build() 并缓存
+
+        参数:
+            name: 图表名称
+            fingerprint: 输入数据指纹（history_fingerprint），None 表示不缓存
+            build: 无参构建函数
+            options: 影响构建结果的显示选项（作为键的一部分）
+        """
+        if fingerprint is None:
+            return build()
+        key = (name, fingerprint, _freeze(options))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        value = build()
+        nbytes = estimate_nbytes(value)
+        if nbytes <= self.max_bytes:
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+        return value
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+        self.nbytes = 0
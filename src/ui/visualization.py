@@ -6,68 +6,96 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from src.ui.styles import get_material_colors
-from src.ui.visualization_base import apply_chart_theme, colors
+from src.ui.visualization_base import apply_chart_theme, colors, scatter_type
+from src.ui.downsampling import DEFAULT_MAX_POINTS, downsample, visible_slice
 
 
-def create_time_series_plot(history: dict, show_stukf: bool = False, show_bounds: bool = True, height: int = 600):
-    """创建时间序列对比图"""
-    time = history['time']
-    load = history['load']
-    P_cmd = history['P_cmd']
+def _points_per_trace(n: int, max_points) -> int:
+    """降采样后每条曲线的点数（估计上限）"""
+    return min(n, max_points) if max_points else n
+
+
+def create_time_series_plot(history: dict, show_stukf: bool = False, show_bounds: bool = True, height: int = 600,
+                            max_points: int = DEFAULT_MAX_POINTS, method: str = "minmax", time_range=None,
+                            webgl=None):
+    """创建时间序列对比图
+
+    Args:
+        max_points: 每条曲线的点数上限（按可见范围降采样），None 表示绘制全部样本
+        method: 降采样方法 'minmax' / 'lttb'
+        time_range: 可见时间范围 (start, end)，None 表示全部
+        webgl: 是否使用 WebGL 轨迹，None 表示按总点数自动选择
+    """
+    sl = visible_slice(history['time'], time_range)
+    time = history['time'][sl]
+    load = history['load'][sl]
+    P_cmd = history['P_cmd'][sl]
+
+    def line(y):
+        return downsample(time, y, max_points, method)
+
+    n_traces = 2 + 2 * (show_stukf and 'L_med' in history) + 2 * (show_bounds and 'U_A' in history)
+    Scatter = scatter_type(_points_per_trace(len(time), max_points) * n_traces, webgl)
 
     fig = go.Figure()
 
     # 原始负载
-    fig.add_trace(go.Scatter(
-        x=time, y=load, mode='lines', name='原始负载 L(t)',
+    x, y = line(load)
+    fig.add_trace(Scatter(
+        x=x, y=y, mode='lines', name='原始负载 L(t)',
         line=dict(color=colors['gray'], width=1.5),
         hovertemplate='<b>负载</b><br>时间: %{x:.1f}s<br>功率: %{y:.2f} kW<extra></extra>'
     ))
 
     # PV 限发指令
-    fig.add_trace(go.Scatter(
-        x=time, y=P_cmd, mode='lines', name='PV限发指令 P_cmd',
+    x, y = line(P_cmd)
+    fig.add_trace(Scatter(
+        x=x, y=y, mode='lines', name='PV限发指令 P_cmd',
         line=dict(color=colors['blue'], width=3),
         hovertemplate='<b>PV指令</b><br>时间: %{x:.1f}s<br>功率: %{y:.2f} kW<extra></extra>'
     ))
 
     # STUKF 预测
     if show_stukf and 'L_med' in history:
-        fig.add_trace(go.Scatter(
-            x=time, y=history['L_med'], mode='lines', name='STUKF预测均值 L_med',
+        x, y = line(history['L_med'][sl])
+        fig.add_trace(Scatter(
+            x=x, y=y, mode='lines', name='STUKF预测均值 L_med',
             line=dict(color=colors['purple'], width=1.5, dash='dash'),
             hovertemplate='<b>预测均值</b><br>时间: %{x:.1f}s<br>功率: %{y:.2f} kW<extra></extra>'
         ))
 
-        fig.add_trace(go.Scatter(
-            x=time, y=history['L_lb'], mode='lines', name='STUKF置信下界 L_lb',
+        x, y = line(history['L_lb'][sl])
+        fig.add_trace(Scatter(
+            x=x, y=y, mode='lines', name='STUKF置信下界 L_lb',
             line=dict(color=colors['orange'], width=1.5, dash='dot'),
             hovertemplate='<b>置信下界</b><br>时间: %{x:.1f}s<br>功率: %{y:.2f} kW<extra></extra>'
         ))
 
     # 安全/性能上界
     if show_bounds and 'U_A' in history:
-        fig.add_trace(go.Scatter(
-            x=time, y=history['U_A'], mode='lines', name='安全上界 U_A',
+        x, y = line(history['U_A'][sl])
+        fig.add_trace(Scatter(
+            x=x, y=y, mode='lines', name='安全上界 U_A',
             line=dict(color=colors['red'], width=1.2, dash='dash'), opacity=0.6,
             hovertemplate='<b>安全上界</b><br>时间: %{x:.1f}s<br>功率: %{y:.2f} kW<extra></extra>'
         ))
 
-        fig.add_trace(go.Scatter(
-            x=time, y=history['U_B'], mode='lines', name='性能上界 U_B',
+        x, y = line(history['U_B'][sl])
+        fig.add_trace(Scatter(
+            x=x, y=y, mode='lines', name='性能上界 U_B',
             line=dict(color=colors['green'], width=1.2, dash='dot'), opacity=0.6,
             hovertemplate='<b>性能上界</b><br>时间: %{x:.1f}s<br>功率: %{y:.2f} kW<extra></extra>'
         ))
 
     # 安全旁路触发点
     if 'safety_bypass' in history:
-        safety_indices = np.where(history['safety_bypass'])[0]
+        safety_indices = np.where(history['safety_bypass'][sl])[0]
         if len(safety_indices) > 100:
             step = len(safety_indices) // 100
             safety_indices = safety_indices[::step]
 
         if len(safety_indices) > 0:
-            fig.add_trace(go.Scatter(
+            fig.add_trace(Scatter(
                 x=time[safety_indices], y=P_cmd[safety_indices], mode='markers', name='安全旁路触发',
                 marker=dict(color=colors['red'], size=4, symbol='circle', line=dict(width=1, color='white')),
                 hovertemplate='<b>安全旁路</b><br>时间: %{x:.1f}s<br>功率: %{y:.2f} kW<extra></extra>'
@@ -114,17 +142,22 @@ def create_ramp_rate_distribution(history: dict, height: int = 400):
     return apply_chart_theme(fig, height)
 
 
-def create_curtailment_analysis(history: dict, P_max: float, height: int = 400):
-    """创建光伏容量利用分析图"""
+def create_curtailment_analysis(history: dict, P_max: float, height: int = 400,
+                                max_points: int = DEFAULT_MAX_POINTS, method: str = "minmax", time_range=None,
+                                webgl=None):
+    """创建光伏容量利用分析图（左图按可见范围降采样，右侧分布图使用全部样本）"""
     P_cmd = history['P_cmd']
     time = history['time']
 
     unused_capacity = np.maximum(P_max - P_cmd, 0)
+    sl = visible_slice(time, time_range)
+    x, y = downsample(time[sl], unused_capacity[sl], max_points, method)
+    Scatter = scatter_type(_points_per_trace(len(time[sl]), max_points), webgl)
 
     fig = make_subplots(rows=1, cols=2,
                        specs=[[{"type": "scatter"}, {"type": "histogram"}]], horizontal_spacing=0.12)
 
-    fig.add_trace(go.Scatter(x=time, y=unused_capacity, mode='lines', name='未利用容量',
+    fig.add_trace(Scatter(x=x, y=y, mode='lines', name='未利用容量',
                             line=dict(color=colors['orange'], width=2), fill='tozeroy', fillcolor=f'rgba(255, 149, 0, 0.2)',
                             hovertemplate='时间: %{x:.1f}s<br>未利用: %{y:.2f} kW<extra></extra>'), row=1, col=1)
 
@@ -141,24 +174,36 @@ def create_curtailment_analysis(history: dict, P_max: float, height: int = 400):
     return apply_chart_theme(fig, height)
 
 
-def create_control_effectiveness_plot(history: dict, height: int = 500):
-    """创建控制效果对比图"""
-    time = history['time']
-    load = history['load']
-    P_cmd = history['P_cmd']
+def create_control_effectiveness_plot(history: dict, height: int = 500,
+                                      max_points: int = DEFAULT_MAX_POINTS, method: str = "minmax", time_range=None,
+                                      webgl=None):
+    """创建控制效果对比图（参数同 create_time_series_plot）"""
+    sl = visible_slice(history['time'], time_range)
+    time = history['time'][sl]
+    load = history['load'][sl]
+    P_cmd = history['P_cmd'][sl]
+    # 净负载在降采样前计算，逆流（净负载为负）的尖峰不会被平均掉
     net_load = load - P_cmd
 
+    def line(y):
+        return downsample(time, y, max_points, method)
+
+    Scatter = scatter_type(_points_per_trace(len(time), max_points) * 3, webgl)
+
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(x=time, y=load, mode='lines', name='原始负载',
+    x, y = line(load)
+    fig.add_trace(Scatter(x=x, y=y, mode='lines', name='原始负载',
                             line=dict(color=colors['gray'], width=1.5),
                             hovertemplate='<b>原始负载</b><br>时间: %{x:.1f}s<br>功率: %{y:.2f} kW<extra></extra>'))
 
-    fig.add_trace(go.Scatter(x=time, y=P_cmd, mode='lines', name='PV输出',
+    x, y = line(P_cmd)
+    fig.add_trace(Scatter(x=x, y=y, mode='lines', name='PV输出',
                             line=dict(color=colors['green'], width=2), fill='tozeroy', fillcolor=f'rgba(52, 199, 89, 0.2)',
                             hovertemplate='<b>PV输出</b><br>时间: %{x:.1f}s<br>功率: %{y:.2f} kW<extra></extra>'))
 
-    fig.add_trace(go.Scatter(x=time, y=net_load, mode='lines', name='净负载',
+    x, y = line(net_load)
+    fig.add_trace(Scatter(x=x, y=y, mode='lines', name='净负载',
                             line=dict(color=colors['blue'], width=2),
                             hovertemplate='<b>净负载</b><br>时间: %{x:.1f}s<br>功率: %{y:.2f} kW<extra></extra>'))
 
@@ -172,3 +217,33 @@ def create_control_effectiveness_plot(history: dict, height: int = 500):
     )
 
     return apply_chart_theme(fig, height)
+
+
+def create_windowed_kpi_plot(windows, height: int = 450):
+    """创建分时段指标图（上：各时段负载跟踪率；下：逆流次数与最大逆流功率）"""
+    start_h = windows['window_start'].to_numpy() / 3600
+    width_h = (windows['window_end'] - windows['window_start']).to_numpy() / 3600
+    centers = start_h + width_h / 2
+
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+                        specs=[[{}], [{"secondary_y": True}]])
+
+    fig.add_trace(go.Bar(x=centers, y=windows['load_tracking_rate'], width=width_h * 0.9, name='负载跟踪率',
+                         marker_color=colors['blue'],
+                         hovertemplate='时段起点: %{x:.2f}h<br>跟踪率: %{y:.2f}%<extra></extra>'), row=1, col=1)
+
+    fig.add_trace(go.Bar(x=centers, y=windows['backflow_count'], width=width_h * 0.9, name='逆流次数',
+                         marker_color=colors['red'], opacity=0.6,
+                         hovertemplate='逆流次数: %{y}<extra></extra>'), row=2, col=1)
+
+    fig.add_trace(go.Scatter(x=centers, y=windows['max_backflow_kw'], mode='lines+markers', name='最大逆流功率',
+                             line=dict(color=colors['orange'], width=2),
+                             hovertemplate='最大逆流: %{y:.2f} kW<extra></extra>'), row=2, col=1, secondary_y=True)
+
+    fig.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1), bargap=0)
+    fig.update_xaxes(title_text="时间 (小时)", row=2, col=1)
+    fig.update_yaxes(title_text="跟踪率 (%)", row=1, col=1)
+    fig.update_yaxes(title_text="逆流次数", row=2, col=1)
+    fig.update_yaxes(title_text="最大逆流 (kW)", row=2, col=1, secondary_y=True)
+
+    return apply_chart_theme(fig, height)
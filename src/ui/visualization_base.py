@@ -2,10 +2,29 @@
 可视化基础配置模块
 """
 
+import plotly.graph_objects as go
+
 from src.ui.styles import get_material_colors
 
 colors = get_material_colors()
 
+# 图中折线总点数（按降采样后的每条曲线点数上限 × 曲线数计）超过该值时自动改用 WebGL 渲染。
+# 实测（benchmarks/bench_render.py --headless）SVG 折线的首帧约在 50 万点时达到 1 s（51.8 万点 1085 ms）；
+# 无 GPU 时 WebGL 更慢，可在界面中强制选择 SVG 或 WebGL
+WEBGL_POINT_THRESHOLD = 500_000
+
+
+def scatter_type(n_points: int, webgl=None):
+    """按图中总点数选择 go.Scatter（SVG）或 go.Scattergl（WebGL）
+
+    Args:
+        n_points: 图中所有折线/散点轨迹的总点数
+        webgl: True/False 强制指定，None 表示按 WEBGL_POINT_THRESHOLD 自动选择
+    """
+    if webgl is None:
+        webgl = n_points > WEBGL_POINT_THRESHOLD
+    return go.Scattergl if webgl else go.Scatter
+
 
 def apply_chart_theme(fig, height: int = 600, enable_fullscreen: bool = True):
     """应用统一的图表主题样式
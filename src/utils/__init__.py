@@ -2,9 +2,17 @@
 工具模块
 """
 
-from .data_processing import load_data, generate_sample_data
-from .metrics import compute_metrics
-from .simulation import run_simulation
+from .data_processing import load_data, clean_load_data, QualityReport, generate_sample_data, LoadChunkReader
+from .metrics import compute_metrics, MetricsAccumulator, windowed_metrics
+from .preprocessing import preprocess, PreprocessResult
+from .simulation import run_simulation, simulate, simulate_chunks, simulate_csv, SimulationResult
+from .sweep import run_sweep, expand_grid
+from .events import segment_events, event_summary
+from .decision_log import DecisionRecorder, read_decisions
+from .jobs import SimulationJobManager, SimulationJob
 from .logging_config import setup_logger
 
-__all__ = ['load_data', 'generate_sample_data', 'compute_metrics', 'run_simulation', 'setup_logger']
+__all__ = ['load_data', 'clean_load_data', 'QualityReport', 'generate_sample_data', 'LoadChunkReader', 'preprocess', 'PreprocessResult', 'compute_metrics', 'MetricsAccumulator', 'windowed_metrics', 'run_simulation', 'simulate',
+           'simulate_chunks', 'simulate_csv',
+           'SimulationResult', 'run_sweep', 'expand_grid', 'segment_events', 'event_summary',
+           'DecisionRecorder', 'read_decisions', 'SimulationJobManager', 'SimulationJob', 'setup_logger']
@@ -0,0 +1,152 @@
+"""
+列式数据读写模块 - Parquet / Arrow IPC
+
+- 读取：本地文件使用内存映射，并只投影时间列和负载列
+- 写出：由历史数组零拷贝构建 Arrow 表（数值列直接引用 numpy 缓冲区）
+
+依赖 pyarrow（可选依赖，仅在使用本模块时导入）。
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.utils.data_processing import LOAD_COLUMNS, TIME_COLUMNS, detect_columns
+
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+ARROW_SUFFIXES = ('.arrow', '.feather', '.ipc')
+COLUMNAR_SUFFIXES = PARQUET_SUFFIXES + ARROW_SUFFIXES
+
+
+def _require_pyarrow():
+    """导入 pyarrow，未安装时给出明确提示"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow 支持需要安装 pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _suffix(source) -> str:
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    return Path(str(name)).suffix.lower()
+
+
+def is_columnar(source) -> bool:
+    """判断文件是否为 Parquet / Arrow 格式（按扩展名）"""
+    return _suffix(source) in COLUMNAR_SUFFIXES
+
+
+def _schema_names(source, fmt: str) -> List[str]:
+    pa = _require_pyarrow()
+    if fmt == 'parquet':
+        return pa.parquet.ParquetFile(source).schema_arrow.names
+    reader = pa.ipc.open_file(source)
+    return reader.schema.names
+
+
+def read_columnar(source, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    读取 Parquet / Arrow IPC 文件中的时间列和负载列
+
+    参数:
+        source: 文件路径或文件对象（如 Streamlit 上传文件）
+        columns: 要读取的列，默认自动识别时间列和负载列
+
+    返回:
+        仅包含所选列的 DataFrame
+    """
+    pa = _require_pyarrow()
+    fmt = 'parquet' if _suffix(source) in PARQUET_SUFFIXES else 'arrow'
+    is_path = isinstance(source, (str, os.PathLike))
+
+    if is_path and fmt == 'arrow':
+        # Arrow IPC：内存映射后按列取出，数值列不产生额外拷贝
+        with pa.memory_map(str(source), 'r') as mapped:
+            reader = pa.ipc.open_file(mapped)
+            columns = columns or _detect_or_raise(reader.schema.names)
+            table = reader.read_all().select(columns)
+            return table.to_pandas()
+
+    if not is_path:
+        # 上传文件：读入内存缓冲区后按相同方式解析
+        source = pa.BufferReader(source.getvalue() if hasattr(source, 'getvalue') else source.read())
+    if columns is None:
+        columns = _detect_or_raise(_schema_names(source, fmt))
+        if not is_path:
+            source.seek(0)
+
+    if fmt == 'parquet':
+        table = pa.parquet.read_table(source, columns=columns, memory_map=is_path)
+    else:
+        table = pa.ipc.open_file(source).read_all().select(columns)
+    return table.to_pandas()
+
+
+def _detect_or_raise(names: List[str]) -> List[str]:
+    time_col, load_col = detect_columns(names)
+    if time_col is None:
+        raise ValueError(f"未找到时间列。请确保文件包含以下列之一: {', '.join(TIME_COLUMNS)}")
+    if load_col is None:
+        raise ValueError(f"未找到负载列。请确保文件包含以下列之一: {', '.join(LOAD_COLUMNS)}")
+    return [time_col, load_col]
+
+
+def history_to_table(history: Dict[str, np.ndarray], columns: Optional[List[str]] = None):
+    """
+    由历史数组构建 Arrow 表
+
+    float64/int64 等数值列直接包装 numpy 缓冲区（零拷贝），布尔列需按位打包。
+    """
+    pa = _require_pyarrow()
+    columns = columns or list(history.keys())
+    arrays = [pa.array(np.ascontiguousarray(history[name])) for name in columns]
+    return pa.Table.from_arrays(arrays, names=columns)
+
+
+def write_history(
+    history: Dict[str, np.ndarray],
+    target: Union[str, os.PathLike, io.IOBase],
+    fmt: str = 'parquet',
+    columns: Optional[List[str]] = None,
+    compression: Optional[str] = None,
+):
+    """
+    导出仿真历史
+
+    参数:
+        history: 控制历史数据
+        target: 输出路径或可写文件对象
+        fmt: 'parquet' 或 'arrow'
+        columns: 要导出的列，默认全部
+        compression: 压缩算法 'zstd' / 'lz4'；默认 Parquet 使用 zstd，
+                     Arrow IPC 不压缩（保持可内存映射零拷贝读取）
+    """
+    pa = _require_pyarrow()
+    table = history_to_table(history, columns)
+    if fmt == 'parquet':
+        pa.parquet.write_table(table, target, compression=compression or 'zstd')
+    elif fmt == 'arrow':
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.ipc.new_file(target, table.schema, options=options) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+
+
+def history_to_bytes(
+    history: Dict[str, np.ndarray],
+    fmt: str = 'parquet',
+    columns: Optional[List[str]] = None,
+) -> bytes:
+    """导出仿真历史为字节串（用于下载按钮）"""
+    pa = _require_pyarrow()
+    sink = pa.BufferOutputStream()
+    write_history(history, sink, fmt=fmt, columns=columns)
+    return sink.getvalue().to_pybytes()
@@ -2,256 +2,442 @@
 数据处理模块 - 负载数据加载和生成
 """
 
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
 import pandas as pd
 import numpy as np
-import streamlit as st
 
+# 自动识别的时间列和负载列（按优先级排列）
+TIME_COLUMNS = ['UTC时间', 'UTC', 'time', '时间', '时间戳', 'timestamp', 'datetime', 'Time', 'DateTime']
+LOAD_COLUMNS = ['负载数据', 'load', '负载', 'power', 'Load', 'Power', '功率', 'kW']
 
-def load_data(uploaded_file) -> pd.DataFrame:
-    """加载负载数据，支持多种列名格式，并进行数据清洗（保留真实数据，仅处理异常值和缺失值）"""
-    try:
-        # 读取文件
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(uploaded_file)
-        else:
-            st.error("不支持的文件格式。请上传 CSV 或 Excel 文件。")
-            return None
-
-        # 显示原始列名供调试
-        st.info(f"检测到的列: {', '.join(df.columns.tolist())}")
-
-        # 智能识别时间列
-        time_col = None
-        possible_time_cols = ['UTC时间', 'UTC', 'time', '时间', '时间戳', 'timestamp', 'datetime', 'Time', 'DateTime']
-        for col in possible_time_cols:
-            if col in df.columns:
-                time_col = col
-                break
-
-        if time_col is None:
-            st.error(f"未找到时间列。请确保文件包含以下列之一: {', '.join(possible_time_cols)}")
-            return None
-
-        # 智能识别负载列
-        load_col = None
-        possible_load_cols = ['负载数据', 'load', '负载', 'power', 'Load', 'Power', '功率', 'kW']
-        for col in possible_load_cols:
-            if col in df.columns:
-                load_col = col
-                break
-
-        if load_col is None:
-            st.error(f"未找到负载列。请确保文件包含以下列之一: {', '.join(possible_load_cols)}")
-            return None
-
-        # 创建标准化的数据框
-        result_df = pd.DataFrame()
-
-        # 处理时间列
-        try:
-            # 尝试解析时间字符串
-            if df[time_col].dtype == 'object':
-                result_df['time_raw'] = pd.to_datetime(df[time_col], errors='coerce')
-            else:
-                result_df['time_raw'] = df[time_col]
-
-            # 移除时间为空的行
-            if result_df['time_raw'].isna().any():
-                na_count = result_df['time_raw'].isna().sum()
-                st.warning(f"⚠️ 时间列中有 {na_count} 个无效值，已移除")
-                result_df = result_df.dropna(subset=['time_raw'])
-
-            # 转换为秒数（从第一个时间点开始）
-            first_time = result_df['time_raw'].iloc[0]
-            result_df['time'] = (result_df['time_raw'] - first_time).dt.total_seconds()
-
-        except Exception as e:
-            st.error(f"时间列解析失败: {str(e)}")
-            # 如果解析失败，使用行索引作为时间
-            st.warning("使用行索引作为时间序列")
-            result_df['time'] = np.arange(len(df))
-
-        # 处理负载列 - 数据清洗
+# 负载清洗阈值 (kW)：超过上限或为负的值视为异常
+LOAD_UPPER_LIMIT = 10000
+
+
+def detect_columns(columns: List[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    识别时间列和负载列
+
+    返回:
+        (time_col, load_col)，未找到时对应项为 None
+    """
+    time_col = next((col for col in TIME_COLUMNS if col in columns), None)
+    load_col = next((col for col in LOAD_COLUMNS if col in columns), None)
+    return time_col, load_col
+
+
+class LoadChunkReader:
+    """
+    CSV 负载数据的分块流式读取器
+
+    按块读取 CSV，并逐块执行与 load_data 相同的列识别、时间转换和清洗：
+    - 时间无效的行被移除，时间转换为相对首个有效时间点的秒数
+    - 负载 > 10000 或 < 0 视为缺失值
+    - 前向填充跨块延续（使用上一块最后的有效值）
+    - 文件开头的缺失值用首个有效值回填，整列无有效值时填 0
+    - 最终裁剪到 [0, 10000]
+
+    内存占用与块大小成正比，与文件大小无关。迭代产出 (time, load) 数组块，
+    可直接传给 simulate_chunks() 逐块驱动控制器。
+    """
+
+    def __init__(self, path: "os.PathLike", chunksize: int = 200_000):
+        """
+        初始化读取器
+
+        参数:
+            path: CSV 文件路径
+            chunksize: 每块行数
+        """
+        self.path = path
+        self.chunksize = chunksize
+
+        header = pd.read_csv(path, nrows=0).columns.tolist()
+        self.time_col, self.load_col = detect_columns(header)
+        if self.time_col is None:
+            raise ValueError(f"未找到时间列。请确保文件包含以下列之一: {', '.join(TIME_COLUMNS)}")
+        if self.load_col is None:
+            raise ValueError(f"未找到负载列。请确保文件包含以下列之一: {', '.join(LOAD_COLUMNS)}")
+
+        # 清洗统计（迭代过程中累计）
+        self.n_rows = 0  # 读取的原始行数
+        self.n_invalid_time = 0  # 时间无效被移除的行数
+        self.n_na = 0  # 原始缺失值
+        self.n_negative = 0  # 负值
+        self.n_oversized = 0  # 异常大值
+        self.n_filled = 0  # 被填充的值
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        first_time = None
+        last_valid = np.nan  # 跨块延续的前向填充值
+        leading: List[Tuple[np.ndarray, np.ndarray]] = []  # 首个有效值出现前的块
+
+        reader = pd.read_csv(
+            self.path,
+            usecols=[self.time_col, self.load_col],
+            chunksize=self.chunksize,
+        )
+        for chunk in reader:
+            self.n_rows += len(chunk)
+
+            # 时间转换
+            times, _ = parse_time(chunk[self.time_col])
+            valid = ~np.isnat(times) if np.issubdtype(times.dtype, np.datetime64) else ~np.isnan(times)
+            self.n_invalid_time += int((~valid).sum())
+            if not valid.any():
+                continue
+            times = times[valid]
+            if first_time is None:
+                first_time = times[0]
+            time = relative_seconds(times, first_time)
+
+            # 负载清洗
+            load = pd.to_numeric(chunk[self.load_col], errors='coerce').to_numpy(dtype=np.float64)[valid]
+            na = np.isnan(load)
+            negative = load < 0
+            oversized = load > LOAD_UPPER_LIMIT
+            self.n_na += int(na.sum())
+            self.n_negative += int(negative.sum())
+            self.n_oversized += int(oversized.sum())
+            load[negative | oversized] = np.nan
+
+            missing = np.isnan(load)
+            self.n_filled += int(missing.sum())
+            load = _ffill(load, last_valid)
+
+            if np.isnan(load[-1]):
+                # 尚未出现任何有效值，暂存等待回填
+                leading.append((time, load))
+                continue
+
+            if np.isnan(last_valid):
+                # 首个有效值出现：回填之前暂存的块和本块开头
+                first_valid = load[~np.isnan(load)][0]
+                for lead_time, lead_load in leading:
+                    yield lead_time, np.full_like(lead_load, first_valid)
+                leading.clear()
+                load = np.where(np.isnan(load), first_valid, load)
+            last_valid = load[-1]
+
+            yield time, np.clip(load, 0, LOAD_UPPER_LIMIT)
+
+        # 整个文件都没有有效负载值
+        for lead_time, lead_load in leading:
+            yield lead_time, np.zeros_like(lead_load)
+
+
+def _ffill(values: np.ndarray, carry: float) -> np.ndarray:
+    """
+    向量化前向填充
+
+    参数:
+        values: 含 NaN 的数组
+        carry: 上一块最后的有效值（块开头的 NaN 用它填充，可为 NaN）
+    """
+    n = len(values)
+    if n == 0:
+        return values
+    extended = np.concatenate(([carry], values))
+    idx = np.where(~np.isnan(extended), np.arange(n + 1), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return extended[idx][1:]
+
+
+@dataclass
+class QualityReport:
+    """负载数据质量报告（由 clean_load_data 生成，界面只负责展示）"""
+    columns: List[str]  # 文件中的全部列名
+    time_col: str  # 识别到的时间列
+    load_col: str  # 识别到的负载列
+    time_format: str  # 时间解析方式: seconds / epoch_ms / datetime / iso8601 / <strftime 格式> / inferred / index
+    n_rows: int  # 原始行数
+    n_invalid_time: int  # 时间无效被移除的行数
+    n_na: int  # 负载缺失值
+    n_negative: int  # 负值
+    n_oversized: int  # 异常大值 (> LOAD_UPPER_LIMIT)
+    n_filled: int  # 被前向/后向填充的值
+    n_zero_filled: int  # 整列无有效值时用 0 填充的值
+    time_span: float  # 时间范围 (s)
+    raw_stats: Dict[str, float] = field(default_factory=dict)  # 原始负载统计（忽略缺失值）
+    clean_stats: Dict[str, float] = field(default_factory=dict)  # 清洗后负载统计
+    raw_preview: List[float] = field(default_factory=list)  # 前 10 个原始负载值
+
+    @property
+    def n_clean(self) -> int:
+        """清洗后保留的行数"""
+        return self.n_rows - self.n_invalid_time
+
+    @property
+    def has_issues(self) -> bool:
+        """是否存在缺失值、负值或异常大值"""
+        return self.n_na > 0 or self.n_negative > 0 or self.n_oversized > 0
+
+
+# 字符串时间列依次尝试的显式格式（比逐行推断格式快一个数量级以上）
+TIME_FORMATS = ['ISO8601', '%Y/%m/%d %H:%M:%S', '%Y/%m/%d %H:%M:%S.%f']
+
+# 确定字符串时间格式时检查的开头行数
+TIME_SAMPLE_SIZE = 1000
+
+# 大于该值的数值时间视为毫秒级 Unix 时间戳（1e12 ms ≈ 2001 年，按秒则超过 3 万年）
+EPOCH_MS_THRESHOLD = 1e12
+
+
+def parse_time(values) -> Tuple[np.ndarray, str]:
+    """
+    解析时间列
+
+    数值列按秒处理（毫秒级时间戳自动换算）；字符串列先用开头的样本尝试
+    Unix 时间戳和 TIME_FORMATS 中的显式格式，全部不匹配时才回退到 pandas 推断。
+
+    参数:
+        values: 时间列（Series 或数组）
+
+    返回:
+        (时间数组, 解析方式)：数值时间为 float64 秒（无效为 NaN），
+        日期时间为 datetime64[ns]（无效为 NaT）
+    """
+    series = pd.Series(values) if not isinstance(values, pd.Series) else values
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype='datetime64[ns]'), 'datetime'
+
+    if pd.api.types.is_numeric_dtype(series):
+        return _numeric_time(series.to_numpy(dtype=np.float64))
+
+    # 字符串列：用开头的样本确定格式，再按该格式解析整列（个别无法解析的值记为 NaT）
+    sample = series.head(TIME_SAMPLE_SIZE).dropna()
+    if len(sample) == 0:
+        return np.full(len(series), np.nan), 'seconds'
+
+    if pd.to_numeric(sample, errors='coerce').notna().all():
+        # 纯数字字符串按时间戳处理
+        return _numeric_time(pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64))
+
+    for fmt in TIME_FORMATS:
         try:
-            result_df['load_raw'] = pd.to_numeric(df[load_col], errors='coerce')
-
-            # 统计原始数据问题
-            original_count = len(result_df)
-            na_count = result_df['load_raw'].isna().sum()
-            negative_count = (result_df['load_raw'] < 0).sum()
-            abnormal_large = (result_df['load_raw'] > 10000).sum()
-
-            # 显示数据质量报告
-            if na_count > 0 or negative_count > 0 or abnormal_large > 0:
-                st.warning("📊 数据质量报告：")
-                if na_count > 0:
-                    st.warning(f"  • 缺失值: {na_count} 个 ({na_count/original_count*100:.1f}%)")
-                if negative_count > 0:
-                    st.warning(f"  • 负值: {negative_count} 个 ({negative_count/original_count*100:.1f}%)")
-                if abnormal_large > 0:
-                    st.warning(f"  • 异常大值(>10000): {abnormal_large} 个 ({abnormal_large/original_count*100:.1f}%)")
-
-            # 数据清洗步骤
-            st.info("🔧 正在进行数据清洗...")
-
-            # 1. 处理异常大的值 (> 10000) - 标记为 NaN
-            result_df.loc[result_df['load_raw'] > 10000, 'load_raw'] = np.nan
-
-            # 2. 处理负值 - 标记为 NaN
-            result_df.loc[result_df['load_raw'] < 0, 'load_raw'] = np.nan
-
-            # 3. 前向填充处理缺失值
-            result_df['load'] = result_df['load_raw'].fillna(method='ffill')
-
-            # 4. 如果开头有缺失值，使用后向填充
-            result_df['load'] = result_df['load'].fillna(method='bfill')
-
-            # 5. 如果仍有缺失值，用0填充
-            if result_df['load'].isna().any():
-                st.warning("部分数据无法填充，使用0替代")
-                result_df['load'] = result_df['load'].fillna(0)
-
-            # 6. 最终检查：确保负载值在合理范围内
-            result_df['load'] = result_df['load'].clip(lower=0, upper=10000)
-
-            # 显示清洗结果
-            cleaned_count = len(result_df)
-            if original_count != cleaned_count:
-                st.success(f"✓ 数据清洗完成: {original_count} → {cleaned_count} 条数据")
-            else:
-                st.success(f"✓ 数据清洗完成: 保留 {cleaned_count} 条数据")
-
-        except Exception as e:
-            st.error(f"负载列解析失败: {str(e)}")
-            import traceback
-            st.error(f"详细错误: {traceback.format_exc()}")
-            return None
-
-        # 显示数据统计信息
-        st.success(f"✅ 成功加载并处理 {len(result_df)} 条数据")
-
-        # 数据统计
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("时间范围", f"{result_df['time'].max()/3600:.2f} 小时")
-            st.metric("数据点数", f"{len(result_df):,}")
-        with col2:
-            st.metric("负载均值", f"{result_df['load'].mean():.2f} kW")
-            st.metric("负载范围", f"{result_df['load'].min():.1f} ~ {result_df['load'].max():.1f} kW")
-
-        # 显示处理前后对比
-        with st.expander("查看数据处理详情", expanded=False):
-            comparison_df = pd.DataFrame({
-                '时间(s)': result_df['time'].head(10),
-                '原始负载': result_df['load_raw'].head(10),
-                '处理后负载': result_df['load'].head(10)
-            })
-            st.dataframe(comparison_df, use_container_width=True)
-
-            # 显示数据质量指标
-            st.markdown("**数据质量指标:**")
-            quality_metrics = pd.DataFrame({
-                '指标': ['最小值', '最大值', '平均值', '标准差', '中位数'],
-                '原始数据': [
-                    f"{result_df['load_raw'].min():.2f}",
-                    f"{result_df['load_raw'].max():.2f}",
-                    f"{result_df['load_raw'].mean():.2f}",
-                    f"{result_df['load_raw'].std():.2f}",
-                    f"{result_df['load_raw'].median():.2f}"
-                ],
-                '处理后': [
-                    f"{result_df['load'].min():.2f}",
-                    f"{result_df['load'].max():.2f}",
-                    f"{result_df['load'].mean():.2f}",
-                    f"{result_df['load'].std():.2f}",
-                    f"{result_df['load'].median():.2f}"
-                ]
-            })
-            st.dataframe(quality_metrics, use_container_width=True)
-
-        return result_df[['time', 'load']]
-
-    except Exception as e:
-        st.error(f"加载数据时出错: {str(e)}")
-        import traceback
-        st.error(f"详细错误: {traceback.format_exc()}")
-        return None
-
-
-def generate_sample_data(duration_hours: float = 10, interval_sec: float = 1.0) -> pd.DataFrame:
+            pd.to_datetime(sample, format=fmt, errors='raise')
+        except (ValueError, TypeError):
+            continue
+        parsed = pd.to_datetime(series, format=fmt, errors='coerce')
+        return parsed.to_numpy(dtype='datetime64[ns]'), fmt.lower() if fmt == 'ISO8601' else fmt
+
+    parsed = pd.to_datetime(series, errors='coerce')
+    return parsed.to_numpy(dtype='datetime64[ns]'), 'inferred'
+
+
+def _numeric_time(values: np.ndarray) -> Tuple[np.ndarray, str]:
+    finite = values[np.isfinite(values)]
+    if len(finite) > 0 and abs(finite[0]) >= EPOCH_MS_THRESHOLD:
+        return values / 1000.0, 'epoch_ms'
+    return values, 'seconds'
+
+
+def relative_seconds(times: np.ndarray, origin) -> np.ndarray:
+    """将 parse_time 的结果转换为相对 origin 的秒数"""
+    if np.issubdtype(times.dtype, np.datetime64):
+        return (times - origin).astype('timedelta64[ns]').astype(np.int64) / 1e9
+    return times - float(origin)
+
+
+def _load_stats(values: np.ndarray) -> Dict[str, float]:
+    """负载统计（忽略 NaN）"""
+    finite = values[~np.isnan(values)]
+    if len(finite) == 0:
+        return {'min': np.nan, 'max': np.nan, 'mean': np.nan, 'std': np.nan, 'median': np.nan}
+    return {
+        'min': float(finite.min()),
+        'max': float(finite.max()),
+        'mean': float(finite.mean()),
+        'std': float(finite.std(ddof=1)) if len(finite) > 1 else np.nan,
+        'median': float(np.median(finite)),
+    }
+
+
+def clean_load_data(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, QualityReport]:
+    """
+    识别时间列和负载列并清洗数据（不依赖界面，可在脚本和工作进程中使用）
+
+    清洗规则：
+    - 时间无效的行被移除，时间转换为相对首个有效时间点的秒数
+    - 负载 > 10000 或 < 0 视为缺失值
+    - 缺失值前向填充，开头的缺失值用首个有效值回填，整列无有效值时填 0
+    - 最终裁剪到 [0, 10000]
+
+    参数:
+        df: 原始数据表
+
+    返回:
+        (time, load, report)：清洗后的时间 (s)、负载 (kW) 数组和质量报告
+
+    异常:
+        ValueError: 未找到时间列或负载列
+    """
+    columns = [str(c) for c in df.columns]
+    time_col, load_col = detect_columns(df.columns.tolist())
+    if time_col is None:
+        raise ValueError(f"未找到时间列。请确保文件包含以下列之一: {', '.join(TIME_COLUMNS)}")
+    if load_col is None:
+        raise ValueError(f"未找到负载列。请确保文件包含以下列之一: {', '.join(LOAD_COLUMNS)}")
+
+    n_rows = len(df)
+    times, time_format = parse_time(df[time_col])
+    valid_time = ~np.isnat(times) if np.issubdtype(times.dtype, np.datetime64) else ~np.isnan(times)
+    if valid_time.any():
+        times = times[valid_time]
+        time = relative_seconds(times, times[0])
+    else:
+        # 时间列无法解析，使用行索引作为时间序列
+        valid_time = np.ones(n_rows, dtype=bool)
+        time = np.arange(n_rows, dtype=np.float64)
+        time_format = 'index'
+
+    raw = pd.to_numeric(df[load_col], errors='coerce').to_numpy(dtype=np.float64)[valid_time]
+
+    # 一次遍历得到各类异常掩码
+    na = np.isnan(raw)
+    negative = raw < 0
+    oversized = raw > LOAD_UPPER_LIMIT
+    invalid = na | negative | oversized
+
+    load = np.where(invalid, np.nan, raw)
+    load = _ffill(load, np.nan)
+    n_zero_filled = 0
+    if len(load) > 0 and np.isnan(load[0]):
+        remaining = ~np.isnan(load)
+        if remaining.any():
+            load[:np.argmax(remaining)] = load[remaining][0]
+        else:
+            n_zero_filled = len(load)
+            load[:] = 0.0
+    load = np.clip(load, 0, LOAD_UPPER_LIMIT)
+
+    report = QualityReport(
+        columns=columns,
+        time_col=time_col,
+        load_col=load_col,
+        time_format=time_format,
+        n_rows=n_rows,
+        n_invalid_time=int(n_rows - valid_time.sum()),
+        n_na=int(na.sum()),
+        n_negative=int(negative.sum()),
+        n_oversized=int(oversized.sum()),
+        n_filled=int(invalid.sum()) - n_zero_filled,
+        n_zero_filled=n_zero_filled,
+        time_span=float(time.max()) if len(time) else 0.0,
+        raw_stats=_load_stats(raw),
+        clean_stats=_load_stats(load),
+        raw_preview=raw[:10].tolist(),
+    )
+    return time, load, report
+
+
+def read_load_file(source) -> pd.DataFrame:
+    """
+    按扩展名读取负载数据文件
+
+    参数:
+        source: 文件路径或文件对象（如 Streamlit 上传文件）
+
+    异常:
+        ValueError: 不支持的文件格式
+    """
+    name = str(source) if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    if name.endswith('.csv'):
+        return pd.read_csv(source)
+    if name.endswith(('.xlsx', '.xls')):
+        return pd.read_excel(source)
+
+    from src.utils.columnar_io import is_columnar, read_columnar
+    if not is_columnar(source):
+        raise ValueError("不支持的文件格式。请上传 CSV、Excel、Parquet 或 Arrow 文件。")
+    return read_columnar(source)
+
+
+def load_data(source) -> Tuple[pd.DataFrame, QualityReport]:
+    """
+    加载并清洗负载数据，支持多种列名格式（保留真实数据，仅处理异常值和缺失值）
+
+    参数:
+        source: 文件路径或文件对象
+
+    返回:
+        (df, report)：包含 time/load 两列的数据表和质量报告
+
+    异常:
+        ValueError: 文件格式不支持或缺少时间列/负载列
+    """
+    time, load, report = clean_load_data(read_load_file(source))
+    return pd.DataFrame({'time': time, 'load': load}), report
+
+
+# 日负载曲线关键点（小时, kW），分段线性插值；12:00 处为午休断崖
+_PROFILE_HOURS = np.array([8.0, 8.5, 10.0, 11.5, np.nextafter(12.0, 0.0), 12.0, 12.5, 13.5, 15.0, 16.5, 17.5, 18.0])
+_PROFILE_LOAD = np.array([15.0, 45.0, 96.0, 88.0, 58.0, 28.0, 28.0, 85.0, 96.0, 66.0, 19.0, 8.0])
+
+# 设备启停冲击类型：功率 (kW)、持续时间 (s)、每秒触发概率
+_IMPULSE_TYPES = [
+    {'power': 7.5, 'duration': 4, 'freq': 0.015},
+    {'power': 12.0, 'duration': 5, 'freq': 0.012},
+    {'power': 15.5, 'duration': 6, 'freq': 0.008},
+    {'power': 9.0, 'duration': 3, 'freq': 0.010},
+]
+
+
+def generate_sample_data(
+    duration_hours: float = 10,
+    interval_sec: float = 1.0,
+    days: int = 1,
+    seed=None,
+    peak_scale: float = 1.0,
+    impulse_rate_scale: float = 1.0,
+    noise_std: float = 1.5,
+) -> pd.DataFrame:
     """
-    生成工厂负载数据（8:00-18:00，10小时）
+    生成工厂负载数据（每天 8:00-18:00 的工作时段映射到 duration_hours）
 
     特征：
     - 宏观：双峰结构（上午10:00和下午14:30高峰）+ 午休低谷（12:00-12:30）
     - 微观：秒级设备启停冲击（+7~16kW，持续3-7秒）
+
+    参数:
+        duration_hours: 每天的数据时长 (小时)
+        interval_sec: 采样间隔 (s)，支持亚秒级
+        days: 天数，多天数据的时间轴连续
+        seed: 随机种子（int、SeedSequence 或 numpy.random.Generator），相同种子输出相同
+        peak_scale: 基准负载曲线缩放系数（不同规模的站点）
+        impulse_rate_scale: 设备冲击触发频率缩放系数
+        noise_std: 随机噪声标准差 (kW)
+
+    全部计算为数组运算（日曲线分段线性插值 + 冲击事件批量放置），
+    10 小时 1 Hz 数据约 10 ms，24 小时 10 Hz（86.4 万点）约 0.1 s。
     """
-    num_points = int(duration_hours * 3600 / interval_sec)
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+    points_per_day = int(duration_hours * 3600 / interval_sec)
+    num_points = points_per_day * days
     time_array = np.arange(num_points) * interval_sec
 
     # === 宏观日规律（基准负载曲线） ===
-    t_normalized = time_array / (duration_hours * 3600)
-
-    base_load = np.zeros(num_points)
-    for i, t in enumerate(t_normalized):
-        hour = 8 + t * 10  # 映射到实际小时 8-18
-
-        if hour < 8.5:  # 8:00-8:30 开工爬升
-            base_load[i] = 15 + (45 - 15) * (hour - 8) / 0.5
-        elif hour < 10:  # 8:30-10:00 快速爬升至高峰
-            base_load[i] = 45 + (96 - 45) * (hour - 8.5) / 1.5
-        elif hour < 11.5:  # 10:00-11:30 高位运行
-            base_load[i] = 96 - 8 * (hour - 10) / 1.5
-        elif hour < 12.5:  # 11:30-12:30 午休低谷
-            base_load[i] = 88 - 60 * (hour - 11.5) if hour < 12 else 28
-        elif hour < 13.5:  # 12:30-13:30 复工爬升
-            base_load[i] = 28 + (85 - 28) * (hour - 12.5)
-        elif hour < 15:  # 13:30-15:00 下午高峰
-            base_load[i] = 85 + (96 - 85) * (hour - 13.5) / 1.5
-        elif hour < 16.5:  # 15:00-16:30 缓慢下降
-            base_load[i] = 96 - 30 * (hour - 15) / 1.5
-        elif hour < 17.5:  # 16:30-17:30 快速关停
-            base_load[i] = 66 - 47 * (hour - 16.5)
-        else:  # 17:30-18:00 值班负载
-            base_load[i] = 19 - 11 * (hour - 17.5) / 0.5
+    t_in_day = (np.arange(num_points) % points_per_day) * interval_sec
+    hour = 8 + t_in_day / (duration_hours * 3600) * 10  # 映射到实际小时 8-18
+    base_load = np.interp(hour, _PROFILE_HOURS, _PROFILE_LOAD) * peak_scale
 
     # === 微观秒波动（设备启停冲击） ===
     equipment_impulses = np.zeros(num_points)
-
-    impulse_types = [
-        {'power': 7.5, 'duration': 4, 'freq': 0.015},
-        {'power': 12.0, 'duration': 5, 'freq': 0.012},
-        {'power': 15.5, 'duration': 6, 'freq': 0.008},
-        {'power': 9.0, 'duration': 3, 'freq': 0.010},
-    ]
-
-    for impulse_type in impulse_types:
-        i = 0
-        while i < num_points:
-            if np.random.random() < impulse_type['freq']:
-                duration = int(impulse_type['duration'] * (1 + np.random.uniform(-0.3, 0.3)))
-                power = impulse_type['power'] * (1 + np.random.uniform(-0.2, 0.2))
-
-                for j in range(duration):
-                    if i + j >= num_points:
-                        break
-                    if j == 0:
-                        equipment_impulses[i + j] += power * 0.6
-                    elif j == 1:
-                        equipment_impulses[i + j] += power * 1.0
-                    elif j < duration - 1:
-                        equipment_impulses[i + j] += power * 0.9
-                    else:
-                        equipment_impulses[i + j] += power * 0.5
-
-                i += duration + np.random.randint(3, 10)
-            else:
-                i += 1
+    for impulse_type in _IMPULSE_TYPES:
+        equipment_impulses += _place_impulses(
+            rng, num_points, interval_sec,
+            power=impulse_type['power'],
+            duration=impulse_type['duration'],
+            freq=impulse_type['freq'] * impulse_rate_scale,
+        )
 
     # === 小幅随机噪声 ===
-    small_noise = np.random.normal(0, 1.5, num_points)
+    small_noise = rng.normal(0, noise_std, num_points)
 
     # === 合成最终负载 ===
     load_array = base_load + equipment_impulses + small_noise
@@ -263,3 +449,58 @@ def generate_sample_data(duration_hours: float = 10, interval_sec: float = 1.0)
     })
 
     return df
+
+
+def _place_impulses(
+    rng: np.random.Generator,
+    num_points: int,
+    interval_sec: float,
+    power: float,
+    duration: float,
+    freq: float,
+) -> np.ndarray:
+    """
+    向量化放置一类设备冲击
+
+    事件为更新过程：空闲期间每个采样点以概率 p 触发（等待点数服从几何分布），
+    触发后持续 duration 秒，结束后间隔 3-9 秒才可能再次触发。
+    波形为 0.6 → 1.0 → 0.9 … 0.9 → 0.5 倍额定功率。
+    """
+    p = min(1.0, freq * interval_sec)
+    if num_points == 0 or p <= 0:
+        return np.zeros(num_points)
+
+    # 分批抽取事件，直至覆盖全部采样点
+    mean_cycle = 1 / p + (duration + 6) / interval_sec
+    starts, lengths, powers = [], [], []
+    position = 0
+    while position < num_points:
+        k = int((num_points - position) / mean_cycle * 1.2) + 16
+        wait = rng.geometric(p, k) - 1
+        length = np.maximum(1, (duration * (1 + rng.uniform(-0.3, 0.3, k)) / interval_sec).astype(int))
+        gap = np.maximum(1, np.round(rng.integers(3, 10, k) / interval_sec).astype(int))
+        amplitude = power * (1 + rng.uniform(-0.2, 0.2, k))
+
+        event_start = position + np.cumsum(wait) + np.concatenate(([0], np.cumsum(length + gap)[:-1]))
+        position = int(event_start[-1] + length[-1] + gap[-1])
+
+        keep = event_start < num_points
+        starts.append(event_start[keep])
+        lengths.append(length[keep])
+        powers.append(amplitude[keep])
+
+    starts = np.concatenate(starts)
+    lengths = np.concatenate(lengths)
+    powers = np.concatenate(powers)
+
+    # 展开为逐点索引：每个事件内的偏移量 0..length-1
+    event_id = np.repeat(np.arange(len(starts)), lengths)
+    offset = np.arange(len(event_id)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    event_len = lengths[event_id]
+    shape = np.where(offset == 0, 0.6,
+                     np.where(offset == 1, 1.0,
+                              np.where(offset < event_len - 1, 0.9, 0.5)))
+
+    index = starts[event_id] + offset
+    valid = index < num_points
+    return np.bincount(index[valid], weights=(powers[event_id] * shape)[valid], minlength=num_points)
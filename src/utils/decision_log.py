@@ -0,0 +1,152 @@
+"""
+决策记录模块 - 每步控制决策的定长二进制记录
+
+DecisionRecorder 可通过 controller.attach() 挂到控制器上，每步把
+time / load / L_med / L_lb / U_A / U_B / U / P_cmd / flags / binding 打包为
+72 字节的定长记录写入内存缓冲区，攒满一批后整块追加到文件（每步约 1 µs，
+100 Hz 下开销可忽略）。read_decisions() 以内存映射方式打开文件，
+按时间二分查找后直接返回 NumPy 结构化数组，无需解析文本日志。
+
+文件格式：16 字节文件头（魔数、版本、记录长度）+ 连续的小端定长记录。
+进程中断时末尾不完整的记录会被读取端忽略。
+"""
+
+import struct
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.core.v5_anti_backflow.params import ControlOutput, BINDING_NAMES
+
+MAGIC = b"V5DECREC"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sII")
+
+# 8 个 float64 + flags + binding，补齐到 8 字节对齐
+RECORD = struct.Struct("<8dBB6x")
+RECORD_FIELDS = ['time', 'load', 'L_med', 'L_lb', 'U_A', 'U_B', 'U', 'P_cmd', 'flags', 'binding']
+RECORD_DTYPE = np.dtype({
+    'names': RECORD_FIELDS,
+    'formats': ['<f8'] * 8 + ['u1', 'u1'],
+    'offsets': [0, 8, 16, 24, 32, 40, 48, 56, 64, 65],
+    'itemsize': RECORD.size,
+})
+
+# 每批缓冲的记录数（72 字节 × 4096 ≈ 288 KB，100 Hz 下约 41 s 写一次盘）
+DEFAULT_BATCH_SIZE = 4096
+
+
+class DecisionRecorder:
+    """
+    控制决策记录器
+
+    用法:
+        with DecisionRecorder("output/decisions.bin") as recorder:
+            controller.attach(recorder)
+            ...
+    """
+
+    def __init__(self, path, batch_size: int = DEFAULT_BATCH_SIZE, append: bool = False):
+        """
+        参数:
+            path: 记录文件路径
+            batch_size: 缓冲的记录数，攒满后整块写盘
+            append: 文件已存在时追加（需格式一致），否则覆盖
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self._buffer = bytearray(batch_size * RECORD.size)
+        self._pack_into = RECORD.pack_into
+        self._offset = 0
+        self.n_records = 0
+
+        if append and self.path.exists() and self.path.stat().st_size >= HEADER.size:
+            _check_header(self.path)
+            self._file = open(self.path, "r+b")
+            # 丢弃上次中断时残留的不完整记录
+            n_existing = (self.path.stat().st_size - HEADER.size) // RECORD.size
+            self._file.truncate(HEADER.size + n_existing * RECORD.size)
+            self._file.seek(0, 2)
+            self.n_records = n_existing
+        else:
+            self._file = open(self.path, "wb")
+            self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size))
+
+    def __call__(self, time: float, load: float, output: ControlOutput, P_pv_available: float = 0.0):
+        """记录一步（与 controller.attach 的观察者签名一致）"""
+        self._pack_into(
+            self._buffer, self._offset,
+            time, load, output.L_med, output.L_lb, output.U_A, output.U_B, output.U, output.P_cmd,
+            output.flags, output.binding,
+        )
+        self._offset += RECORD.size
+        self.n_records += 1
+        if self._offset == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        """把缓冲区中的记录写入文件"""
+        if self._offset:
+            self._file.write(memoryview(self._buffer)[:self._offset])
+            self._offset = 0
+        self._file.flush()
+
+    def close(self):
+        """写出剩余记录并关闭文件"""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(path: Path):
+    """校验文件头，格式不符时抛出 ValueError"""
+    with open(path, "rb") as f:
+        magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"不是决策记录文件: {path}")
+    if version != FORMAT_VERSION or record_size != RECORD.size:
+        raise ValueError(f"决策记录格式不兼容: 版本 {version}，记录长度 {record_size}")
+
+
+def read_decisions(path, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+    """
+    读取时间范围 [start, end] 内的决策记录
+
+    文件以内存映射方式打开，按时间列二分查找边界（要求记录按时间递增写入），
+    只有所选范围的页面会被读入内存。
+
+    参数:
+        path: 记录文件路径
+        start: 起始时间 (s)，None 表示从头开始
+        end: 结束时间 (s，含)，None 表示到末尾
+
+    返回:
+        结构化数组，字段见 RECORD_FIELDS（只读内存映射视图）
+    """
+    path = Path(path)
+    _check_header(path)
+    n = (path.stat().st_size - HEADER.size) // RECORD.size
+    if n == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size, shape=(n,))
+    times = records['time']
+    lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+    hi = n if end is None else int(np.searchsorted(times, end, side="right"))
+    return records[lo:hi]
+
+
+def decisions_to_frame(records: np.ndarray) -> pd.DataFrame:
+    """把决策记录转换为 DataFrame，附带约束名称列 binding_name"""
+    frame = pd.DataFrame({name: np.asarray(records[name]) for name in RECORD_FIELDS})
+    frame['binding_name'] = frame['binding'].map(BINDING_NAMES)
+    return frame
@@ -0,0 +1,122 @@
+"""
+事件分段模块 - 逆流事件和安全旁路事件提取
+
+对逐点掩码（P_cmd > load、safety_bypass）做游程编码，把连续为真的采样点
+合并为离散事件，输出与电网调度报表一致的事件表：起止时间、持续时间、
+峰值功率和逆流电量。全部为数组运算，不逐点循环。
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+EVENT_COLUMNS = ['start_time', 'end_time', 'duration_s', 'n_samples', 'peak_kw', 'energy_kwh']
+
+
+def run_lengths(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    游程编码：找出掩码中连续为真的区间
+
+    返回:
+        (starts, stops)：每个区间的起始索引和结束索引（不含）
+    """
+    mask = np.asarray(mask, dtype=bool)
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    return starts, stops
+
+
+def _hold_intervals(time: np.ndarray) -> np.ndarray:
+    """每个采样点的保持时长（到下一采样点的间隔，最后一点沿用前一间隔）"""
+    if len(time) < 2:
+        return np.zeros(len(time))
+    dt = np.diff(time)
+    return np.append(dt, dt[-1])
+
+
+def _event_table(
+    time: np.ndarray,
+    hold: np.ndarray,
+    starts: np.ndarray,
+    stops: np.ndarray,
+    power: np.ndarray,
+) -> pd.DataFrame:
+    """按事件区间归约功率数组，生成事件表"""
+    if len(starts) == 0:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    # reduceat 的索引交替为 [起点, 终点, 起点, 终点, ...]，偶数位的结果即各事件区间内的归约值
+    bounds = np.empty(2 * len(starts), dtype=np.int64)
+    bounds[0::2] = starts
+    bounds[1::2] = stops
+    if bounds[-1] == len(time):
+        bounds = bounds[:-1]
+
+    duration = np.add.reduceat(hold, bounds)[0::2]
+    energy = np.add.reduceat(power * hold, bounds)[0::2] / 3600
+    peak = np.maximum.reduceat(power, bounds)[0::2]
+    start_time = time[starts]
+    return pd.DataFrame({
+        'start_time': start_time,
+        'end_time': start_time + duration,
+        'duration_s': duration,
+        'n_samples': stops - starts,
+        'peak_kw': peak,
+        'energy_kwh': energy,
+    })
+
+
+def segment_events(history: dict) -> Dict[str, pd.DataFrame]:
+    """
+    一次遍历历史数据，提取逆流事件和安全旁路事件
+
+    事件时长按采样点保持时间计算：事件从首个采样点开始，到事件后第一个
+    正常采样点结束；逆流电量为逆流功率 max(P_cmd - load, 0) 对保持时间的积分。
+
+    参数:
+        history: 控制历史数据（需要 time / load / P_cmd / safety_bypass）
+
+    返回:
+        {'backflow': 逆流事件表, 'bypass': 安全旁路事件表}，列见 EVENT_COLUMNS；
+        旁路事件的 peak_kw / energy_kwh 为事件期间的逆流功率峰值和逆流电量
+    """
+    time = np.asarray(history['time'], dtype=np.float64)
+    load = np.asarray(history['load'], dtype=np.float64)
+    P_cmd = np.asarray(history['P_cmd'], dtype=np.float64)
+    bypass = np.asarray(history['safety_bypass'], dtype=bool)
+
+    hold = _hold_intervals(time)
+    backflow_power = np.maximum(P_cmd - load, 0.0)
+    backflow_power[np.isnan(backflow_power)] = 0.0
+
+    tables = {}
+    for name, mask in (('backflow', P_cmd > load), ('bypass', bypass)):
+        starts, stops = run_lengths(mask)
+        tables[name] = _event_table(time, hold, starts, stops, backflow_power)
+    return tables
+
+
+def event_summary(events: pd.DataFrame, quantiles=(0.5, 0.9, 0.99)) -> dict:
+    """
+    事件分布统计
+
+    参数:
+        events: segment_events 返回的事件表
+        quantiles: 持续时间和峰值功率的分位点
+
+    返回:
+        事件数、总时长、总电量，以及持续时间和峰值功率的分位数与最大值
+    """
+    summary = {
+        'count': int(len(events)),
+        'total_duration_s': float(events['duration_s'].sum()) if len(events) else 0.0,
+        'total_energy_kwh': float(events['energy_kwh'].sum()) if len(events) else 0.0,
+    }
+    for column, prefix in (('duration_s', 'duration'), ('peak_kw', 'peak')):
+        values = events[column].to_numpy(dtype=np.float64) if len(events) else np.zeros(0)
+        for q in quantiles:
+            summary[f'{prefix}_p{q * 100:g}'] = float(np.quantile(values, q)) if len(values) else 0.0
+        summary[f'{prefix}_max'] = float(values.max()) if len(values) else 0.0
+    return summary
@@ -0,0 +1,228 @@
+"""
+后台仿真任务模块 - 在工作线程中运行仿真，供界面轮询进度、部分指标和结果
+
+SimulationJobManager 在进程内共享（界面中通过 st.cache_resource 获取）：
+- 任务在线程池中运行，提交后立即返回任务句柄，页面脚本不再阻塞
+- 进度回调中记录进度并用 MetricsAccumulator 生成截至当前的部分指标
+- 数据、参数和剖析选项相同的提交（来自同一或不同会话）共用同一个运行中的任务
+- 取消在下一次进度回调时生效（约每 1% 的步数检查一次）；
+  共享任务只有在所有提交者都取消后才真正停止
+"""
+
+import logging
+import threading
+import time as _time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.core import ControlParams
+from src.utils.logging_config import setup_logger
+from src.utils.metrics import MetricsAccumulator
+from src.utils.preprocessing import preprocess
+from src.utils.result_cache import SimulationCache, simulation_key
+from src.utils.simulation import SimulationResult, log_simulation_result, simulate
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# 同时运行的仿真数（仿真为纯 Python 计算，受 GIL 限制，多开线程不会更快）
+DEFAULT_MAX_WORKERS = 1
+
+logger = logging.getLogger(__name__)
+
+
+class SimulationCancelled(Exception):
+    """任务被取消（在进度回调中抛出以中止仿真）"""
+
+
+class SimulationJob:
+    """
+    后台仿真任务句柄
+
+    属性在工作线程中更新，界面线程只读取：state、done、total、partial_metrics、
+    result（完成后）和 error（失败时）。
+    """
+
+    def __init__(self, key: str, total: int):
+        self.key = key
+        self.total = total
+        self.done = 0
+        self.state = QUEUED
+        self.partial_metrics: Optional[dict] = None
+        self.result: Optional[SimulationResult] = None
+        self.error: Optional[BaseException] = None
+        self.submitted_at = _time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._owners = set()
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def progress(self) -> float:
+        """完成比例 0~1"""
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def finished(self) -> bool:
+        """任务是否已结束（完成、失败或取消）"""
+        return self.state in FINISHED_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        """已运行时间 (s)"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or _time.time()) - self.started_at
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待任务结束，返回是否已结束"""
+        return self._finished.wait(timeout)
+
+
+class SimulationJobManager:
+    """进程内的后台仿真任务管理器（线程池 + 按缓存键去重）"""
+
+    def __init__(self, cache: Optional[SimulationCache] = None, max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        参数:
+            cache: 仿真结果缓存，提交时命中则任务立即完成，运行完成后写入
+            max_workers: 同时运行的仿真数，其余任务排队
+        """
+        setup_logger()
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="simulation")
+        self._jobs: Dict[str, SimulationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, time: np.ndarray, load: np.ndarray, params: ControlParams,
+               owner: Optional[str] = None, profile: bool = False,
+               preprocessing: Optional[dict] = None) -> SimulationJob:
+        """
+        提交仿真任务，已有相同的运行中任务时直接返回该任务
+
+        参数:
+            time: 时间序列 (s)
+            load: 负载序列 (kW)
+            params: 控制参数
+            owner: 提交者标识（如会话 ID），用于共享任务的取消计数
+            profile: 剖析模式（结果不写入缓存）
+            preprocessing: 预处理选项（见 simulate），None 表示直接使用原始数据
+
+        返回:
+            SimulationJob 任务句柄
+        """
+        cache_key = simulation_key(time, load, params, preprocessing=preprocessing)
+        # 参数含不可识别的可调用对象时无法判断是否相同，不去重
+        key = f"{cache_key}|profile={profile}" if cache_key is not None else uuid.uuid4().hex
+        owner = owner or uuid.uuid4().hex
+
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.finished and not job.cancel_requested:
+                job._owners.add(owner)
+                logger.info(f"复用运行中的仿真任务 {key[:12]}（提交者 {len(job._owners)} 个）")
+                return job
+            job = SimulationJob(key, len(load))
+            job._owners.add(owner)
+            self._jobs[key] = job
+
+        logger.info(f"提交仿真任务 {key[:12]}: {len(load)} 个时间步, use_safety_ceiling={params.use_safety_ceiling}, "
+                    f"use_buffer={params.use_buffer}, alpha={params.alpha}")
+        self._executor.submit(self._run, job, time, load, params, profile, preprocessing,
+                              None if profile else cache_key)
+        return job
+
+    def cancel(self, job: SimulationJob, owner: Optional[str] = None):
+        """
+        取消任务；共享任务只移除该提交者，所有提交者都取消后才停止仿真
+
+        参数:
+            job: 任务句柄
+            owner: 提交者标识，None 表示无论其他提交者直接停止
+        """
+        with self._lock:
+            if owner is None:
+                job._owners.clear()
+            else:
+                job._owners.discard(owner)
+            if not job._owners:
+                job._cancel.set()
+
+    def active_jobs(self) -> list:
+        """未结束的任务"""
+        with self._lock:
+            return [job for job in self._jobs.values() if not job.finished]
+
+    def _run(self, job: SimulationJob, time: np.ndarray, load: np.ndarray, params: ControlParams, profile: bool,
+             preprocessing: Optional[dict], cache_key: Optional[str]):
+        """工作线程：运行仿真并更新任务状态（cache_key 为 None 时不使用结果缓存）"""
+        job.started_at = _time.time()
+        try:
+            if job.cancel_requested:
+                raise SimulationCancelled()
+            job.state = RUNNING
+            job.result = self._simulate(job, time, load, params, profile, preprocessing, cache_key)
+            job.done = job.total
+            job.state = DONE
+            log_simulation_result(job.result, logger)
+        except SimulationCancelled:
+            job.state = CANCELLED
+            logger.info(f"仿真任务已取消 {job.key[:12]}: {job.done}/{job.total} 步")
+        except Exception as e:
+            job.error = e
+            job.state = FAILED
+            logger.exception(f"仿真任务失败 {job.key[:12]}")
+        finally:
+            job.finished_at = _time.time()
+            with self._lock:
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+            job._finished.set()
+
+    def _simulate(self, job: SimulationJob, time: np.ndarray, load: np.ndarray, params: ControlParams,
+                  profile: bool, preprocessing: Optional[dict], key: Optional[str]) -> SimulationResult:
+        cache = self.cache if key is not None else None
+        if cache is not None:
+            start = _time.perf_counter()
+            cached = cache.get(key)
+            if cached is not None:
+                history, metrics = cached
+                # 预处理只是数组运算，命中缓存时重新计算以便界面显示分段信息
+                pre = preprocess(time, load, **preprocessing) if preprocessing is not None else None
+                return SimulationResult(history=history, metrics=metrics, controller=None,
+                                        n_steps=len(history['time']), wall_time=_time.perf_counter() - start,
+                                        cached=True, preprocessing=pre)
+
+        accumulator = MetricsAccumulator(show_curtailment=params.show_curtailment_metrics,
+                                         pv_profile=params.pv_power_profile, P_max=params.P_max)
+
+        def on_progress(done: int, total: Optional[int]):
+            if job.cancel_requested:
+                raise SimulationCancelled()
+            # 剖析模式两遍合计报告进度，总数为 2 倍步数
+            if total:
+                job.total = total
+            job.done = done
+            job.partial_metrics = accumulator.metrics()
+
+        # 传入观察者时 simulate 不使用缓存（累加器不影响结果），由这里查询和写入
+        result = simulate(time, load, params, progress_callback=on_progress, profile=profile,
+                          observers=[accumulator.update], preprocessing=preprocessing)
+        if cache is not None:
+            cache.put(key, result.history, result.metrics)
+        # 结果中不保留控制器（其中有一份完整历史），与缓存命中时一致
+        result.controller = None
+        return result
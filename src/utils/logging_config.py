@@ -1,56 +1,169 @@
 """
 Logging Configuration
 日志配置模块
+
+每个进程只配置一次：项目日志记录器挂 QueueHandler，只把记录放入队列；
+后台 QueueListener 线程负责格式化和写文件，控制循环线程不做磁盘 I/O。
+所有模块写入同一个日志文件，按大小和时间轮转（编号备份 .1 ~ .N）。
+各模块的日志级别可通过参数或环境变量 V5_LOG_LEVELS 配置。
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import threading
+import time
 from pathlib import Path
+from typing import Dict, Optional
+
+# 挂接队列处理器的顶层日志记录器（其下所有模块共享同一个文件）
+ROOT_LOGGERS = ("v5_anti_backflow", "src")
+
+LOG_FILE_NAME = "v5_anti_backflow.log"
+
+# 默认模块级别：仿真入口保留 DEBUG，核心算法只记录 INFO 及以上（避免控制循环中的调试日志开销）
+DEFAULT_MODULE_LEVELS: Dict[str, str] = {
+    "v5_anti_backflow": "DEBUG",
+    "src": "INFO",
+}
+
+# 环境变量格式: "src.core=DEBUG,src.utils.sweep=WARNING"
+LEVELS_ENV = "V5_LOG_LEVELS"
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_ROTATE_INTERVAL = 24 * 3600.0
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+class SizeTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """文件超过 maxBytes 或距上次轮转超过 interval 秒时轮转（编号备份）"""
+
+    def __init__(self, filename, maxBytes: int = DEFAULT_MAX_BYTES, backupCount: int = DEFAULT_BACKUP_COUNT,
+                 interval: Optional[float] = DEFAULT_ROTATE_INTERVAL, encoding: str = 'utf-8'):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding)
+        self.interval = interval
+        # 以已有文件的修改时间起算，进程重启不会推迟轮转
+        start = os.path.getmtime(filename) if os.path.exists(filename) else time.time()
+        self.rollover_at = start + interval if interval else None
+
+    def shouldRollover(self, record) -> bool:
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        if self.interval:
+            self.rollover_at = time.time() + self.interval
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """解析 "模块=级别,模块=级别" 形式的级别配置"""
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(
+    log_dir: str = "logs",
+    module_levels: Optional[Dict[str, str]] = None,
+    console_level: int = logging.WARNING,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+    rotate_interval: Optional[float] = DEFAULT_ROTATE_INTERVAL,
+) -> logging.handlers.QueueListener:
+    """
+    配置进程级日志（重复调用直接返回已有配置，只有 module_levels 会再次生效）
+
+    参数:
+        log_dir: 日志目录
+        module_levels: 模块级别覆盖 {日志记录器名: 级别}，叠加在 DEFAULT_MODULE_LEVELS
+                       和环境变量 V5_LOG_LEVELS 之上
+        console_level: 控制台输出级别
+        max_bytes: 单个日志文件的最大字节数
+        backup_count: 保留的备份文件数
+        rotate_interval: 按时间轮转的间隔 (s)，None 表示只按大小轮转
+
+    返回:
+        后台写日志的 QueueListener
+    """
+    global _listener, _queue_handler
+
+    levels = {**DEFAULT_MODULE_LEVELS, **parse_levels(os.environ.get(LEVELS_ENV, "")), **(module_levels or {})}
+    with _lock:
+        for name, level in levels.items():
+            logging.getLogger(name).setLevel(level)
+        if _listener is not None:
+            return _listener
+
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+
+        # 文件处理器（详细日志）
+        file_handler = SizeTimeRotatingFileHandler(
+            Path(log_dir) / LOG_FILE_NAME, maxBytes=max_bytes, backupCount=backup_count, interval=rotate_interval,
+        )
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(threadName)s] %(message)s'
+        ))
+
+        # 控制台处理器（仅 WARNING 及以上）
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(console_level)
+        console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        for name in ROOT_LOGGERS:
+            logger = logging.getLogger(name)
+            logger.addHandler(_queue_handler)
+            logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True,
+        )
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """停止后台线程并写完队列中剩余的日志"""
+    global _listener, _queue_handler
+
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        for name in ROOT_LOGGERS:
+            logger = logging.getLogger(name)
+            logger.removeHandler(_queue_handler)
+            logger.propagate = True
+        _listener = None
+        _queue_handler = None
 
 
 def setup_logger(name: str = "v5_anti_backflow", log_dir: str = "logs") -> logging.Logger:
     """
-    配置日志记录器
+    获取日志记录器（首次调用时配置进程级日志）
 
     参数:
         name: 日志记录器名称
-        log_dir: 日志目录
+        log_dir: 日志目录（仅首次配置时生效）
 
     返回:
         配置好的日志记录器
     """
-    # 创建 logs 目录
-    Path(log_dir).mkdir(parents=True, exist_ok=True)
-
-    # 生成日志文件名（带时间戳）
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(log_dir, f"{name}_{timestamp}.log")
-
-    # 创建日志记录器
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-
-    # 避免重复添加处理器
-    if logger.handlers:
-        return logger
-
-    # 文件处理器（详细日志）
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    file_handler.setFormatter(file_formatter)
-
-    # 控制台处理器（仅 WARNING 及以上）
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.WARNING)
-    console_formatter = logging.Formatter('%(levelname)s: %(message)s')
-    console_handler.setFormatter(console_formatter)
-
-    # 添加处理器
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-
-    return logger
+    configure_logging(log_dir)
+    return logging.getLogger(name)
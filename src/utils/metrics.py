@@ -2,11 +2,22 @@
 性能指标计算模块
 """
 
+import math
+
 import numpy as np
 import pandas as pd
+from typing import Callable, Optional
+
+from src.core.v5_anti_backflow.pv_profile import evaluate_profile
 
 
-def compute_metrics(df: pd.DataFrame, history: dict, show_curtailment: bool = False) -> dict:
+def compute_metrics(
+    df: pd.DataFrame,
+    history: dict,
+    show_curtailment: bool = False,
+    pv_profile: Optional[Callable[[float], float]] = None,
+    P_max: Optional[float] = None,
+) -> dict:
     """
     计算关键性能指标
 
@@ -14,6 +25,11 @@ def compute_metrics(df: pd.DataFrame, history: dict, show_curtailment: bool = Fa
         df: 原始数据DataFrame
         history: 控制历史数据
         show_curtailment: 是否计算弃光率指标（光伏可变时启用）
+        pv_profile: 光伏功率曲线（如 PVAvailabilityProfile），提供时按曲线计算弃光，
+                    否则使用控制器记录的 P_pv_available
+        P_max: 光伏额定功率，提供时曲线值限制在 [0, P_max]（与 PVPowerTracker 一致）
+
+    求和均为从左到右的顺序累加（_sequential_sum），MetricsAccumulator 逐步累计的结果与本函数逐位一致。
     """
     P_cmd = history['P_cmd']
     load = history['load']
@@ -23,14 +39,17 @@ def compute_metrics(df: pd.DataFrame, history: dict, show_curtailment: bool = Fa
     dt = np.diff(time, prepend=time[0])
 
     # 1. 负载跟踪率（主要指标）
-    load_energy = np.sum(load * dt) / 3600  # kWh
-    output_energy = np.sum(P_cmd * dt) / 3600  # kWh
+    load_energy = _sequential_sum(load * dt) / 3600  # kWh
+    output_energy = _sequential_sum(P_cmd * dt) / 3600  # kWh
     load_tracking_rate = (output_energy / load_energy * 100) if load_energy > 0 else 0
 
     # 2. 弃光率（可选，光伏可变时启用）
-    if show_curtailment and 'P_pv_available' in history:
-        P_pv_available = history['P_pv_available']
-        pv_energy = np.sum(P_pv_available * dt) / 3600  # kWh
+    if show_curtailment and (pv_profile is not None or 'P_pv_available' in history):
+        if pv_profile is not None:
+            P_pv_available = evaluate_profile(pv_profile, time, P_max)
+        else:
+            P_pv_available = history['P_pv_available']
+        pv_energy = _sequential_sum(P_pv_available * dt) / 3600  # kWh
         curtailment_energy = pv_energy - output_energy
         curtailment_rate = (curtailment_energy / pv_energy * 100) if pv_energy > 0 else 0
         max_curtailment = np.max(P_pv_available - P_cmd)
@@ -60,9 +79,9 @@ def compute_metrics(df: pd.DataFrame, history: dict, show_curtailment: bool = Fa
     up_rates = ramp_rates[ramp_rates > 0]
     down_rates = np.abs(ramp_rates[ramp_rates < 0])
 
-    avg_up_rate = np.mean(up_rates) if len(up_rates) > 0 else 0
+    avg_up_rate = _sequential_sum(up_rates) / len(up_rates) if len(up_rates) > 0 else 0
     max_up_rate = np.max(up_rates) if len(up_rates) > 0 else 0
-    avg_down_rate = np.mean(down_rates) if len(down_rates) > 0 else 0
+    avg_down_rate = _sequential_sum(down_rates) / len(down_rates) if len(down_rates) > 0 else 0
     max_down_rate = np.max(down_rates) if len(down_rates) > 0 else 0
 
     return {
@@ -79,3 +98,274 @@ def compute_metrics(df: pd.DataFrame, history: dict, show_curtailment: bool = Fa
         'avg_down_rate': avg_down_rate,
         'max_down_rate': max_down_rate
     }
+
+
+def command_statistics(history: dict) -> dict:
+    """
+    输出指令的统计量：与负载的相关系数、平均值和标准差
+
+    参数:
+        history: 控制历史数据（需要 load / P_cmd）
+
+    返回:
+        {'correlation', 'avg_P_cmd', 'std_P_cmd'}；数据少于 2 点时相关系数为 0
+    """
+    P_cmd = np.asarray(history['P_cmd'], dtype=np.float64)
+    load = np.asarray(history['load'], dtype=np.float64)
+    correlation = np.corrcoef(P_cmd, load)[0, 1] if len(P_cmd) > 1 else 0
+    return {
+        'correlation': float(correlation),  # P_cmd 与负载的相关系数（跟随程度）
+        'avg_P_cmd': float(np.mean(P_cmd)),
+        'std_P_cmd': float(np.std(P_cmd)),
+    }
+
+
+# 顺序求和的分块大小（限制临时数组的内存）
+_SUM_CHUNK = 1 << 16
+
+
+def _sequential_sum(values: np.ndarray) -> float:
+    """
+    从左到右逐项累加，结果与逐步 total += x 逐位一致
+
+    np.sum 为成对求和，舍入与流式累加不同；np.add.accumulate 严格按顺序累加，分块进行以限制临时内存。
+    """
+    total = 0.0
+    buf = np.empty(min(len(values), _SUM_CHUNK) + 1)
+    for start in range(0, len(values), _SUM_CHUNK):
+        chunk = values[start:start + _SUM_CHUNK]
+        buf[0] = total
+        buf[1:len(chunk) + 1] = chunk
+        total = float(np.add.accumulate(buf[:len(chunk) + 1])[-1])
+    return total
+
+
+def _update_max(current: float, value: float) -> float:
+    """与 np.max 一致的最大值更新（NaN 传播）"""
+    if current == current and not value <= current:
+        return value
+    return current
+
+
+class MetricsAccumulator:
+    """
+    流式性能指标累加器
+
+    每步 O(1) 更新能量、逆流、安全旁路、弃光和爬坡率统计，无需保留完整历史；
+    求和顺序与 compute_metrics 相同，metrics() 与其在同一数据上的结果逐位一致。
+
+    用法:
+        acc = MetricsAccumulator()
+        controller.attach(acc.update)
+        ...
+        acc.metrics()
+    """
+
+    def __init__(
+        self,
+        show_curtailment: bool = False,
+        pv_profile: Optional[Callable[[float], float]] = None,
+        P_max: Optional[float] = None,
+    ):
+        """
+        初始化累加器
+
+        参数:
+            show_curtailment: 是否计算弃光率指标（与 compute_metrics 相同）
+            pv_profile: 光伏功率曲线，提供时按曲线计算弃光，否则使用控制器的光伏可用功率
+            P_max: 光伏额定功率，提供时曲线值限制在 [0, P_max]
+        """
+        self.show_curtailment = show_curtailment
+        self.pv_profile = pv_profile
+        self.P_max = P_max
+        self.reset()
+
+    def reset(self):
+        """清空累计值"""
+        self.n_steps = 0
+        self._time_prev = None
+        self._P_cmd_prev = 0.0
+
+        self._load_energy = 0.0  # Σ load·dt
+        self._output_energy = 0.0  # Σ P_cmd·dt
+        self._pv_energy = 0.0  # Σ P_pv·dt
+        self._max_curtailment = -math.inf
+
+        self.backflow_count = 0
+        self._max_backflow = -math.inf
+        self.safety_bypass_count = 0
+
+        self._up_sum = 0.0
+        self._down_sum = 0.0
+        self.n_up = 0
+        self.n_down = 0
+        self._max_up = -math.inf
+        self._max_down = -math.inf
+
+    def update(self, time: float, load: float, output, P_pv_available: float = 0.0):
+        """
+        累计一个控制步（签名与 V5AntiBackflowController.attach 的回调一致）
+
+        参数:
+            time: 时间戳 (s)
+            load: 负载测量值 (kW)
+            output: ControlOutput
+            P_pv_available: 控制器记录的光伏可用功率 (kW)
+        """
+        P_cmd = float(output.P_cmd)
+        if self._time_prev is None:
+            dt = 0.0
+            dP_cmd = 0.0
+        else:
+            dt = time - self._time_prev
+            dP_cmd = P_cmd - self._P_cmd_prev
+        self._time_prev = time
+        self._P_cmd_prev = P_cmd
+        self.n_steps += 1
+
+        # 能量
+        self._load_energy += load * dt
+        self._output_energy += P_cmd * dt
+
+        # 弃光
+        if self.show_curtailment:
+            if self.pv_profile is not None:
+                # 标量查询（与 PVPowerTracker 相同），不为每步分配数组
+                P_pv_available = self.pv_profile(time)
+                if self.P_max is not None:
+                    P_pv_available = min(max(P_pv_available, 0.0), self.P_max)
+            self._pv_energy += P_pv_available * dt
+            self._max_curtailment = _update_max(self._max_curtailment, P_pv_available - P_cmd)
+
+        # 逆流
+        if P_cmd > load:
+            self.backflow_count += 1
+        backflow = P_cmd - load
+        if backflow < 0:
+            backflow = 0.0
+        self._max_backflow = _update_max(self._max_backflow, backflow)
+
+        # 安全旁路
+        if output.safety_bypass:
+            self.safety_bypass_count += 1
+
+        # 爬坡率
+        rate = dP_cmd / (dt if dt != 0 else 1.0)
+        if rate > 0:
+            self._up_sum += rate
+            self.n_up += 1
+            self._max_up = _update_max(self._max_up, rate)
+        elif rate < 0:
+            rate = abs(rate)
+            self._down_sum += rate
+            self.n_down += 1
+            self._max_down = _update_max(self._max_down, rate)
+
+    def metrics(self) -> dict:
+        """返回当前累计的指标（键与 compute_metrics 相同）"""
+        load_energy = self._load_energy / 3600
+        output_energy = self._output_energy / 3600
+        load_tracking_rate = (output_energy / load_energy * 100) if load_energy > 0 else 0
+
+        if self.show_curtailment:
+            pv_energy = self._pv_energy / 3600
+            curtailment_energy = pv_energy - output_energy
+            curtailment_rate = (curtailment_energy / pv_energy * 100) if pv_energy > 0 else 0
+            max_curtailment = self._max_curtailment
+        else:
+            curtailment_rate = None
+            curtailment_energy = None
+            max_curtailment = None
+
+        n = self.n_steps
+        return {
+            'load_tracking_rate': load_tracking_rate,
+            'backflow_count': self.backflow_count,
+            'backflow_ratio': (self.backflow_count / n * 100) if n > 0 else 0,
+            'max_backflow_kw': self._max_backflow if n > 0 else 0.0,
+            'curtailment_rate': curtailment_rate,
+            'total_curtailment_kwh': curtailment_energy,
+            'max_curtailment_kw': max_curtailment,
+            'safety_bypass_count': self.safety_bypass_count,
+            'avg_up_rate': self._up_sum / self.n_up if self.n_up > 0 else 0,
+            'max_up_rate': self._max_up if self.n_up > 0 else 0,
+            'avg_down_rate': self._down_sum / self.n_down if self.n_down > 0 else 0,
+            'max_down_rate': self._max_down if self.n_down > 0 else 0,
+        }
+
+
+# 分时段指标的列（与 compute_metrics 同名指标含义相同，仅限于窗口内的采样点）
+WINDOW_COLUMNS = [
+    'window_start', 'window_end', 'n_samples',
+    'load_energy_kwh', 'output_energy_kwh', 'load_tracking_rate',
+    'backflow_count', 'max_backflow_kw', 'safety_bypass_count',
+    'avg_up_rate', 'max_up_rate', 'avg_down_rate', 'max_down_rate',
+]
+
+
+def windowed_metrics(history: dict, window: float = 3600.0) -> pd.DataFrame:
+    """
+    按固定时间窗口计算分时段指标
+
+    窗口从首个时间点开始按 window 秒对齐，每个采样点（及其 dt、变化率）归入所在窗口，
+    口径与 compute_metrics 一致。全部为分桶归约（np.add.reduceat / np.maximum.reduceat），
+    耗时与数据量成线性关系；没有采样点的窗口（数据缺口）不出现在结果中。
+
+    参数:
+        history: 控制历史数据
+        window: 窗口长度 (s)，如 60（每分钟）、3600（每小时）
+
+    返回:
+        每个窗口一行的 DataFrame（列见 WINDOW_COLUMNS）
+    """
+    time = np.asarray(history['time'], dtype=np.float64)
+    if len(time) == 0:
+        return pd.DataFrame(columns=WINDOW_COLUMNS)
+    load = np.asarray(history['load'], dtype=np.float64)
+    P_cmd = np.asarray(history['P_cmd'], dtype=np.float64)
+    bypass = np.asarray(history['safety_bypass'], dtype=bool)
+
+    # 分桶：相邻采样点桶号变化处即为新窗口的起点
+    bucket = np.floor((time - time[0]) / window).astype(np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    n_samples = np.diff(np.append(starts, len(time)))
+
+    dt = np.diff(time, prepend=time[0])
+    load_energy = np.add.reduceat(load * dt, starts) / 3600
+    output_energy = np.add.reduceat(P_cmd * dt, starts) / 3600
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tracking_rate = np.where(load_energy > 0, output_energy / load_energy * 100, 0.0)
+
+    backflow = P_cmd - load
+    backflow_count = np.add.reduceat((backflow > 0).astype(np.int64), starts)
+    max_backflow = np.maximum.reduceat(np.maximum(backflow, 0), starts)
+    bypass_count = np.add.reduceat(bypass.astype(np.int64), starts)
+
+    dP_cmd = np.diff(P_cmd, prepend=P_cmd[0])
+    dt_nonzero = np.where(dt == 0, 1.0, dt)
+    ramp_rates = dP_cmd / dt_nonzero
+    up = ramp_rates > 0
+    down = ramp_rates < 0
+    n_up = np.add.reduceat(up.astype(np.int64), starts)
+    n_down = np.add.reduceat(down.astype(np.int64), starts)
+    up_sum = np.add.reduceat(np.where(up, ramp_rates, 0.0), starts)
+    down_sum = np.add.reduceat(np.where(down, -ramp_rates, 0.0), starts)
+    up_max = np.maximum.reduceat(np.where(up, ramp_rates, 0.0), starts)
+    down_max = np.maximum.reduceat(np.where(down, -ramp_rates, 0.0), starts)
+
+    window_start = time[0] + bucket[starts] * window
+    return pd.DataFrame({
+        'window_start': window_start,
+        'window_end': window_start + window,
+        'n_samples': n_samples,
+        'load_energy_kwh': load_energy,
+        'output_energy_kwh': output_energy,
+        'load_tracking_rate': tracking_rate,
+        'backflow_count': backflow_count,
+        'max_backflow_kw': max_backflow,
+        'safety_bypass_count': bypass_count,
+        'avg_up_rate': np.divide(up_sum, n_up, out=np.zeros(len(starts)), where=n_up > 0),
+        'max_up_rate': up_max,
+        'avg_down_rate': np.divide(down_sum, n_down, out=np.zeros(len(starts)), where=n_down > 0),
+        'max_down_rate': down_max,
+    })
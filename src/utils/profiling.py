@@ -0,0 +1,217 @@
+"""
+性能剖析模块 - 控制循环的函数级 CPU 剖析和内存分配快照
+
+profile_run() 对同一次计算运行两遍：第一遍用 cProfile 收集函数级耗时，
+第二遍用 tracemalloc 记录峰值内存和结束时仍存活的分配（tracemalloc 会显著拖慢
+分配密集的代码，分开运行避免干扰 CPU 剖析）。结果按模块归类
+（stukf / safety_calculator / controller / pandas / numpy ...），
+可写出 JSON 报告和 pstats 文件（可用 snakeviz 等工具查看）。
+
+tracemalloc 是进程级的（cProfile 在 3.12+ 也只允许一个活动的剖析器），
+后台任务线程中同一时刻只允许一次剖析，并发的请求直接拒绝（ProfilerBusy）。
+"""
+
+import cProfile
+import json
+import marshal
+import pstats
+import threading
+import time as _time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional, Tuple, TypeVar
+
+import pandas as pd
+
+T = TypeVar("T")
+
+DEFAULT_PROFILE_DIR = Path("output") / "profiles"
+
+# 模块归类规则：按顺序匹配源文件路径中的片段，先匹配者优先
+MODULE_GROUPS = (
+    ("stukf", ("src/core/stukf.py",)),
+    ("safety_calculator", ("src/core/v5_anti_backflow/safety_calculator.py",)),
+    ("controller", ("src/core/",)),
+    ("utils", ("src/utils/",)),
+    ("pandas", ("/pandas/",)),
+    ("numpy", ("/numpy/",)),
+    ("scipy", ("/scipy/",)),
+)
+
+FUNCTION_COLUMNS = ['module', 'function', 'location', 'ncalls', 'tottime', 'cumtime']
+MODULE_COLUMNS = ['module', 'tottime', 'share', 'ncalls']
+ALLOCATION_COLUMNS = ['module', 'size_kb', 'count']
+ALLOCATION_LINE_COLUMNS = ['location', 'module', 'size_kb', 'count']
+
+# 进程内同一时刻只运行一次剖析
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """已有剖析在运行（剖析器和 tracemalloc 为进程级状态，不能并发使用）"""
+
+
+def classify(filename: str, funcname: str = "") -> str:
+    """
+    把源文件归入模块组
+
+    内置函数（cProfile 文件名为 "~"）按函数描述中的库名归类，其余为 builtins
+    """
+    if filename == "~":
+        for group in ("numpy", "pandas", "scipy"):
+            if group in funcname:
+                return group
+        return "builtins"
+    path = filename.replace("\\", "/")
+    for group, fragments in MODULE_GROUPS:
+        if any(fragment in path for fragment in fragments):
+            return group
+    return "other"
+
+
+@dataclass
+class ProfileReport:
+    """剖析结果"""
+    wall_time: float  # CPU 剖析那一遍的耗时 (s，含 cProfile 开销)
+    total_tottime: float  # 所有函数自身耗时之和 (s)
+    functions: pd.DataFrame  # 按自身耗时降序的全部函数，列见 FUNCTION_COLUMNS
+    modules: pd.DataFrame  # 按模块汇总的自身耗时，列见 MODULE_COLUMNS
+    allocations: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=ALLOCATION_COLUMNS))
+    allocation_lines: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=ALLOCATION_LINE_COLUMNS))
+    peak_memory_mb: Optional[float] = None  # tracemalloc 记录的峰值 (MB)，未做内存剖析时为 None
+    pstats_data: bytes = b""  # marshal 序列化的 pstats 原始数据
+
+    def to_dict(self) -> dict:
+        """可 JSON 序列化的报告"""
+        return {
+            "wall_time": self.wall_time,
+            "total_tottime": self.total_tottime,
+            "peak_memory_mb": self.peak_memory_mb,
+            "modules": self.modules.to_dict(orient="records"),
+            "functions": self.functions.to_dict(orient="records"),
+            "allocations": self.allocations.to_dict(orient="records"),
+            "allocation_lines": self.allocation_lines.to_dict(orient="records"),
+        }
+
+    def write(self, path) -> Path:
+        """
+        写出 JSON 报告，并在同目录写出同名 .prof 文件
+
+        返回:
+            JSON 报告路径
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        path.with_suffix(".prof").write_bytes(self.pstats_data)
+        return path
+
+
+def _cpu_tables(stats: pstats.Stats) -> Tuple[pd.DataFrame, pd.DataFrame, float]:
+    """把 pstats 汇总为函数表和模块表"""
+    rows = []
+    for (filename, lineno, funcname), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'module': classify(filename, funcname),
+            'function': funcname,
+            'location': funcname if filename == "~" else f"{Path(filename).name}:{lineno}",
+            'ncalls': ncalls,
+            'tottime': tottime,
+            'cumtime': cumtime,
+        })
+    table = pd.DataFrame(rows, columns=FUNCTION_COLUMNS)
+    total = float(table['tottime'].sum())
+
+    modules = (table.groupby('module', as_index=False)[['tottime', 'ncalls']].sum()
+               .sort_values('tottime', ascending=False, ignore_index=True))
+    modules['share'] = modules['tottime'] / total if total > 0 else 0.0
+    functions = table.sort_values('tottime', ascending=False, ignore_index=True)
+    return functions, modules[MODULE_COLUMNS], total
+
+
+def _allocation_tables(snapshot: tracemalloc.Snapshot, top_n: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """把 tracemalloc 快照汇总为模块表和分配位置表"""
+    by_module = {}
+    for stat in snapshot.statistics("filename"):
+        module = classify(stat.traceback[0].filename)
+        size, count = by_module.get(module, (0, 0))
+        by_module[module] = (size + stat.size, count + stat.count)
+    allocations = pd.DataFrame(
+        [{'module': m, 'size_kb': size / 1024, 'count': count} for m, (size, count) in by_module.items()],
+        columns=ALLOCATION_COLUMNS,
+    ).sort_values('size_kb', ascending=False, ignore_index=True)
+
+    lines = [{
+        'location': f"{Path(stat.traceback[0].filename).name}:{stat.traceback[0].lineno}",
+        'module': classify(stat.traceback[0].filename),
+        'size_kb': stat.size / 1024,
+        'count': stat.count,
+    } for stat in snapshot.statistics("lineno")[:top_n]]
+    return allocations, pd.DataFrame(lines, columns=ALLOCATION_LINE_COLUMNS)
+
+
+def profile_run(run: Callable[[], T], memory: bool = True, top_n: int = 50) -> Tuple[T, ProfileReport]:
+    """
+    剖析一次计算
+
+    参数:
+        run: 无参数的计算函数，memory=True 时会被调用两次（需可重复运行）
+        memory: 是否额外运行一遍做 tracemalloc 内存剖析
+        top_n: 分配位置表保留的行数
+
+    返回:
+        (第一遍 run() 的返回值, ProfileReport)
+
+    异常:
+        ProfilerBusy: 本进程中已有剖析在运行
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("已有性能剖析在运行，请等待其完成后再试")
+    try:
+        return _profile_run(run, memory, top_n)
+    finally:
+        _profile_lock.release()
+
+
+def _profile_run(run: Callable[[], T], memory: bool, top_n: int) -> Tuple[T, ProfileReport]:
+    """profile_run 的实现（调用方持有 _profile_lock）"""
+    profiler = cProfile.Profile()
+    start = _time.perf_counter()
+    profiler.enable()
+    try:
+        result = run()
+    finally:
+        profiler.disable()
+    wall_time = _time.perf_counter() - start
+
+    stats = pstats.Stats(profiler)
+    functions, modules, total = _cpu_tables(stats)
+    report = ProfileReport(
+        wall_time=wall_time,
+        total_tottime=total,
+        functions=functions,
+        modules=modules,
+        pstats_data=marshal.dumps(stats.stats),
+    )
+
+    if memory:
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            # 保持返回值存活，快照中才能看到历史数据等结果占用的内存
+            held = run()
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)])
+            _, peak = tracemalloc.get_traced_memory()
+            del held
+        finally:
+            if not already_tracing:
+                tracemalloc.stop()
+        report.allocations, report.allocation_lines = _allocation_tables(snapshot, top_n)
+        report.peak_memory_mb = peak / 1024 ** 2
+
+    return result, report
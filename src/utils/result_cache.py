@@ -0,0 +1,298 @@
+"""
+仿真结果缓存模块 - 基于内容哈希的两级缓存（内存 + 磁盘）
+
+缓存键由 time/load 数组内容和 ControlParams 字段共同哈希得到，
+相同数据与参数的重复仿真直接返回历史数据和指标。
+两级缓存均按总字节数进行 LRU 淘汰。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import fields
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.core import ControlParams
+from src.core.v5_anti_backflow.controller import DEFAULT_MEASUREMENT_NOISE, DEFAULT_PROCESS_NOISE
+
+# 缓存格式版本：控制算法或历史字段变化时递增，使旧缓存失效
+CACHE_VERSION = 5
+
+DEFAULT_CACHE_DIR = Path("output") / "cache"
+
+
+def _params_payload(params: ControlParams) -> Optional[dict]:
+    """
+    将控制参数转换为可哈希的字典
+
+    光伏功率曲线为 PVAvailabilityProfile 时按其数据内容哈希；
+    其他任意可调用对象无法可靠识别，返回 None 表示不可缓存。
+    """
+    payload = {}
+    for f in fields(params):
+        value = getattr(params, f.name)
+        if value is None or not callable(value):
+            payload[f.name] = value
+        elif hasattr(value, "time") and hasattr(value, "power"):
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(np.ascontiguousarray(value.time, dtype=np.float64).tobytes())
+            digest.update(np.ascontiguousarray(value.power, dtype=np.float64).tobytes())
+            payload[f.name] = digest.hexdigest()
+        else:
+            return None
+    return payload
+
+
+def data_fingerprint(time: np.ndarray, load: np.ndarray) -> str:
+    """计算 time/load 数组内容的哈希（参数扫描中对同一数据只需计算一次）"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(np.ascontiguousarray(time, dtype=np.float64).tobytes())
+    digest.update(b"|")
+    digest.update(np.ascontiguousarray(load, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def simulation_key(
+    time: Optional[np.ndarray],
+    load: Optional[np.ndarray],
+    params: ControlParams,
+    fingerprint: Optional[str] = None,
+    process_noise: float = DEFAULT_PROCESS_NOISE,
+    measurement_noise: float = DEFAULT_MEASUREMENT_NOISE,
+    preprocessing: Optional[dict] = None,
+    **extra,
+) -> Optional[str]:
+    """
+    计算仿真缓存键（simulate、SimulationJobManager 和 run_sweep 共用，相同的仿真得到相同的键）
+
+    参数:
+        time: 时间序列 (s)，使用预处理时为原始数据
+        load: 负载序列 (kW)
+        params: 控制参数
+        fingerprint: 预先计算的 data_fingerprint(time, load)，提供时不再读取数组
+        process_noise: STUKF 过程噪声
+        measurement_noise: STUKF 测量噪声
+        preprocessing: 预处理选项（见 simulate），None 表示未预处理
+        extra: 其他影响结果的参数
+
+    返回:
+        十六进制缓存键；参数中含不可识别的可调用对象时返回 None
+    """
+    payload = _params_payload(params)
+    if payload is None:
+        return None
+    if fingerprint is None:
+        fingerprint = data_fingerprint(time, load)
+
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"v{CACHE_VERSION}|{fingerprint}|".encode())
+    extra = dict(extra, process_noise=process_noise, measurement_noise=measurement_noise)
+    if preprocessing is not None:
+        extra['preprocessing'] = preprocessing
+    digest.update(json.dumps({**payload, **extra}, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _history_nbytes(history: Dict[str, np.ndarray]) -> int:
+    return sum(np.asarray(v).nbytes for v in history.values())
+
+
+def _readonly(history: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """返回数组的只读视图（不复制数据），防止调用方修改缓存中的历史数据"""
+    views = {}
+    for name, value in history.items():
+        view = np.asarray(value).view()
+        view.setflags(write=False)
+        views[name] = view
+    return views
+
+
+class SimulationCache:
+    """
+    仿真结果两级缓存
+
+    - 内存层：OrderedDict 实现的 LRU，按历史数组总字节数限制容量；
+      命中时返回新的字典和只读数组视图，调用方无法修改缓存内容
+    - 磁盘层：每个结果一个 .npz 文件，以文件修改时间作为最近访问时间，按目录总大小淘汰；
+      目录大小在首次写入时统计一次，之后随写入累加，超出上限时才重新扫描并淘汰
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[os.PathLike] = DEFAULT_CACHE_DIR,
+        max_memory_bytes: int = 256 * 1024 ** 2,
+        max_disk_bytes: int = 2 * 1024 ** 3,
+    ):
+        """
+        初始化缓存
+
+        参数:
+            cache_dir: 磁盘缓存目录，None 表示仅使用内存层
+            max_memory_bytes: 内存层容量上限（字节），0 表示禁用内存层
+            max_disk_bytes: 磁盘层容量上限（字节）
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: "OrderedDict[str, Tuple[Dict[str, np.ndarray], dict, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        # 磁盘层总大小（首次写入时统计；其他进程的写入在下次淘汰扫描时计入）
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def config(self) -> dict:
+        """返回可在其他进程中重建同一磁盘缓存的配置"""
+        return {
+            "cache_dir": str(self.cache_dir) if self.cache_dir is not None else None,
+            "max_disk_bytes": self.max_disk_bytes,
+        }
+
+    def get(self, key: Optional[str]) -> Optional[Tuple[Dict[str, np.ndarray], dict]]:
+        """
+        查询缓存
+
+        返回:
+            (history, metrics)，history 的数组为只读；未命中时返回 None
+        """
+        if key is None:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0]), dict(entry[1])
+
+        loaded = self._read_disk(key)
+        with self._lock:
+            if loaded is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        history, metrics = _readonly(loaded[0]), loaded[1]
+        self._put_memory(key, history, metrics)
+        return dict(history), dict(metrics)
+
+    def put(self, key: Optional[str], history: Dict[str, np.ndarray], metrics: dict):
+        """写入缓存（内存层和磁盘层）"""
+        if key is None:
+            return
+        self._put_memory(key, history, metrics)
+        self._write_disk(key, history, metrics)
+
+    def clear(self):
+        """清空两级缓存"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.cache_dir is not None:
+            for path in self.cache_dir.glob("*.npz"):
+                path.unlink(missing_ok=True)
+            with self._lock:
+                self._disk_bytes = 0
+
+    # ---- 内存层 ----
+
+    def _put_memory(self, key: str, history: Dict[str, np.ndarray], metrics: dict):
+        nbytes = _history_nbytes(history)
+        if nbytes > self.max_memory_bytes:
+            return
+        history, metrics = _readonly(history), dict(metrics)
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old[2]
+            self._memory[key] = (history, metrics, nbytes)
+            self._memory_bytes += nbytes
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (_, _, evicted) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted
+
+    # ---- 磁盘层 ----
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.npz"
+
+    def _read_disk(self, key: str) -> Optional[Tuple[Dict[str, np.ndarray], dict]]:
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                metrics = json.loads(str(data["__metrics__"]))
+                history = {k: data[k] for k in data.files if k != "__metrics__"}
+            os.utime(path)  # 更新最近访问时间
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            return None
+        return history, metrics
+
+    def _write_disk(self, key: str, history: Dict[str, np.ndarray], metrics: dict):
+        if self.cache_dir is None:
+            return
+        # 先写临时文件再原子替换，支持多进程并发写入
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, __metrics__=np.array(json.dumps(metrics, default=_json_default)), **history)
+        size = tmp.stat().st_size
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp, path)
+
+        # 首次写入时统计目录大小（已包含本次写入），之后只累加变化量
+        initial = self._scan_disk()[1] if self._disk_bytes is None else None
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = initial
+            else:
+                self._disk_bytes += size - replaced
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._evict_disk()
+
+    def _scan_disk(self) -> Tuple[list, int]:
+        """列出磁盘缓存文件 [(mtime, size, path)] 及总大小"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        return entries, total
+
+    def _evict_disk(self):
+        """重新扫描目录（计入其他进程的写入），按最近访问时间淘汰直至总大小不超过上限"""
+        entries, total = self._scan_disk()
+        if total > self.max_disk_bytes:
+            for _, size, path in sorted(entries):
+                path.unlink(missing_ok=True)
+                total -= size
+                if total <= self.max_disk_bytes:
+                    break
+        with self._lock:
+            self._disk_bytes = total
+
+
+def _json_default(value):
+    """指标中的 numpy 标量转换为 Python 原生类型"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
@@ -1,15 +1,261 @@
 """
 仿真运行模块
+
+simulate() / simulate_chunks() 为纯仿真接口，不依赖 Streamlit，可在脚本、测试和服务中使用；
+run_simulation() 是带 Streamlit 进度条的同步封装；界面通过 jobs.SimulationJobManager 在后台线程运行仿真。
 """
 
-import streamlit as st
+import time as _time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
 from src.core import V5AntiBackflowController, ControlParams
+from src.core.v5_anti_backflow.controller import DEFAULT_MEASUREMENT_NOISE, DEFAULT_PROCESS_NOISE
 from src.utils.logging_config import setup_logger
-import pandas as pd
+from src.utils.metrics import compute_metrics
+from src.utils.preprocessing import PreprocessResult, preprocess
+from src.utils.profiling import DEFAULT_PROFILE_DIR, ProfileReport, profile_run
+from src.utils.result_cache import SimulationCache, simulation_key
+from src.utils.data_processing import LoadChunkReader
+
+# 进度回调: (已完成步数, 总步数或 None)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+@dataclass
+class SimulationResult:
+    """仿真结果"""
+    history: Dict[str, np.ndarray]  # 控制历史数据
+    metrics: dict  # 性能指标
+    controller: Optional[V5AntiBackflowController]  # 仿真结束时的控制器（缓存命中时为 None）
+    n_steps: int  # 仿真步数
+    wall_time: float  # 仿真耗时 (s)
+    cached: bool = False  # 是否来自结果缓存
+    profile: Optional[ProfileReport] = None  # 剖析结果（profile=True 时）
+    preprocessing: Optional[PreprocessResult] = None  # 预处理结果（传入 preprocessing 时）
+
+    @property
+    def steps_per_sec(self) -> float:
+        """仿真吞吐量（步/秒）"""
+        return self.n_steps / self.wall_time if self.wall_time > 0 else float("inf")
+
+
+def simulate_chunks(
+    chunks: Iterable[Tuple[np.ndarray, np.ndarray]],
+    params: ControlParams,
+    progress_callback: Optional[ProgressCallback] = None,
+    total_steps: Optional[int] = None,
+    process_noise: float = DEFAULT_PROCESS_NOISE,
+    measurement_noise: float = DEFAULT_MEASUREMENT_NOISE,
+    observers: Sequence[Callable] = (),
+    restart_each_chunk: bool = False,
+) -> SimulationResult:
+    """
+    按数据块运行控制仿真（纯计算，不依赖 Streamlit）
+
+    参数:
+        chunks: 可迭代的 (time, load) 数组块，按时间顺序排列
+        params: 控制参数
+        progress_callback: 进度回调 callback(done, total)，每完成一个进度区间调用一次
+        total_steps: 总步数（已知时用于进度计算）
+        process_noise: STUKF 过程噪声
+        measurement_noise: STUKF 测量噪声
+        observers: 挂到控制器上的每步回调（如 MetricsAccumulator.update、DecisionRecorder）
+        restart_each_chunk: 每块开始时重置控制状态（历史保留），用于按缺口切分的连续段
+
+    返回:
+        SimulationResult: 历史数据、性能指标和控制器
+    """
+    controller = None
+    done = 0
+    # 约 1% 的进度回调间隔，未知总步数时每块回调一次
+    report_every = max(1, total_steps // 100) if total_steps else None
+
+    start = _time.perf_counter()
+    for time_chunk, load_chunk in chunks:
+        # 转为 Python float 列表迭代，避免逐元素的 numpy 标量开销
+        time_list = np.asarray(time_chunk, dtype=np.float64).tolist()
+        load_list = np.asarray(load_chunk, dtype=np.float64).tolist()
+        if not load_list:
+            continue
+
+        if controller is None:
+            controller = V5AntiBackflowController(
+                params=params,
+                initial_load=load_list[0],
+                process_noise=process_noise,
+                measurement_noise=measurement_noise,
+            )
+            for observer in observers:
+                controller.attach(observer)
+        elif restart_each_chunk:
+            controller.reset(load_list[0], keep_history=True)
+        compute_control = controller.compute_control
+
+        # 按进度区间切片运行，区间之间回调
+        n = len(load_list)
+        step = report_every if (progress_callback is not None and report_every) else n
+        for i in range(0, n, step):
+            for L_t, t in zip(load_list[i:i + step], time_list[i:i + step]):
+                compute_control(L_t, t)
+            done += min(step, n - i)
+            if progress_callback is not None:
+                progress_callback(done, total_steps)
+
+    if controller is None:
+        raise ValueError("仿真数据为空")
+    wall_time = _time.perf_counter() - start
+
+    history = controller.get_history()
+    metrics = compute_metrics(
+        None, history,
+        show_curtailment=params.show_curtailment_metrics,
+        pv_profile=params.pv_power_profile,
+        P_max=params.P_max,
+    )
+
+    return SimulationResult(
+        history=history,
+        metrics=metrics,
+        controller=controller,
+        n_steps=done,
+        wall_time=wall_time,
+    )
 
 
-def run_simulation(df: pd.DataFrame, params: ControlParams) -> V5AntiBackflowController:
-    """运行控制仿真"""
+def simulate(
+    time: np.ndarray,
+    load: np.ndarray,
+    params: ControlParams,
+    progress_callback: Optional[ProgressCallback] = None,
+    process_noise: float = DEFAULT_PROCESS_NOISE,
+    measurement_noise: float = DEFAULT_MEASUREMENT_NOISE,
+    cache: Optional[SimulationCache] = None,
+    profile: bool = False,
+    observers: Sequence[Callable] = (),
+    preprocessing: Optional[dict] = None,
+) -> SimulationResult:
+    """
+    对完整的 time/load 数组运行控制仿真（纯计算，不依赖 Streamlit）
+
+    参数:
+        time: 时间序列 (s)
+        load: 负载序列 (kW)
+        params: 控制参数
+        progress_callback: 进度回调 callback(done, total)
+        process_noise: STUKF 过程噪声
+        measurement_noise: STUKF 测量噪声
+        cache: 结果缓存，命中时直接返回缓存的历史数据和指标
+        profile: 剖析模式，不使用缓存，结果的 profile 字段为 ProfileReport
+                 （额外运行一遍做内存剖析，总耗时约为正常仿真的 3~5 倍；两遍合计报告一次 0~100% 的进度）
+        observers: 每步回调，提供时不使用缓存（剖析模式下只挂在第一遍）
+        preprocessing: 预处理选项（preprocess 的关键字参数，如 {'interval': 1.0}），提供时仿真前先排序、去重、
+                       可选重采样并按缺口分段，控制器在每个缺口后重启；None 表示直接使用原始数据
+    """
+    pre = None
+    chunks = [(time, load)]
+    n = len(load)
+    if preprocessing is not None:
+        pre = preprocess(time, load, **preprocessing)
+        chunks = list(pre.iter_segments())
+        n = len(pre.load)
+
+    if profile:
+        # 两遍合并为一个 0~100% 的进度：第一遍报告 (done, 2n)，第二遍报告 (n + done, 2n)
+        passes = iter([(0, observers), (n, ())])
+
+        def run_pass() -> SimulationResult:
+            offset, pass_observers = next(passes)
+            callback = None
+            if progress_callback is not None:
+                callback = lambda done, total: progress_callback(offset + done, 2 * n)
+            return simulate_chunks(
+                chunks,
+                params,
+                progress_callback=callback,
+                total_steps=n,
+                process_noise=process_noise,
+                measurement_noise=measurement_noise,
+                observers=pass_observers,
+                restart_each_chunk=pre is not None,
+            )
+
+        result, report = profile_run(run_pass)
+        result.profile = report
+        result.preprocessing = pre
+        return result
+
+    if observers:
+        cache = None
+
+    key = None
+    if cache is not None:
+        start = _time.perf_counter()
+        key = simulation_key(
+            time, load, params,
+            process_noise=process_noise, measurement_noise=measurement_noise, preprocessing=preprocessing,
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            history, metrics = cached
+            if progress_callback is not None:
+                progress_callback(n, n)
+            return SimulationResult(
+                history=history,
+                metrics=metrics,
+                controller=None,
+                n_steps=n,
+                wall_time=_time.perf_counter() - start,
+                cached=True,
+                preprocessing=pre,
+            )
+
+    result = simulate_chunks(
+        chunks,
+        params,
+        progress_callback=progress_callback,
+        total_steps=n,
+        process_noise=process_noise,
+        measurement_noise=measurement_noise,
+        observers=observers,
+        restart_each_chunk=pre is not None,
+    )
+    result.preprocessing = pre
+    if cache is not None:
+        cache.put(key, result.history, result.metrics)
+    return result
+
+
+def simulate_csv(
+    path,
+    params: ControlParams,
+    chunksize: int = 200_000,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> SimulationResult:
+    """
+    流式读取 CSV 负载文件并逐块驱动控制器（读取端内存占用与块大小成正比）
+
+    参数:
+        path: CSV 文件路径
+        params: 控制参数
+        chunksize: 每块行数
+        progress_callback: 进度回调 callback(done, None)，每处理完一块调用一次
+    """
+    return simulate_chunks(LoadChunkReader(path, chunksize), params, progress_callback=progress_callback)
+
+
+def run_simulation(
+    df: pd.DataFrame,
+    params: ControlParams,
+    cache: Optional[SimulationCache] = None,
+    profile: bool = False,
+) -> SimulationResult:
+    """运行控制仿真（Streamlit 界面封装，显示进度条；profile=True 时做性能剖析）"""
+    import streamlit as st
+
     # 初始化日志系统
     logger = setup_logger("v5_anti_backflow")
     logger.info("开始运行仿真")
@@ -17,35 +263,37 @@ def run_simulation(df: pd.DataFrame, params: ControlParams) -> V5AntiBackflowCon
     logger.info(f"控制参数: use_safety_ceiling={params.use_safety_ceiling}, "
                f"use_buffer={params.use_buffer}, alpha={params.alpha}")
 
-    controller = V5AntiBackflowController(
-        params=params,
-        initial_load=df['load'].iloc[0],
-        process_noise=0.1,
-        measurement_noise=1.0
-    )
-
     # 添加进度条
     progress_bar = st.progress(0)
     status_text = st.empty()
 
-    total_steps = len(df)
-    for idx, row in df.iterrows():
-        controller.compute_control(row['load'], row['time'])
+    def on_progress(done: int, total: Optional[int]):
+        progress = int(done / total * 100)
+        progress_bar.progress(progress)
+        status_text.text(f"仿真进度: {progress}%")
 
-        # 更新进度
-        if idx % max(1, total_steps // 100) == 0:
-            progress = int((idx + 1) / total_steps * 100)
-            progress_bar.progress(progress)
-            status_text.text(f"仿真进度: {progress}%")
+    result = simulate(
+        df['time'].to_numpy(), df['load'].to_numpy(), params,
+        progress_callback=on_progress, cache=cache, profile=profile,
+    )
 
     progress_bar.empty()
     status_text.empty()
 
-    # 记录仿真完成信息
-    history = controller.get_history()
-    logger.info("仿真完成")
+    log_simulation_result(result, logger)
+    return result
+
+
+def log_simulation_result(result: SimulationResult, logger):
+    """记录仿真完成信息；剖析模式下同时把剖析报告保存到 DEFAULT_PROFILE_DIR"""
+    history = result.history
+    logger.info("仿真完成" + ("（缓存命中）" if result.cached else ""))
+    logger.info(f"仿真耗时: {result.wall_time:.2f}s ({result.steps_per_sec:.0f} 步/秒)")
     logger.info(f"平均PV限发指令: {history['P_cmd'].mean():.2f}kW")
     logger.info(f"最大PV限发指令: {history['P_cmd'].max():.2f}kW")
     logger.info(f"PV限发指令为0的次数: {(history['P_cmd'] == 0).sum()}/{len(history['P_cmd'])}")
-
-    return controller
+    if result.profile is not None:
+        top = result.profile.modules.head(3)
+        logger.info("剖析耗时占比: " + ", ".join(f"{m} {s:.0%}" for m, s in zip(top['module'], top['share'])))
+        path = result.profile.write(DEFAULT_PROFILE_DIR / f"profile_{_time.strftime('%Y%m%d_%H%M%S')}.json")
+        logger.info(f"剖析报告已保存到: {path}")
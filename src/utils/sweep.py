@@ -0,0 +1,268 @@
+"""
+参数扫描模块 - 在进程池上并行运行多组 ControlParams 仿真
+
+负载/时间数组通过共享内存传递给工作进程，每个任务只序列化控制参数；
+工作进程崩溃时自动重建进程池并重试未完成的任务。
+"""
+
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import fields, replace
+from multiprocessing import get_context, shared_memory, util
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.core import ControlParams
+from src.utils.result_cache import SimulationCache, data_fingerprint, simulation_key
+
+# 工作进程中挂载的共享数据和结果缓存（由 _init_worker 设置）
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_data: Optional[np.ndarray] = None
+_worker_cache: Optional[SimulationCache] = None
+
+
+def expand_grid(base: ControlParams, grid: Dict[str, Sequence]) -> List[ControlParams]:
+    """
+    按参数网格展开 ControlParams 变体（笛卡尔积）
+
+    参数:
+        base: 基准参数，网格中未出现的字段沿用该值
+        grid: 字段名 -> 取值列表，例如 {'buffer': [3.0, 4.0], 'alpha': [1e-3, 1e-2]}
+
+    返回:
+        ControlParams 列表
+    """
+    valid = {f.name for f in fields(ControlParams)}
+    unknown = set(grid) - valid
+    if unknown:
+        raise ValueError(f"未知的控制参数: {', '.join(sorted(unknown))}")
+
+    keys = list(grid)
+    return [replace(base, **dict(zip(keys, values))) for values in itertools.product(*grid.values())]
+
+
+def params_to_row(params: ControlParams) -> dict:
+    """提取 ControlParams 中可制表的标量字段（跳过光伏功率曲线等可调用对象）"""
+    return {
+        f.name: getattr(params, f.name)
+        for f in fields(params)
+        if not callable(getattr(params, f.name))
+    }
+
+
+def _init_worker(shm_name: str, n: int, cache_config: Optional[dict]):
+    """工作进程初始化：挂载共享内存中的 (time, load) 数组，并打开磁盘结果缓存"""
+    global _worker_shm, _worker_data, _worker_cache
+    if sys.version_info >= (3, 13):
+        # 共享内存由主进程创建和 unlink，工作进程不登记到 resource_tracker
+        _worker_shm = shared_memory.SharedMemory(name=shm_name, track=False)
+    else:
+        # 3.13 之前挂载也会登记，但 spawn 的工作进程共用主进程的 resource_tracker（按名称去重），
+        # 这只是重复登记；不能在这里撤销，否则主进程 unlink 时的撤销会失败
+        _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_data = np.ndarray((2, n), dtype=np.float64, buffer=_worker_shm.buf)
+    # 进程池的工作进程以 os._exit 退出，不执行 atexit；用 multiprocessing 的退出回调关闭映射
+    util.Finalize(None, _close_worker, exitpriority=0)
+    if cache_config is not None:
+        # 工作进程只写磁盘层，内存层由主进程维护
+        _worker_cache = SimulationCache(max_memory_bytes=0, **cache_config)
+
+
+def _close_worker():
+    """工作进程退出时释放数组视图并关闭共享内存映射（不删除，由主进程 unlink）"""
+    global _worker_shm, _worker_data
+    _worker_data = None
+    if _worker_shm is not None:
+        _worker_shm.close()
+        _worker_shm = None
+
+
+def _run_variant(index: int, params: ControlParams, n_steps: Optional[int], key: Optional[str],
+                 extra_metrics: Optional[Callable[[dict], dict]] = None) -> dict:
+    """工作进程任务：运行单组参数的仿真并返回指标行（结果写入缓存）"""
+    from src.utils.simulation import simulate
+
+    time, load = _worker_data[0], _worker_data[1]
+    if n_steps is not None:
+        time, load = time[:n_steps], load[:n_steps]
+
+    row = {"index": index, "status": "ok", "error": None}
+    try:
+        result = simulate(time, load, params)
+        if _worker_cache is not None:
+            _worker_cache.put(key, result.history, result.metrics)
+        row.update(result.metrics)
+        if extra_metrics is not None:
+            row.update(extra_metrics(result.history))
+        row["wall_time"] = result.wall_time
+        row["steps_per_sec"] = result.steps_per_sec
+    except Exception as e:  # 单个任务失败不影响其余任务
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def run_sweep(
+    time: np.ndarray,
+    load: np.ndarray,
+    variants: Sequence[ControlParams],
+    max_workers: Optional[int] = None,
+    max_retries: int = 2,
+    n_steps: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    cache: Optional[SimulationCache] = None,
+    extra_metrics: Optional[Callable[[dict], dict]] = None,
+) -> pd.DataFrame:
+    """
+    并行运行参数扫描
+
+    参数:
+        time: 时间序列 (s)
+        load: 负载序列 (kW)
+        variants: ControlParams 变体列表（可由 expand_grid 生成）
+        max_workers: 工作进程数，默认使用全部 CPU 核心
+        max_retries: 工作进程崩溃时单个任务的最大重试次数（只计入导致崩溃的任务）
+        n_steps: 仅使用数据前 n_steps 个点（用于预算受限的快速评估）
+        progress_callback: 进度回调 callback(done, total)
+        cache: 结果缓存，已缓存的组合不再分发到进程池，新结果由工作进程写入磁盘层
+        extra_metrics: 附加指标 f(history) -> dict，在工作进程中对仿真历史调用并并入指标行
+                       （须为模块级函数以便传给工作进程）
+
+    返回:
+        每组参数一行的结果表：参数字段 + 性能指标 + status/error/wall_time/steps_per_sec
+    """
+    time = np.asarray(time, dtype=np.float64)
+    load = np.asarray(load, dtype=np.float64)
+    if time.shape != load.shape or time.ndim != 1:
+        raise ValueError("time 与 load 必须为等长的一维数组")
+
+    total = len(variants)
+    if total == 0:
+        columns = ["index", *params_to_row(ControlParams()), "status", "error", "wall_time", "steps_per_sec"]
+        return pd.DataFrame(columns=columns).set_index("index")
+    max_workers = max_workers or os.cpu_count() or 1
+    rows: Dict[int, dict] = {}
+    attempts = {i: 0 for i in range(total)}
+
+    # 先在主进程中查询缓存，命中的组合无需仿真
+    keys: List[Optional[str]] = [None] * total
+    if cache is not None:
+        end = n_steps if n_steps is not None else len(time)
+        fingerprint = data_fingerprint(time[:end], load[:end])
+        for i, params in enumerate(variants):
+            keys[i] = simulation_key(None, None, params, fingerprint=fingerprint)
+            cached = cache.get(keys[i])
+            if cached is not None:
+                extra = extra_metrics(cached[0]) if extra_metrics is not None else {}
+                rows[i] = {"index": i, "status": "ok", "error": None, **cached[1], **extra,
+                           "wall_time": 0.0, "steps_per_sec": float("nan")}
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, time.nbytes + load.nbytes))
+    try:
+        shared = np.ndarray((2, len(time)), dtype=np.float64, buffer=shm.buf)
+        shared[0] = time
+        shared[1] = load
+
+        pending = [i for i in range(total) if i not in rows]
+        cache_config = cache.config() if cache is not None else None
+        # 进程池崩溃时所有未完成任务都会失败，无法判断是哪个任务导致的：
+        # 先把这批任务在单进程池中逐个重跑，只有确实导致崩溃的任务消耗重试次数
+        isolate = False
+        while pending:
+            pending, crashed = _run_pool(
+                shm.name, len(time), cache_config, variants, keys, pending, rows, attempts,
+                max_workers, max_retries, n_steps, progress_callback, total, isolate, extra_metrics,
+            )
+            isolate = crashed and not isolate
+    finally:
+        shm.close()
+        shm.unlink()
+
+    table = pd.DataFrame([
+        {**params_to_row(variants[i]), **rows[i]} for i in range(total)
+    ])
+    return table.set_index("index")
+
+
+def _run_pool(
+    shm_name: str,
+    n: int,
+    cache_config: Optional[dict],
+    variants: Sequence[ControlParams],
+    keys: List[Optional[str]],
+    pending: List[int],
+    rows: Dict[int, dict],
+    attempts: Dict[int, int],
+    max_workers: int,
+    max_retries: int,
+    n_steps: Optional[int],
+    progress_callback: Optional[Callable[[int, int], None]],
+    total: int,
+    isolate: bool = False,
+    extra_metrics: Optional[Callable[[dict], dict]] = None,
+) -> Tuple[List[int], bool]:
+    """
+    在一个进程池上运行待处理任务
+
+    参数:
+        isolate: 隔离模式，单个工作进程逐个提交任务，崩溃时可确定是哪个任务导致的
+
+    返回:
+        (进程池崩溃后仍需重试的任务索引列表, 是否发生崩溃)
+    """
+    retry: List[int] = []
+    crashed = False
+
+    def report():
+        if progress_callback is not None:
+            progress_callback(len(rows), total)
+
+    ctx = get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=1 if isolate else min(max_workers, len(pending)),
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(shm_name, n, cache_config),
+    ) as pool:
+        if isolate:
+            for pos, i in enumerate(pending):
+                try:
+                    rows[i] = pool.submit(_run_variant, i, variants[i], n_steps, keys[i], extra_metrics).result()
+                except BrokenProcessPool:
+                    # 只有该任务在运行，崩溃由它导致；之后的任务不计次数，换新进程池继续
+                    crashed = True
+                    attempts[i] += 1
+                    if attempts[i] > max_retries:
+                        rows[i] = {"index": i, "status": "error", "error": "工作进程异常退出"}
+                        report()
+                    else:
+                        retry.append(i)
+                    retry.extend(pending[pos + 1:])
+                    break
+                report()
+            return retry, crashed
+
+        futures = {pool.submit(_run_variant, i, variants[i], n_steps, keys[i], extra_metrics): i for i in pending}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                rows[i] = future.result()
+            except BrokenProcessPool:
+                # 工作进程异常退出（如内存不足），同批未完成任务都会失败，交给隔离模式重跑
+                crashed = True
+                retry.append(i)
+                continue
+            report()
+    return sorted(retry), crashed
+
+
+def sweep_summary(table: pd.DataFrame, sort_by: str = "load_tracking_rate") -> pd.DataFrame:
+    """按指标排序扫描结果（仅保留成功的任务）"""
+    ok = table[table["status"] == "ok"]
+    return ok.sort_values(sort_by, ascending=False)
+
@@ -0,0 +1,172 @@
+"""
+自动调参模块 - 基于逐次减半（Successive Halving）的预算受限参数搜索
+
+在逆流比例约束下最大化负载跟踪率，替代手工逐轮调整 buffer/alpha 的流程。
+每一轮在更长的数据前缀上评估候选参数，仅保留排名靠前的 1/eta 进入下一轮，
+最后一轮使用完整数据。
+"""
+
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.core import ControlParams
+from src.utils.sweep import params_to_row, run_sweep
+
+# 默认搜索空间: 字段名 -> (下限, 上限, 尺度)
+DEFAULT_SEARCH_SPACE: Dict[str, Tuple[float, float, str]] = {
+    "buffer": (1.0, 10.0, "linear"),
+    "alpha": (1e-4, 5e-2, "log"),
+    "up_risk_factor": (0.1, 1.0, "linear"),
+    "down_risk_factor": (1.0, 5.0, "linear"),
+    "local_uncertainty_weight": (0.0, 1.0, "linear"),
+}
+
+
+@dataclass
+class TuningResult:
+    """调参结果"""
+    best_params: ControlParams  # 最优参数
+    best_metrics: dict  # 最优参数在完整数据上的指标
+    feasible: bool  # 最优参数是否满足逆流约束
+    trace: pd.DataFrame  # 搜索轨迹（每轮每个候选一行）
+
+
+def sample_candidates(
+    base: ControlParams,
+    n: int,
+    search_space: Dict[str, Tuple[float, float, str]],
+    rng: np.random.Generator,
+) -> list:
+    """
+    在搜索空间中随机采样候选参数（第一个候选为基准参数本身）
+
+    参数:
+        base: 基准参数
+        n: 候选数量
+        search_space: 搜索空间
+        rng: 随机数生成器
+    """
+    candidates = [base]
+    for _ in range(n - 1):
+        values = {}
+        for name, (low, high, scale) in search_space.items():
+            if scale == "log":
+                values[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+            else:
+                values[name] = float(rng.uniform(low, high))
+        candidates.append(replace(base, **values))
+    return candidates
+
+
+def _rank(table: pd.DataFrame, max_backflow_ratio: float) -> pd.DataFrame:
+    """
+    对候选排序：满足约束者优先并按负载跟踪率降序，不满足者按逆流比例升序
+    """
+    ranked = table.copy()
+    # 所有候选都失败时表中没有指标列，按 NaN 处理
+    missing = pd.Series(np.nan, index=ranked.index)
+    backflow_ratio = ranked.get("backflow_ratio", missing)
+    ok = ranked["status"] == "ok"
+    ranked["feasible"] = ok & (backflow_ratio <= max_backflow_ratio)
+    ranked["score"] = np.where(
+        ranked["feasible"],
+        ranked.get("load_tracking_rate", missing),
+        -backflow_ratio.fillna(np.inf) - 1e6,
+    )
+    return ranked.sort_values("score", ascending=False)
+
+
+def auto_tune(
+    time: np.ndarray,
+    load: np.ndarray,
+    base: Optional[ControlParams] = None,
+    max_backflow_ratio: float = 10.0,
+    n_candidates: int = 27,
+    eta: int = 3,
+    min_fraction: Optional[float] = None,
+    search_space: Optional[Dict[str, Tuple[float, float, str]]] = None,
+    seed: Optional[int] = 0,
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> TuningResult:
+    """
+    自动搜索 buffer、alpha、风险系数和局部不确定性权重
+
+    参数:
+        time: 时间序列 (s)
+        load: 负载序列 (kW)
+        base: 基准参数，未搜索的字段沿用该值
+        max_backflow_ratio: 逆流比例约束上限 (%)
+        n_candidates: 初始候选数量
+        eta: 每轮保留比例的倒数
+        min_fraction: 第一轮使用的数据比例，默认使最后一轮恰好用完整数据
+        search_space: 搜索空间，默认为 DEFAULT_SEARCH_SPACE
+        seed: 随机种子
+        max_workers: 并行工作进程数
+        progress_callback: 轮次进度回调 callback(rung, n_rungs)
+
+    返回:
+        TuningResult: 最优参数、指标和搜索轨迹
+
+    异常:
+        RuntimeError: 某一轮所有候选的仿真都失败
+    """
+    base = base or ControlParams()
+    search_space = search_space or DEFAULT_SEARCH_SPACE
+    rng = np.random.default_rng(seed)
+
+    n_total = len(load)
+    # 轮数：候选数每轮缩减为 1/eta，直至剩余 1 个
+    n_rungs, remaining = 1, n_candidates
+    while remaining >= eta:
+        remaining //= eta
+        n_rungs += 1
+    if min_fraction is None:
+        min_fraction = float(eta) ** -(n_rungs - 1)
+
+    candidates = sample_candidates(base, n_candidates, search_space, rng)
+    alive = list(range(len(candidates)))
+    traces = []
+    ranked = None
+
+    for rung in range(n_rungs):
+        last = rung == n_rungs - 1 or len(alive) == 1
+        fraction = 1.0 if last else min(1.0, min_fraction * eta ** rung)
+        n_steps = max(1, int(n_total * fraction))
+
+        table = run_sweep(
+            time, load, [candidates[i] for i in alive],
+            max_workers=max_workers,
+            n_steps=None if n_steps >= n_total else n_steps,
+        )
+        table.index = alive
+        if not (table["status"] == "ok").any():
+            raise RuntimeError(f"第 {rung + 1} 轮的 {len(alive)} 个候选全部仿真失败，"
+                               f"首个错误: {table['error'].iloc[0]}")
+        ranked = _rank(table, max_backflow_ratio)
+
+        trace = ranked.copy()
+        trace.insert(0, "rung", rung)
+        trace.insert(1, "n_steps", n_steps)
+        traces.append(trace.rename_axis("candidate").reset_index())
+
+        if progress_callback is not None:
+            progress_callback(rung + 1, n_rungs)
+        if last:
+            break
+        alive = list(ranked.index[: max(1, len(alive) // eta)])
+
+    best_index = ranked.index[0]
+    best_row = ranked.iloc[0]
+    metric_keys = [k for k in table.columns if k not in params_to_row(base)
+                   and k not in ("status", "error", "feasible", "score")]
+
+    return TuningResult(
+        best_params=candidates[best_index],
+        best_metrics={k: best_row[k] for k in metric_keys},
+        feasible=bool(best_row["feasible"]),
+        trace=pd.concat(traces, ignore_index=True),
+    )